@@ -0,0 +1,96 @@
+"""
+Memory benchmark of one WFS chunk: the response is logged
+(_log_response), converted (_wfs_response_geojson) and serialized
+(_dump_wfs_chunk) while tracemalloc records the peak allocation.  The
+low_memory path writes the chunk to a gzip temp file, the string path
+returns the compact string of get_wfs_geojsons.  The 'before' column
+replays the earlier low_memory serialization (dumps, then re-parse and
+re-serialize in _write_geojson_files).  Chunks are built by repeating the
+features of the recorded test fixtures (tests/fixtures/pbf).  Peaks
+depend on the Python version and the JSON backend (grale.GRALE_JSON).
+Run from the repository root:
+
+    python benchmarks/bench_chunk_memory.py [n_features]
+"""
+import io
+import contextlib
+import gc
+import json
+import os
+import shutil
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, 'src'))
+import grale
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           os.pardir, 'tests', 'fixtures', 'pbf')
+URL = ('https://example.com/arcgis/rest/services/Test/FeatureServer/0/query'
+       '?where=1%3D1&outFields=*&f=json&resultOffset=0&resultRecordCount=20000')
+#------------------------------------------------------------------------------
+def chunk_body(name, n_features):
+    """
+    Return an f=json response body of n_features repeating the fixture
+    features.
+    """
+    with open(os.path.join(FIXTURE_DIR, f'{name}.json'), 'rb') as f:
+        esri_json = json.loads(f.read())
+    features = esri_json['features']
+    esri_json['features'] = [features[i % len(features)]
+                             for i in range(n_features)]
+    return json.dumps(esri_json).encode()
+
+def dump_before(geoJsonDict, temp_dir=None):
+    """
+    The low_memory serialization before the single pass _dump_wfs_chunk.
+    """
+    gj = grale.GRALE_JSON.dumps(geoJsonDict)
+    if temp_dir:
+        tf = grale._write_geojson_files(geojsons=[gj], out_dir=temp_dir,
+                                        low_memory=True)[0]
+        return tf, sys.getsizeof(gj), os.path.getsize(tf)
+    return gj, 0, 0
+
+def peak(body, dump, temp_dir):
+    """
+    Return the tracemalloc peak (MB) of one chunk through the pipeline,
+    the response body is allocated before tracing starts.
+    """
+    metadata = {'name': 'bench', 'id': 0}
+    log = grale.graleReqestLog()
+    gc.collect()
+    tracemalloc.start()
+    resp = grale._build_response(URL, 200, body,
+                                 {'Content-Type': 'application/json'})
+    with contextlib.redirect_stdout(io.StringIO()):
+        resp, status, _ = grale._log_response(URL, resp, '', '', log=log,
+                                              pid='pid')
+        geoJsonDict = grale._wfs_response_geojson(resp, status, 'JSON',
+                                                  metadata, log.log['pid'])
+        del(resp)
+        gj = dump(geoJsonDict, temp_dir)
+        del(geoJsonDict, gj)
+    peak_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak_bytes / 1024**2
+#------------------------------------------------------------------------------
+if __name__ == '__main__':
+    n_features = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print(f'{"fixture":<22}{"body":>9}{"mode":>12}{"before":>9}{"after":>9}'
+          '   (MB, tracemalloc peak)')
+    temp_dir = tempfile.mkdtemp()
+    try:
+        for name in ('points_upper_left', 'polylines_z_multipart',
+                     'polygons_lower_left'):
+            body = chunk_body(name, n_features)
+            body_mb = len(body) / 1024**2
+            for mode, d in (('low_memory', temp_dir), ('string', None)):
+                before = peak(body, dump_before, d)
+                after = peak(body, grale._dump_wfs_chunk, d)
+                print(f'{name:<22}{body_mb:>9.1f}{mode:>12}'
+                      f'{before:>9.1f}{after:>9.1f}')
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
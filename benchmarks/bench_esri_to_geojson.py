@@ -0,0 +1,88 @@
+"""
+Benchmark of the ESRI JSON to GeoJSON chunk conversion, grale's
+vectorized esri_to_geojson against the per-feature arcgis2geojson
+package.  Large chunks are built by repeating the features of the
+recorded test fixtures (tests/fixtures/pbf), and the polygon fixture
+rings are also densified (every edge split into 'vertices' segments)
+to compare the converters on detailed polygons.  Run from the
+repository root:
+
+    python benchmarks/bench_esri_to_geojson.py [n_features]
+"""
+import copy
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, 'src'))
+import grale
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           os.pardir, 'tests', 'fixtures', 'pbf')
+FIXTURES = ['points_upper_left', 'polylines_z_multipart', 'polygons_lower_left']
+#------------------------------------------------------------------------------
+def densify(ring, vertices):
+    """
+    Return a ring with every edge split into the given number of segments.
+    """
+    out = []
+    for (x1, y1), (x2, y2) in zip(ring[:-1], ring[1:]):
+        out.extend([x1 + (x2 - x1) * k / vertices, y1 + (y2 - y1) * k / vertices]
+                   for k in range(vertices))
+    return out + [ring[-1]]
+
+def chunk(name, n_features, vertices=None):
+    """
+    Return an ESRI JSON chunk of n_features repeating the fixture features,
+    optionally densifying the polygon rings.
+    """
+    with open(os.path.join(FIXTURE_DIR, f'{name}.json'), 'rb') as f:
+        esri_json = json.loads(f.read())
+    features = esri_json['features']
+    if vertices:
+        for f in features:
+            f['geometry']['rings'] = [densify(r, vertices)
+                                      for r in f['geometry']['rings']]
+    esri_json['features'] = [copy.deepcopy(features[i % len(features)])
+                             for i in range(n_features)]
+    return esri_json
+
+def best_of(fn, esri_json, repeat=3):
+    """
+    Return the best time of repeat conversions of fresh chunk copies and
+    the last result.
+    """
+    times = []
+    for _ in range(repeat):
+        data = copy.deepcopy(esri_json)
+        t = time.perf_counter()
+        result = fn(data)
+        times.append(time.perf_counter() - t)
+    return min(times), result
+#------------------------------------------------------------------------------
+if __name__ == '__main__':
+    n_features = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    try:
+        from arcgis2geojson import arcgis2geojson
+    except ImportError:
+        arcgis2geojson = None
+        print('arcgis2geojson is not installed, timing esri_to_geojson only')
+
+    cases = [(name, n_features, None) for name in FIXTURES] + \
+            [('polygons_lower_left', n_features // 100, 16),
+             ('polygons_lower_left', n_features // 2500, 128)]
+    print(f'{"fixture":<30}{"features":>10}{"arcgis2geojson(s)":>19}'
+          f'{"esri_to_geojson(s)":>20}{"speedup":>9}{"identical":>11}')
+    for name, n, vertices in cases:
+        esri_json = chunk(name, n, vertices)
+        if vertices:
+            name = f'{name} x{vertices}'
+        new_t, new = best_of(grale.esri_to_geojson, esri_json)
+        if arcgis2geojson is None:
+            print(f'{name:<30}{n:>10}{"-":>19}{new_t:>20.3f}')
+            continue
+        old_t, old = best_of(arcgis2geojson, esri_json)
+        print(f'{name:<30}{n:>10}{old_t:>19.3f}{new_t:>20.3f}'
+              f'{old_t / new_t:>8.1f}x{str(old == new):>11}')
@@ -0,0 +1,81 @@
+"""
+Benchmark of the chunk pipeline per JSON backend (grale.GRALE_JSON):
+parse an f=json chunk response, convert it to GeoJSON and serialize the
+chunk (compact, as returned by get_wfs_geojsons) and the output file
+(2 and 4 space indents, as written by outputProfile).  Chunks are built
+by repeating the features of the recorded test fixtures
+(tests/fixtures/pbf).  The 'json' standard library backend is the
+baseline.  Run from the repository root:
+
+    python benchmarks/bench_json_codec.py [n_features]
+"""
+import io
+import contextlib
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, 'src'))
+import grale
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           os.pardir, 'tests', 'fixtures', 'pbf')
+#------------------------------------------------------------------------------
+def chunk_body(name, n_features):
+    """
+    Return an f=json response body of n_features repeating the fixture
+    features.
+    """
+    with open(os.path.join(FIXTURE_DIR, f'{name}.json'), 'rb') as f:
+        esri_json = json.loads(f.read())
+    features = esri_json['features']
+    esri_json['features'] = [features[i % len(features)]
+                             for i in range(n_features)]
+    return json.dumps(esri_json).encode()
+
+def best_of(fn, repeat=3):
+    times = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - t)
+    return min(times), result
+
+def run(body):
+    """
+    Time the parse, convert and serialize steps of one chunk.
+    """
+    ld = {'ppid': 'p', 'utc_timestamp': 't', 'grale_uuid': 'u'}
+    def parse():
+        resp = grale._build_response('http://host/query?f=json', 200, body,
+                                     {'Content-Type': 'application/json'})
+        return grale._response_json(resp)
+    parse_t, esri_json = best_of(parse)
+    convert_t, gj = best_of(lambda: grale.esri_to_geojson(esri_json))
+    dumps_t, _ = best_of(lambda: grale.GRALE_JSON.dumps(gj))
+    indent2_t, _ = best_of(lambda: grale.outputProfile(indent=2).dumpb(gj))
+    indent4_t, _ = best_of(lambda: grale.outputProfile(indent=4).dumpb(gj))
+    return parse_t, convert_t, dumps_t, indent2_t, indent4_t
+#------------------------------------------------------------------------------
+if __name__ == '__main__':
+    n_features = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print(f'{"fixture":<22}{"backend":>8}{"parse":>8}{"convert":>9}'
+          f'{"dumps":>8}{"chunk":>8}{"features/s":>12}'
+          f'{"indent=2":>10}{"indent=4":>10}   (seconds)')
+    for name in ('points_upper_left', 'polylines_z_multipart',
+                 'polygons_lower_left'):
+        body = chunk_body(name, n_features)
+        for backend in ('json', 'ujson', 'orjson'):
+            with contextlib.redirect_stdout(io.StringIO()):
+                grale.GRALE_JSON.backend = backend
+            if grale.GRALE_JSON.backend != backend:
+                print(f'{name:<22}{backend:>8}  not installed')
+                continue
+            parse_t, convert_t, dumps_t, i2, i4 = run(body)
+            chunk_t = parse_t + convert_t + dumps_t
+            print(f'{name:<22}{backend:>8}{parse_t:>8.3f}{convert_t:>9.3f}'
+                  f'{dumps_t:>8.3f}{chunk_t:>8.3f}{n_features / chunk_t:>12.0f}'
+                  f'{i2:>10.3f}{i4:>10.3f}')
+    grale.GRALE_JSON.backend = None
@@ -41,8 +41,8 @@ setuptools.setup(
     install_requires=[                      # package dependencies
                         'urllib3>=1.26.8',
                         'requests_pkcs12>=1.14', 
-                        'arcgis2geojson>=3.0.1',
+                        'numpy>=1.17',
                         'pandas >= 1.0.0',
-                        'shapely >= 1.7, < 2'
+                        'shapely >= 2.0'
                     ]
     )
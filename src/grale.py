@@ -32,24 +32,28 @@ __info__ = \
  
     '''
 __all__         = [ 'THREAD_LOCAL', 'MESSAGE_LOCK', 
-                    'GRALE_SESSION', 'GRALE_LOG',
+                    'GRALE_SESSION', 'GRALE_LOG', 'GRALE_JSON',
+                    'GRALE_OUTPUT', 'outputProfile', 'metadataCache',
+                    'responseCache',
                     'ESRI','geojsons_to_df', 
                     'merge_geojsons', 'parse_qs', 
+                    'esri_to_geojson', 'esri_pbf_to_json',
                     'read_geojson', 'read_geojsons', 
                     'graleReqestLog', 'sessionWrapper', 
-                    'esri'
+                    'jsonCodec', 'esri'
                   ]
 #------------------------------------------------------------------------------ 
-import sys, os, re, uuid, json, gzip, requests, requests_pkcs12, urllib3
-from concurrent.futures import ThreadPoolExecutor
-from urllib.parse import urlparse, parse_qs
-from arcgis2geojson import arcgis2geojson
-from datetime import datetime as dt
-from shutil import rmtree
+import sys, os, re, uuid, json, gzip, numbers, struct, requests, requests_pkcs12, urllib3
+import asyncio, tempfile, time, queue, hashlib, bisect, weakref
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlparse, parse_qs, parse_qsl, urlencode
+from collections import deque
+from datetime import datetime as dt, timedelta
 import threading
 
+import numpy as np
 import pandas as pd
-from shapely.geometry import shape 
+import shapely
 #------------------------------------------------------------------------------                    
 #------------------------------------------------------------------------------ 
 # functions
@@ -313,7 +317,7 @@ def _prep_url(url, headers={}, req_type='GET'):
                                   ).prepare().url
     return preped_url
 #------------------------------------------------------------------------------    
-def _request_handler(url, showMessages=False, log=None, pid=None):
+def _request_handler(url, showMessages=False, log=None, pid=None, cache=None):
     """
     Function acts as a request handler for to logging and/or 
     print response status and error messages. Errors will return 
@@ -334,6 +338,9 @@ def _request_handler(url, showMessages=False, log=None, pid=None):
     pid : str, optional
         Unique process.request id for logging
         Default, str(uuid.uuid4())
+    cache : metadataCache, optional
+        Persistent cache the response is read from or stored in;
+        Default, None sends the request with GRALE_SESSION.get
     Returns
     -------
     rtn_tuple : tuple 
@@ -357,49 +364,416 @@ def _request_handler(url, showMessages=False, log=None, pid=None):
     resp    = None
     status  = ''
     message = ''
-    elapsed_time = '0 (ms)'
-    size_bytes = 0
-    
-    if not log:
-        log=GRALE_LOG
         
     try:   
-        resp = GRALE_SESSION.get(url)
+        if cache is not None:
+            resp = cache.get(url)
+        else:
+            resp = GRALE_SESSION.get(url)
         resp.raise_for_status()
-        
-    except requests.exceptions.HTTPError as err:
-        status  = 'Error: (HTTPError)'
-        message = err
-    except requests.exceptions.ConnectionError as err:
-        status  = 'Error: (ConnectionError)'
-        message = err
-    except requests.exceptions.Timeout as err:
-        status  = 'Error: (Timeout)'
+    except requests.exceptions.RequestException as err:
+        status  = _request_error_status(err)
         message = err
+    return _log_response(url, resp, status, message, 
+                         showMessages=showMessages, log=log, pid=pid)
+#------------------------------------------------------------------------------    
+async def _arequest_handler(url, showMessages=False, log=None, pid=None, 
+                            client=None):
+    """
+    Asynchronous variant of _request_handler which awaits 
+    GRALE_SESSION.aget, logging and/or printing response status and 
+    error messages with the same semantics as _request_handler.
+    
+    Parameters
+    ----------
+    url : str, required
+        REST API url for the ESRI Feature Service
+    showMessages: Boolean, optional
+        Boolean option to print messages;
+        Default, no messages will be printed to the console
+    log : object, optional
+        grale request logging object (processLog class).
+        If unspecified logging results will persist in grale.GRALE_LOG.log;       
+    pid : str, optional
+        Unique process.request id for logging
+        Default, str(uuid.uuid4())
+    client : aiohttp.ClientSession, optional
+        Client session from GRALE_SESSION._aclient() shared between 
+        requests;
+        Default, a client session is opened for the request
+    Returns
+    -------
+    rtn_tuple : tuple 
+        rtn_tuple:  tuple containing the response object (resp), 
+                    the status category (status), and a more detailed 
+                    message to convey response results (message)    
+    """
+    resp    = None
+    status  = ''
+    message = ''
+        
+    try:   
+        resp = await GRALE_SESSION.aget(url, client=client)
+        resp.raise_for_status()
     except requests.exceptions.RequestException as err:
-        status  = 'Error: (Unidentified)'
+        status  = _request_error_status(err)
         message = err
-    finally:
-        if bool(resp):
-            if resp.status_code != 200 or 'error' in (resp.text).lower():
-                status   = 'Error: (Unidentified)'
-                message  = f'ResponseText:{resp.text}'
-            else:    
-                status   = 'Success'
-                message  = [f'Size: {len(resp.content)}(B),' 
-                           f'Time :{resp.elapsed.total_seconds()}(s)']
-                
-            elapsed_time = f'{resp.elapsed.total_seconds()*1000}(ms)'
-            size_bytes = f'{len(resp.content)}(B)'
+    return _log_response(url, resp, status, message, 
+                         showMessages=showMessages, log=log, pid=pid)
+#------------------------------------------------------------------------------    
+def _request_error_status(err):
+    """
+    Function returns the grale status category for a requests 
+    exception raised during a request/response cycle.
+    
+    Parameters
+    ----------
+    err : requests.exceptions.RequestException, required
+        Exception raised by a request
+    Returns
+    -------
+    status : str 
+        Status category, Ex. 'Error: (Timeout)'
+    """
+    if isinstance(err, requests.exceptions.HTTPError):
+        return 'Error: (HTTPError)'
+    elif isinstance(err, requests.exceptions.ConnectionError):
+        return 'Error: (ConnectionError)'
+    elif isinstance(err, requests.exceptions.Timeout):
+        return 'Error: (Timeout)'
+    return 'Error: (Unidentified)'
+#------------------------------------------------------------------------------    
+def _log_measure(ld):
+    """
+    Function returns the elapsed time (seconds) and size (bytes) of a 
+    response from its log entry (graleReqestLog.log[pid]).
+    """
+    measure = []
+    for key in ('elapsed_time', 'size'):
+        value = re.match(r'[\d.]+', str(ld.get(key, 0)))
+        measure.append(float(value.group()) if value else 0.0)
+    return measure[0] / 1000, measure[1]
+#------------------------------------------------------------------------------    
+def _is_overload(ld):
+    """
+    Function returns True when the log entry of a response 
+    (graleReqestLog.log[pid]) records a timeout, dropped connection or 
+    5xx server error, Ex. a chunk too large for the server to answer.
+    """
+    status = str(ld.get('status', ''))
+    if status in ('Error: (Timeout)', 'Error: (ConnectionError)'):
+        return True
+    results = str(ld.get('results', ''))
+    return status.startswith('Error') and bool(
+        re.match(r'5\d\d ', results) or 
+        re.search(r'too many 5\d\d error|[\'"]code[\'"]:\s*5\d\d\b', results))
+#------------------------------------------------------------------------------    
+def _response_json(resp):
+    """
+    Function returns the parsed JSON body of a response.  The body is 
+    parsed once and kept on the response ('grale_json') so error checks
+    and callers share the same object.
+    """
+    if not hasattr(resp, 'grale_json'):
+        resp.grale_json = GRALE_JSON.loads(resp.content)
+    return resp.grale_json
+#------------------------------------------------------------------------------    
+def _is_esri_error(resp):
+    """
+    Function returns True when a response body is an error message.  JSON 
+    bodies are parsed (once, see _response_json) and checked for the 
+    top-level ESRI 'error' key, other bodies (Ex. HTML error pages) are 
+    checked for 'error' within a bounded prefix, so feature attributes 
+    containing "error" are not flagged and large bodies are not decoded 
+    or copied.
+    """
+    head = resp.content[:1024].lstrip()
+    if head[:1] in (b'{', b'['):
+        try:
+            body = _response_json(resp)
+        except ValueError:
+            pass
+        else:
+            return isinstance(body, dict) and \
+                ('error' in body or body.get('status') == 'error')
+    return b'error' in head.lower()
+#------------------------------------------------------------------------------    
+def _is_congested(resp):
+    """
+    Function returns True when a response, or a retry made by 
+    urllib3 on the way to it, was a 429/503 status or a timeout. 
+    """
+    if resp.status_code in (429, 503):
+        return True
+    history = getattr(getattr(resp.raw, 'retries', None), 'history', None) or ()
+    return any(h.status in (429, 503) or 
+               isinstance(h.error, urllib3.exceptions.TimeoutError)
+               for h in history)
+#------------------------------------------------------------------------------    
+def _log_response(url, resp, status, message, showMessages=False, log=None, 
+                  pid=None):
+    """
+    Function evaluates a response for errors, then logs and/or 
+    prints the response status and message for _request_handler 
+    and _arequest_handler.
+    
+    Parameters
+    ----------
+    url : str, required
+        REST API url for the ESRI Feature Service
+    resp : requests.Response, required
+        Response object or None when the request raised an exception
+    status : str, required
+        Status category set by a request exception, else ''
+    message : str, required
+        Status message set by a request exception, else ''
+    showMessages: Boolean, optional
+        Boolean option to print messages;
+        Default, no messages will be printed to the console
+    log : object, optional
+        grale request logging object (processLog class).
+        If unspecified logging results will persist in grale.GRALE_LOG.log;       
+    pid : str, optional
+        Unique process.request id for logging
+        Default, str(uuid.uuid4())
+    Returns
+    -------
+    rtn_tuple : tuple 
+        rtn_tuple:  tuple containing the response object (resp), 
+                    the status category (status), and a more detailed 
+                    message to convey response results (message)    
+    """
+    elapsed_time = '0 (ms)'
+    size_bytes = 0
+    
+    if not log:
+        log=GRALE_LOG
+
+    if bool(resp):
+        size = len(resp.content)
+        # protocol buffer bodies are binary, errors are returned as JSON
+        is_pbf = 'protobuf' in resp.headers.get('Content-Type', '')
+        if resp.status_code != 200 or (not is_pbf and _is_esri_error(resp)):
+            status   = 'Error: (Unidentified)'
+            message  = f'ResponseText:{resp.text}'
+        else:    
+            status   = 'Success'
+            message  = [f'Size: {size}(B),' 
+                       f'Time :{resp.elapsed.total_seconds()}(s)']
+            if getattr(resp, 'grale_cache', None):
+                message.append(f'Cache: {resp.grale_cache}')
+            
+        elapsed_time = f'{resp.elapsed.total_seconds()*1000}(ms)'
+        size_bytes = f'{size}(B)'
+    # time queued behind the host rate limit (sessionWrapper.rate_limits)
+    rate_wait = getattr(resp if resp is not None else message, 
+                        'grale_rate_wait', 0) or 0
     if showMessages:
         _print(f'\t-{status} |:| {message}')
-    log.log_message(url, status, message, elapsed_time, size_bytes, pid)
+    # log the exception text, the log is serialized with the chunk outputs
+    log.log_message(url, status, 
+                    str(message) if isinstance(message, Exception) else message,
+                    elapsed_time, size_bytes, pid,
+                    rate_wait=f'{rate_wait*1000}(ms)')
     rtn_tuple = (resp, status, message)
     return rtn_tuple    
+#------------------------------------------------------------------------------    
+def _build_response(url, status_code, content, headers=None, 
+                    elapsed=0, reason=None):
+    """
+    Function builds a requests.Response object from a response 
+    body and status so responses that were not returned by a 
+    requests.Session (ex. asyncio requests) can be handled the same 
+    as standard responses.
+    
+    Parameters
+    ----------
+    url : str, required
+        Request url
+    status_code : int, required
+        HTTP status code of the response
+    content : bytes, required
+        Response body
+    headers : dict, optional
+        Response headers;
+        Default, None
+    elapsed : float, optional
+        Elapsed request time in seconds;
+        Default, 0
+    reason : str, optional
+        HTTP status reason, Ex. 'OK';
+        Default, None
+    Returns
+    -------
+    resp : requests.Response 
+        Response object 
+    """
+    resp = requests.Response()
+    resp.url = url
+    resp.status_code = status_code
+    resp.reason = reason
+    resp._content = content
+    resp.headers = requests.structures.CaseInsensitiveDict(headers or {})
+    resp.encoding = requests.utils.get_encoding_from_headers(resp.headers)
+    resp.elapsed = timedelta(seconds=elapsed)
+    return resp
+#------------------------------------------------------------------------------    
+def _make_temp_dir():
+    """
+    Function creates and returns a uniquely named temporary 
+    directory used to store low memory (gzip) outputs.
+    """
+    temp_dir = os.path.join(tempfile.gettempdir(),
+                            _validate_file_name(str(uuid.uuid4()))
+                            )
+    os.mkdir(temp_dir)
+    return temp_dir
+#------------------------------------------------------------------------------    
+def _wfs_response_geojson(response, status, f, metadata, ld):
+    """
+    Function converts an ESRI REST WFS chunk response into a 
+    grale geojson dictionary, embedding the request logging and 
+    request metadata keys and tagging each feature with the 
+    'grale_utc' and 'grale_uuid' properties.  Errored responses 
+    return an empty FeatureCollection.  
+    
+    Parameters
+    ----------
+    response : requests.Response, required
+        Response object of the chunk request
+    status : str, required
+        Status category of the chunk request
+    f : str, required
+        Requested response format, 'JSON', 'PBF' or 'geoJSON'
+    metadata : dictionary, required
+        ESRI service metadata 
+    ld : dictionary, required
+        Log entry for the chunk request (graleReqestLog.log[pid])
+    Returns
+    -------
+    geoJsonDict : dictionary 
+        grale geojson dictionary 
+    """
+    # check for errors and return empty json with errors
+    if not status.startswith('Error:'):
+        if f  == 'JSON':
+            # convert ESRI JSON records to a dictionary/sudo geojson 
+            geoJsonDict = esri_to_geojson(_response_json(response))
+        elif f  == 'PBF' and response.content[:1] != b'{':
+            # decode ESRI protocol buffer records then convert to geojson 
+            geoJsonDict = esri_to_geojson(esri_pbf_to_json(response.content))
+        elif f  == 'PBF':
+            # server answered the pbf request with JSON
+            geoJsonDict = esri_to_geojson(_response_json(response))
+        elif f  == 'geoJSON':
+            geoJsonDict = _response_json(response)
+    else:
+        geoJsonDict = {'type':'FeatureCollection'}
+
+    # tag the request_metadata with the grale_uuid
+    metadata['ppid']= ld['ppid']
+
+    # add the request logging to the geojson feature
+    geoJsonDict['request_logging']  = [ld]
+
+    # embed WFS metadata within the geojson object        
+    geoJsonDict['request_metadata']  = [metadata] 
+
+    # add a record level request timestamp attribute      
+    if 'features' in geoJsonDict:
+        for f in geoJsonDict['features']:
+            f['properties']['grale_utc'] = ld['utc_timestamp']
+            f['properties']['grale_uuid'] = ld['grale_uuid']
+    else:
+         geoJsonDict['features'] = []
+    return geoJsonDict
+#------------------------------------------------------------------------------    
+def _dump_wfs_chunk(geoJsonDict, temp_dir=None):
+    """
+    Function serializes a grale geojson dictionary to a string or, 
+    when a temp directory is supplied (low memory), to a gzip file.
+    
+    Parameters
+    ----------
+    geoJsonDict : dictionary, required
+        grale geojson dictionary 
+    temp_dir : str, optional
+        Directory to write the gzip file within;
+        Default, None returns the geojson string
+    Returns
+    -------
+    rtn_tuple : tuple 
+        rtn_tuple:  tuple containing the geojson string or gzip 
+                    file path, the uncompressed size and the 
+                    compressed size in bytes
+    """
+    # if low memory, serialize once and write the bytes to a gzip temp file
+    if temp_dir:
+        gj = GRALE_OUTPUT.dumpb(geoJsonDict)
+        tf = _get_file_name_seq_path(
+                        os.path.join(temp_dir, 
+                                     f'{_geojson_file_name(geoJsonDict)}.gz'))
+        with gzip.open(tf, 'wb', compresslevel=GRALE_OUTPUT.compresslevel) as f:
+            f.write(gj)
+        return tf, len(gj), os.path.getsize(tf)
+    return GRALE_JSON.dumps(geoJsonDict), 0, 0
+#------------------------------------------------------------------------------  
+def _geojson_file_name(data, delim='_._', prefix=None, suffix=None):
+    """
+    Function returns the output file name (without extension) of a 
+    grale geojson dictionary built from the request metadata and 
+    request logging, see _write_geojson_files.
+    
+    Parameters
+    ----------
+    data : dictionary, required
+        grale geojson dictionary
+    delim: str, optional
+        File name delimitator;
+        Default, '_._'
+    prefix : str, optional
+        File name prefix;
+        Default, None uses 'serviceName_._serviceId'
+    suffix : str, optional
+        File name suffix;
+        Default, None uses 'timeStamp_._resultOffset_._requestUUID'
+    """
+    f_name = 'temp'
+    if not prefix:
+        if 'request_metadata' in data: 
+            md = data['request_metadata'][0]
+            if 'name' in md:
+                f_name = f"{md['name']}"
+            if 'id' in md:
+                f_name += f"{delim}{md['id']}" 
+    else:
+        f_name = prefix
+        
+    if not suffix:
+        sd = []
+        if 'request_logging' in data:
+            rl = data['request_logging'][0]
+            if 'utc_timestamp' in rl:
+                sd.append(rl['utc_timestamp'])
+            else:
+                sd.append(dt.utcnow().isoformat(timespec='seconds', sep='T'))
+            if 'parameters' in rl:
+                if 'resultOffset' in rl['parameters']:
+                    sd.append(rl['parameters']['resultOffset'][0])
+            if 'grale_uuid' in rl: 
+                sd.append((rl['grale_uuid']).replace('_',delim))
+        elif bool(f_name):
+            sd.append(dt.utcnow().isoformat(timespec='seconds', sep='T'))    
+        else:
+            sd.append(dt.utcnow().isoformat(timespec='seconds', sep='T'))
+        f_name += delim.join(sd)
+    else:
+        f_name += f"{delim}{suffix}"
+    return f_name
 #------------------------------------------------------------------------------  
 def _write_geojson_files(geojsons, out_dir, delim = '_._', 
                       ext='geojson', prefix=None, suffix=None,
-                      low_memory=None):
+                      low_memory=None, profile=None):
     """
     Function takes in a list of geojson/json strings or file paths
     to write results to an output directory/file.  
@@ -429,49 +803,23 @@ def _write_geojson_files(geojsons, out_dir, delim = '_._',
     low_memory : bool, optional
         If true, results are compressed using gzip format;
         Default None or False              
+    profile : outputProfile, optional
+        Output serialization options (indent, coordinate
+        precision and gzip compression level);
+        Default, None uses grale.GRALE_OUTPUT
     Returns
     -------
     file_paths : list 
         file_paths:  list of output file paths.    
     """
-    
+    if profile is None:
+        profile = GRALE_OUTPUT
     file_paths = []
     for i in geojsons: 
         data = read_geojson(i)
         if not bool(data):
             continue
-        f_name = 'temp'
-        if not prefix:
-            if 'request_metadata' in data: 
-                md = data['request_metadata'][0]
-                if 'name' in md:
-                    f_name = f"{md['name']}"
-                if 'id' in md:
-                    f_name += f"{delim}{md['id']}" 
-        else:
-            f_name = prefix
-            
-        if not suffix:
-            sd = []
-            if 'request_logging' in data:
-                rl = data['request_logging'][0]
-                if 'utc_timestamp' in rl:
-                    sd.append(rl['utc_timestamp'])
-                else:
-                    sd.append(dt.utcnow().isoformat(timespec='seconds', sep='T'))
-                if 'parameters' in rl:
-                    if 'resultOffset' in rl['parameters']:
-                        sd.append(rl['parameters']['resultOffset'][0])
-                if 'grale_uuid' in rl: 
-                    sd.append((rl['grale_uuid']).replace('_',delim))
-            elif bool(f_name):
-                sd.append(dt.utcnow().isoformat(timespec='seconds', sep='T'))    
-            else:
-                sd.append(dt.utcnow().isoformat(timespec='seconds', sep='T'))
-            f_name += delim.join(sd)
-        else:
-            f_name += f"{delim}{suffix}"
-                
+        f_name = _geojson_file_name(data, delim, prefix, suffix)
         if not low_memory and ext != '.gz': 
             f_path = _get_file_name_seq_path(
                                  os.path.join(
@@ -479,8 +827,8 @@ def _write_geojson_files(geojsons, out_dir, delim = '_._',
                                               f'{f_name}.{ext}'
                                               )
                                             ) 
-            with open(f_path, 'w') as gjf:
-                gjf.write(json.dumps(data, indent=4))
+            with open(f_path, 'wb') as gjf:
+                gjf.write(profile.dumpb(data))
         else:
             f_path = _get_file_name_seq_path(
                                  os.path.join(
@@ -488,11 +836,724 @@ def _write_geojson_files(geojsons, out_dir, delim = '_._',
                                               f'{f_name}.{"gz"}'
                                               )
                                             )                   
-            with gzip.open(f_path, 'wb') as f:
-                f.write(json.dumps(data, indent=4).encode()) 
+            with gzip.open(f_path, 'wb', compresslevel=profile.compresslevel) as f:
+                f.write(profile.dumpb(data)) 
         file_paths.append(f_path)
     return(file_paths)    
 #------------------------------------------------------------------------------ 
+def _open_output_stream(f_path, compression=None, compresslevel=9):
+    """
+    Function opens a binary output file, wrapped in a gzip or
+    zstandard compression stream when compression is set. 
+    **Note: zstandard is not a direct dependency of GRALE. If
+        it is not available, a warning is printed and the
+        output is gzip compressed instead.
+
+    Parameters
+    ----------
+    f_path : str, required
+        Output file path, without the compression extension
+    compression : str, optional
+        Compression type, None, 'gzip' or 'zstd'
+        Default, None
+    compresslevel : int, optional
+        Compression level passed to the compressor
+        Default, 9
+    Returns
+    -------
+    rtn_tuple : tuple
+        rtn_tuple:  tuple containing the file path including the 
+                    compression extension and the open file object
+    """
+    if compression == 'zstd':
+        try:
+            import zstandard
+            f_path = _get_file_name_seq_path(f'{f_path}.zst')
+            cctx = zstandard.ZstdCompressor(level=compresslevel)
+            return f_path, cctx.stream_writer(open(f_path, 'wb'), closefd=True)
+        except ImportError:
+            _print('Warning: zstandard is not available! '
+                   'Defaulting to gzip compression.')
+            compression = 'gzip'
+    if compression == 'gzip':
+        f_path = _get_file_name_seq_path(f'{f_path}.gz')
+        return f_path, gzip.open(f_path, 'wb', compresslevel=compresslevel)
+    f_path = _get_file_name_seq_path(f_path)
+    return f_path, open(f_path, 'wb')
+#------------------------------------------------------------------------------ 
+def _geojsonseq_bytes(geoJsonDict, profile=None):
+    """
+    Function serializes the features of a grale geojson dictionary 
+    as RFC 8142 GeoJSON text sequences, each feature prefixed with 
+    a record separator and followed by a line feed.
+    
+    Parameters
+    ----------
+    geoJsonDict : dictionary, required
+        grale geojson dictionary 
+    profile : outputProfile, optional
+        Output serialization options (coordinate precision), 
+        features are always written without indentation;
+        Default, None uses grale.GRALE_OUTPUT
+    """
+    if profile is None:
+        profile = GRALE_OUTPUT
+    geoJsonDict = profile.round_geojson(geoJsonDict)
+    return b''.join([b'\x1e' + GRALE_JSON.dumpb(f) + b'\n' 
+                     for f in geoJsonDict.get('features') or []])
+#------------------------------------------------------------------------------ 
+def _checkpoint_key(iheaders):
+    """
+    Function returns a stable key for a chunk request and its 
+    human readable range, [first, last] record offsets for offset 
+    pagination or the where clause for ObjectID range pagination.
+    
+    Parameters
+    ----------
+    iheaders : dictionary, required
+        Dictionary of request headers for the chunk
+    """
+    key = hashlib.md5(json.dumps(iheaders, sort_keys=True, default=str
+                                 ).encode()).hexdigest()
+    if 'resultRecordCount' in iheaders:
+        start = int(iheaders.get('resultOffset') or 0)
+        return key, [start, start + int(iheaders['resultRecordCount']) - 1]
+    return key, iheaders.get('where')
+#------------------------------------------------------------------------------ 
+def _checkpoint_path(out_dir, metadata, query_url, headers, chunk_size, pagination):
+    """
+    Function returns the JSONL checkpoint file path of a download, 
+    named after the layer and a hash of the query url, request headers,
+    chunk size and pagination so that different extracts of the same 
+    layer keep separate checkpoints.
+    """
+    req = json.dumps([query_url, headers, chunk_size, pagination], 
+                     sort_keys=True, default=str)
+    f_name = '_._'.join([str(i) for i in (metadata.get('name', 'temp'), 
+                                          metadata.get('id'),
+                                          hashlib.md5(req.encode()).hexdigest()[:12])
+                         if i is not None])
+    return os.path.join(out_dir, _validate_file_name(f_name, ext='checkpoint.jsonl'))
+#------------------------------------------------------------------------------ 
+def _read_checkpoint(ckpt_path):
+    """
+    Function reads a JSONL checkpoint file and returns a dictionary
+    of chunk key to the latest record written for the chunk.  Lines 
+    truncated by an interrupted run are skipped.
+    """
+    done = {}
+    if not os.path.isfile(ckpt_path):
+        return done
+    with open(ckpt_path) as ckpt:
+        for line in ckpt:
+            try:
+                rec = GRALE_JSON.loads(line)
+                done[rec['key']] = rec
+            except (ValueError, KeyError, TypeError):
+                continue
+    return done
+#------------------------------------------------------------------------------ 
+def _round_coordinates(coords, precision):
+    """
+    Function rounds a (nested) GeoJSON coordinate list to a 
+    number of decimal places, integers are left as integers.
+    """
+    if not coords:
+        return coords
+    if isinstance(coords[0], numbers.Number):
+        return [round(v, precision) for v in coords]
+    if isinstance(coords[0][0], numbers.Number):
+        return [[round(v, precision) for v in c] for c in coords]
+    return [_round_coordinates(c, precision) for c in coords]
+#------------------------------------------------------------------------------ 
+def _round_geometry(geom, precision):
+    """
+    Function returns a copy of a GeoJSON geometry with the
+    coordinates rounded to a number of decimal places.
+    """
+    if geom.get('type') == 'GeometryCollection':
+        return {**geom, 'geometries': [_round_geometry(g, precision) 
+                                       for g in geom['geometries']]}
+    if 'coordinates' not in geom:
+        return geom
+    return {**geom, 'coordinates': _round_coordinates(geom['coordinates'], precision)}
+#------------------------------------------------------------------------------ 
+def _ring_orientations(rings):
+    """
+    Function determines if a batch of closed polygon rings are clockwise 
+    (outer rings) or counter-clockwise (inner rings/holes) in a single 
+    vectorized pass over the coordinates of every ring.  
+    
+    Parameters
+    ----------
+    rings : list, required
+        List of closed rings, each a list of [x, y, (z, m)] coordinates
+        
+    Returns
+    -------
+    rtn_tuple : tuple 
+        rtn_tuple:  tuple containing a boolean array which is True for 
+                    clockwise rings, the (n, 2) array of xy coordinates of
+                    all rings and the start index of each ring in the 
+                    xy array
+    """
+    lengths = np.fromiter((len(r) for r in rings), dtype=np.intp, 
+                          count=len(rings))
+    starts = np.zeros(len(rings), dtype=np.intp)
+    np.cumsum(lengths[:-1], out=starts[1:])
+    try:
+        xy = np.array([p for r in rings for p in r], dtype=float)
+        if xy.ndim != 2:
+            raise ValueError('Mixed coordinate dimensions')
+        xy = xy[:, :2]
+    except ValueError:
+        xy = np.array([p[:2] for r in rings for p in r], dtype=float)
+    # shoelace terms between each vertex and the next, zeroed between rings
+    terms = np.zeros(len(xy), dtype=float)
+    terms[:-1] = (xy[1:, 0] - xy[:-1, 0]) * (xy[1:, 1] + xy[:-1, 1])
+    terms[starts + lengths - 1] = 0.0
+    totals = np.add.reduceat(terms, starts)
+    return totals >= 0, xy, starts
+#------------------------------------------------------------------------------ 
+def _xy_contains_point(ring_xy, point):
+    """
+    Function returns True when a point falls within a ring using a 
+    vectorized ray casting (even-odd) test over the ring edges.
+    
+    Parameters
+    ----------
+    ring_xy : numpy.ndarray, required
+        (n, 2) array of ring xy coordinates
+    point : numpy.ndarray, required
+        (2,) array of the point xy coordinate
+    """
+    px, py = point
+    if len(ring_xy) <= _SMALL_RING_SIZE:
+        # array overhead outweighs the vectorized test on small rings
+        contains = False
+        ring = ring_xy.tolist()
+        xj, yj = ring[-1][0], ring[-1][1]
+        for xi, yi in ring:
+            if ((yi <= py < yj) or (yj <= py < yi)) and \
+                px < (xj - xi) * (py - yi) / (yj - yi) + xi:
+                contains = not contains
+            xj, yj = xi, yi
+        return contains
+    ci = ring_xy
+    cj = np.roll(ring_xy, 1, axis=0)
+    crosses = ((ci[:, 1] <= py) & (py < cj[:, 1])) | \
+              ((cj[:, 1] <= py) & (py < ci[:, 1]))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x_int = (cj[:, 0] - ci[:, 0]) * (py - ci[:, 1]) / \
+                (cj[:, 1] - ci[:, 1]) + ci[:, 0]
+    crosses &= px < x_int
+    return bool(np.count_nonzero(crosses) % 2)
+#------------------------------------------------------------------------------ 
+def _xy_intersects(a, b, max_pairs=1000000):
+    """
+    Function returns True when any segment of ring/line 'a' intersects
+    any segment of ring/line 'b', testing all segment pairs as arrays 
+    in blocks of at most max_pairs pairs.
+    
+    Parameters
+    ----------
+    a : numpy.ndarray, required
+        (n, 2) array of xy coordinates
+    b : numpy.ndarray, required
+        (m, 2) array of xy coordinates
+    max_pairs : int, optional
+        Maximum number of segment pairs to evaluate at one time;
+        Default, 1000000
+    """
+    if (len(a) - 1) * (len(b) - 1) <= _SMALL_RING_SIZE ** 2:
+        # array overhead outweighs the vectorized test on small rings
+        a, b = a.tolist(), b.tolist()
+        for (a1x, a1y), (a2x, a2y) in zip(a[:-1], a[1:]):
+            for (b1x, b1y), (b2x, b2y) in zip(b[:-1], b[1:]):
+                uB = (b2y - b1y) * (a2x - a1x) - (b2x - b1x) * (a2y - a1y)
+                if uB != 0:
+                    ua = ((b2x - b1x) * (a1y - b1y) - 
+                          (b2y - b1y) * (a1x - b1x)) / uB
+                    ub = ((a2x - a1x) * (a1y - b1y) - 
+                          (a2y - a1y) * (a1x - b1x)) / uB
+                    if 0 <= ua <= 1 and 0 <= ub <= 1:
+                        return True
+        return False
+    b1, b2 = b[:-1], b[1:]
+    bdx, bdy = b2[:, 0] - b1[:, 0], b2[:, 1] - b1[:, 1]
+    rows = max(1, max_pairs // max(1, len(b1)))
+    for s in range(0, len(a) - 1, rows):
+        a1 = a[s:s + rows + 1][:-1, None, :]
+        a2 = a[s + 1:s + rows + 1][:, None, :]
+        adx, ady = a2[..., 0] - a1[..., 0], a2[..., 1] - a1[..., 1]
+        dy1, dx1 = a1[..., 1] - b1[:, 1], a1[..., 0] - b1[:, 0]
+        uaT = bdx * dy1 - bdy * dx1
+        ubT = adx * dy1 - ady * dx1
+        uB = bdy * adx - bdx * ady
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ua = uaT / uB
+            ub = ubT / uB
+        hits = (uB != 0) & (ua >= 0) & (ua <= 1) & (ub >= 0) & (ub <= 1)
+        if hits.any():
+            return True
+    return False
+#------------------------------------------------------------------------------ 
+def _rings_to_geojson(rings, clockwise, ring_xy):
+    """
+    Function converts the closed rings of an ESRI polygon to a GeoJSON 
+    Polygon or MultiPolygon, winding outer rings counter-clockwise and 
+    holes clockwise (RFC 7946) and assigning each hole to the outer ring
+    that contains it (or intersects it). 
+    
+    Parameters
+    ----------
+    rings : list, required
+        List of closed rings with 4 or more coordinates
+    clockwise : list, required
+        List of booleans, True for clockwise (outer) rings 
+    ring_xy : list, required
+        List of (n, 2) xy coordinate arrays for each ring 
+    """
+    outer_rings = []
+    outer_xy = []
+    holes = []
+    for ring, cw, xy in zip(rings, clockwise, ring_xy):
+        # wind outer rings counterclockwise and holes clockwise
+        if cw:
+            outer_rings.append([ring[::-1]])
+            outer_xy.append(xy[::-1])
+        else:
+            holes.append((ring[::-1], xy[::-1]))
+
+    uncontained = []
+    while holes:
+        hole, hole_xy = holes.pop()
+        for x in range(len(outer_rings) - 1, -1, -1):
+            if not _xy_intersects(outer_xy[x], hole_xy) and \
+                _xy_contains_point(outer_xy[x], hole_xy[0]):
+                outer_rings[x].append(hole)
+                break
+        else:
+            uncontained.append((hole, hole_xy))
+
+    # if holes could not be matched using contains, try intersects
+    while uncontained:
+        hole, hole_xy = uncontained.pop()
+        for x in range(len(outer_rings) - 1, -1, -1):
+            if _xy_intersects(outer_xy[x], hole_xy):
+                outer_rings[x].append(hole)
+                break
+        else:
+            outer_rings.append([hole[::-1]])
+            outer_xy.append(hole_xy[::-1])
+
+    if len(outer_rings) == 1:
+        return {'type': 'Polygon', 'coordinates': outer_rings[0]}
+    return {'type': 'MultiPolygon', 'coordinates': outer_rings}
+#------------------------------------------------------------------------------ 
+def _esri_geometry_to_geojson(geom, polygon=None):
+    """
+    Function converts an ESRI JSON geometry (point, multipoint, polyline,
+    polygon or envelope) to a GeoJSON geometry dictionary. 
+    
+    Parameters
+    ----------
+    geom : dictionary, required
+        ESRI JSON geometry
+    polygon : dictionary, optional
+        Pre-converted GeoJSON polygon for geometries with rings
+    """
+    gj = {}
+    if isinstance(geom.get('x'), numbers.Number) and \
+        isinstance(geom.get('y'), numbers.Number):
+        gj['type'] = 'Point'
+        gj['coordinates'] = [geom['x'], geom['y']]
+        if isinstance(geom.get('z'), numbers.Number):
+            gj['coordinates'].append(geom['z'])
+    if 'points' in geom:
+        gj['type'] = 'MultiPoint'
+        gj['coordinates'] = geom['points']
+    if 'paths' in geom:
+        if len(geom['paths']) == 1:
+            gj['type'] = 'LineString'
+            gj['coordinates'] = geom['paths'][0]
+        else:
+            gj['type'] = 'MultiLineString'
+            gj['coordinates'] = geom['paths']
+    if 'rings' in geom:
+        gj = polygon
+    if all(isinstance(geom.get(k), numbers.Number) 
+           for k in ('xmin', 'ymin', 'xmax', 'ymax')):
+        gj['type'] = 'Polygon'
+        gj['coordinates'] = [[[geom['xmax'], geom['ymax']],
+                              [geom['xmin'], geom['ymax']],
+                              [geom['xmin'], geom['ymin']],
+                              [geom['xmax'], geom['ymin']],
+                              [geom['xmax'], geom['ymax']]]]
+    # true curves can not be converted to GeoJSON
+    if any(k in geom for k in _ESRI_CURVE_KEYS):
+        gj['geometry'] = None
+    return gj
+#------------------------------------------------------------------------------ 
+def esri_to_geojson(esri_json, id_attribute=None):
+    """
+    Function converts an ESRI JSON feature set (a REST API query 
+    response) to a GeoJSON FeatureCollection dictionary.  Point, 
+    multipoint, polyline and polygon features are supported.  The ring 
+    orientation of every polygon in the feature set is resolved in a 
+    single vectorized (NumPy) pass and hole assignment uses vectorized 
+    containment and intersection tests, producing output identical to 
+    the arcgis2geojson package.  The feature set is not modified, 
+    unclosed rings are closed on copies and the feature attributes are
+    copied to the GeoJSON properties.
+    
+    Parameters
+    ----------
+    esri_json : dictionary, required
+        ESRI JSON feature set with a 'features' array
+    id_attribute : str, optional
+        Attribute used as the feature id ahead of 'OBJECTID' and 'FID';
+        Default, None
+        
+    Returns
+    -------
+    geojson : dictionary
+        GeoJSON FeatureCollection dictionary.  An empty dictionary is 
+        returned when the feature set has no features.
+
+    Examples
+    -------
+    >>> esri_json = {'features': [{'attributes': {'OBJECTID': 1}, 
+                                   'geometry': {'x': -77.0, 'y': 38.9}}]}
+    >>> grale.esri_to_geojson(esri_json)
+    >>> {'type': 'FeatureCollection', 'features': [{'type': 'Feature',
+         'geometry': {'type': 'Point', 'coordinates': [-77.0, 38.9]},
+         'properties': {'OBJECTID': 1}, 'id': 1}]}
+    """
+    geojson = {}
+    features = esri_json.get('features')
+    if not features:
+        return geojson
+
+    id_keys = [id_attribute, 'OBJECTID', 'FID'] if id_attribute \
+              else ['OBJECTID', 'FID']
+
+    # close (copies of) and gather the rings of every polygon to orient 
+    # them in one pass, counting the valid rings of each polygon
+    rings = []
+    n_rings = []
+    for f in features:
+        geom = f.get('geometry')
+        if geom and 'rings' in geom:
+            n = len(rings)
+            for ring in geom['rings']:
+                if ring and ring[0] != ring[-1]:
+                    ring = ring + [ring[0]]
+                if len(ring) >= 4:
+                    rings.append(ring)
+            n_rings.append(len(rings) - n)
+    n_rings = iter(n_rings)
+    if rings:
+        clockwise, xy, starts = _ring_orientations(rings)
+        clockwise = clockwise.tolist()
+        ends = np.append(starts[1:], len(xy)).tolist()
+        starts = starts.tolist()
+    r = 0
+
+    out_features = []
+    for f in features:
+        out_f = {}
+        if 'geometry' in f or 'attributes' in f:
+            out_f['type'] = 'Feature'
+            geom = f.get('geometry')
+            if geom is not None:
+                polygon = None
+                if 'rings' in geom:
+                    n = next(n_rings)
+                    polygon = _rings_to_geojson(
+                                    rings[r:r + n], clockwise[r:r + n],
+                                    [xy[s:e] for s, e in zip(starts[r:r + n], 
+                                                             ends[r:r + n])])
+                    r += n
+                out_f['geometry'] = _esri_geometry_to_geojson(geom, polygon) \
+                                    or None
+            else:
+                out_f['geometry'] = None
+            if 'attributes' in f:
+                attrs = f['attributes']
+                out_f['properties'] = dict(attrs)
+                for k in id_keys:
+                    if k in attrs and isinstance(attrs[k], (numbers.Number, str)):
+                        out_f['id'] = attrs[k]
+                        break
+            else:
+                out_f['properties'] = None
+        if any(k in f for k in _ESRI_CURVE_KEYS):
+            out_f['geometry'] = None
+        out_features.append(out_f)
+
+    geojson['type'] = 'FeatureCollection'
+    geojson['features'] = out_features
+    return geojson
+#------------------------------------------------------------------------------ 
+def _pbf_varint(buf, pos):
+    """
+    Function decodes a protocol buffer base 128 varint from a bytes 
+    object at a given position and returns the value and next position.
+    """
+    result = 0
+    shift = 0
+    while True:
+        b = buf[pos]
+        pos += 1
+        result |= (b & 0x7F) << shift
+        if not b & 0x80:
+            return result, pos
+        shift += 7
+#------------------------------------------------------------------------------ 
+def _pbf_fields(buf):
+    """
+    Generator which decodes the fields of a protocol buffer message, 
+    yielding the field number, wire type and value of each field.  
+    Length delimited values (wire type 2) are yielded as bytes, 32/64 bit 
+    values (wire types 5 and 1) as raw 4/8 byte strings.
+    
+    Parameters
+    ----------
+    buf : bytes, required
+        Encoded protocol buffer message
+    """
+    pos = 0
+    end = len(buf)
+    while pos < end:
+        key, pos = _pbf_varint(buf, pos)
+        field, wire_type = key >> 3, key & 0x07
+        if wire_type == 0:
+            value, pos = _pbf_varint(buf, pos)
+        elif wire_type == 2:
+            size, pos = _pbf_varint(buf, pos)
+            value = buf[pos:pos + size]
+            pos += size
+        elif wire_type == 1:
+            value = buf[pos:pos + 8]
+            pos += 8
+        elif wire_type == 5:
+            value = buf[pos:pos + 4]
+            pos += 4
+        else:
+            raise ValueError(f'Unsupported protocol buffer wire type: {wire_type}')
+        yield field, wire_type, value
+#------------------------------------------------------------------------------ 
+def _pbf_packed_varints(buf, zigzag=False):
+    """
+    Function decodes a packed repeated varint field into a numpy 
+    int64 array, decoding every varint as arrays at once.  
+    
+    Parameters
+    ----------
+    buf : bytes, required
+        Encoded packed varint field
+    zigzag : bool, optional
+        Option to zigzag decode the values (sint32/sint64 fields);
+        Default, False
+    """
+    b = np.frombuffer(buf, dtype=np.uint8)
+    ends = np.flatnonzero(b < 0x80)
+    starts = np.empty_like(ends)
+    starts[:1] = 0
+    starts[1:] = ends[:-1] + 1
+    lengths = ends - starts + 1
+    values = np.zeros(len(ends), dtype=np.uint64)
+    for k in range(int(lengths.max()) if len(lengths) else 0):
+        mask = lengths > k
+        values[mask] |= (b[starts[mask] + k] & 0x7F).astype(np.uint64) \
+                        << np.uint64(7 * k)
+    if zigzag:
+        return (values >> np.uint64(1)).astype(np.int64) ^ \
+               -(values & np.uint64(1)).astype(np.int64)
+    return values.astype(np.int64)
+#------------------------------------------------------------------------------ 
+def _pbf_message(buf):
+    """
+    Function decodes a protocol buffer message into a dictionary of 
+    field number keys and lists of values.
+    """
+    msg = {}
+    for field, wire_type, value in _pbf_fields(buf):
+        msg.setdefault(field, []).append(value)
+    return msg
+#------------------------------------------------------------------------------ 
+def _pbf_value(buf):
+    """
+    Function decodes an ESRI PBF attribute value message, returning 
+    None for null (empty) values. 
+    """
+    for field, wire_type, value in _pbf_fields(buf):
+        if field == 1:
+            return bytes(value).decode('utf-8')
+        elif field == 2:
+            return struct.unpack('<f', value)[0]
+        elif field == 3:
+            return struct.unpack('<d', value)[0]
+        elif field in (4, 8):
+            return (value >> 1) ^ -(value & 1)
+        elif field == 6:
+            return value - (1 << 64) if value >= (1 << 63) else value
+        elif field in (5, 7):
+            return value
+        elif field == 9:
+            return bool(value)
+    return None
+#------------------------------------------------------------------------------ 
+def esri_pbf_to_json(content):
+    """
+    Function decodes an ESRI protocol buffer (f=pbf) FeatureCollection 
+    query response into the equivalent ESRI JSON dictionary.  Feature 
+    results (attributes and point, multipoint, polyline or polygon 
+    geometries), count results and ObjectID results are supported.  
+    Quantized, delta-encoded geometry coordinates are decoded with the 
+    response transform (scale, translate and quantize origin).  The 
+    output can be passed to esri_to_geojson.
+    
+    Parameters
+    ----------
+    content : bytes, required
+        ESRI PBF FeatureCollection response body
+        
+    Returns
+    -------
+    esri_json : dictionary
+        ESRI JSON dictionary, Ex. {'objectIdFieldName': 'OBJECTID', 
+        'geometryType': 'esriGeometryPoint', 'spatialReference': 
+        {'wkid': 4326}, 'fields': [...], 'features': [...]}
+    """
+    query_result = {}
+    for field, wire_type, value in _pbf_fields(content):
+        if field == 2:
+            query_result = _pbf_message(value)
+    if 2 in query_result:
+        count = _pbf_message(query_result[2][0])
+        return {'count': count.get(1, [0])[0]}
+    if 3 in query_result:
+        ids = _pbf_message(query_result[3][0])
+        oids = []
+        for v in ids.get(3, []):
+            oids.extend(_pbf_packed_varints(v).tolist() 
+                        if isinstance(v, bytes) else [v])
+        return {'objectIdFieldName': bytes(ids.get(1, [b''])[0]).decode(),
+                'objectIds': oids}
+    if 1 not in query_result:
+        return {}
+    fr = _pbf_message(query_result[1][0])
+
+    esri_json = {}
+    esri_json['objectIdFieldName'] = bytes(fr.get(1, [b''])[0]).decode()
+    geometry_type = fr.get(7, [0])[0]
+    if geometry_type in _ESRI_PBF_GEOMETRY_TYPES:
+        esri_json['geometryType'] = _ESRI_PBF_GEOMETRY_TYPES[geometry_type]
+    if 8 in fr:
+        sr = _pbf_message(fr[8][0])
+        esri_json['spatialReference'] = {'wkid': sr[1][0]} if 1 in sr else {}
+        if 2 in sr:
+            esri_json['spatialReference']['latestWkid'] = sr[2][0]
+        if 5 in sr:
+            esri_json['spatialReference']['wkt'] = bytes(sr[5][0]).decode()
+    has_z = bool(fr.get(10, [0])[0])
+    has_m = bool(fr.get(11, [0])[0])
+    if has_z:
+        esri_json['hasZ'] = True
+    if has_m:
+        esri_json['hasM'] = True
+    if fr.get(9, [0])[0]:
+        esri_json['exceededTransferLimit'] = True
+
+    # transform (x, y, m, z) scale and translate, default identity
+    scale = [1.0, 1.0, 1.0, 1.0]
+    translate = [0.0, 0.0, 0.0, 0.0]
+    upper_left = True
+    if 12 in fr:
+        tf = _pbf_message(fr[12][0])
+        upper_left = tf.get(1, [0])[0] == 0
+        for key, dest in ((2, scale), (3, translate)):
+            if key in tf:
+                for n, v in _pbf_message(tf[key][0]).items():
+                    dest[n - 1] = struct.unpack('<d', v[0])[0]
+    # coordinate dimension order is x, y, (z), (m)
+    dims = [0, 1] + ([3] if has_z else []) + ([2] if has_m else [])
+    dim_names = ['x', 'y'] + (['z'] if has_z else []) + (['m'] if has_m else [])
+    d_scale = np.array([scale[d] for d in dims])
+    d_translate = np.array([translate[d] for d in dims])
+    if upper_left:
+        d_scale[1] = -d_scale[1]
+
+    fields = []
+    for f in fr.get(13, []):
+        fm = _pbf_message(f)
+        field = {'name': bytes(fm.get(1, [b''])[0]).decode(),
+                 'type': _ESRI_PBF_FIELD_TYPES.get(fm.get(2, [0])[0]),
+                 'alias': bytes(fm.get(3, [b''])[0]).decode()}
+        fields.append(field)
+    esri_json['fields'] = fields
+    names = [f['name'] for f in fields]
+
+    features = []
+    for feat in fr.get(15, []):
+        fm = _pbf_message(feat)
+        attrs = {n: _pbf_value(v) for n, v in zip(names, fm.get(1, []))}
+        feature = {'attributes': attrs}
+        if 2 in fm:
+            feature['geometry'] = _pbf_geometry(fm[2][0], geometry_type, 
+                                                dim_names, d_scale, 
+                                                d_translate)
+        features.append(feature)
+    esri_json['features'] = features
+    return esri_json
+#------------------------------------------------------------------------------ 
+def _pbf_geometry(buf, geometry_type, dim_names, scale, translate):
+    """
+    Function decodes an ESRI PBF geometry message into an ESRI JSON 
+    geometry, cumulatively summing the delta-encoded coordinates and 
+    applying the transform scale and translation.
+    
+    Parameters
+    ----------
+    buf : bytes, required
+        Encoded geometry message
+    geometry_type : int, required
+        ESRI PBF geometry type, 0 point, 1 multipoint, 2 polyline, 
+        3 polygon
+    dim_names : list, required
+        Coordinate dimension names, Ex. ['x', 'y', 'z']
+    scale : numpy.ndarray, required
+        Scale per dimension (y negated for an upper left origin)
+    translate : numpy.ndarray, required
+        Translation per dimension
+    """
+    gm = _pbf_message(buf)
+    lengths = []
+    for v in gm.get(2, []):
+        lengths.extend(_pbf_packed_varints(v).tolist() 
+                       if isinstance(v, bytes) else [v])
+    coords = [_pbf_packed_varints(v, zigzag=True) if isinstance(v, bytes) 
+              else np.array([(v >> 1) ^ -(v & 1)], dtype=np.int64)
+              for v in gm.get(3, [])]
+    if not coords:
+        return None
+    coords = np.concatenate(coords).reshape(-1, len(dim_names))
+    points = (np.cumsum(coords, axis=0) * scale + translate).tolist()
+    if geometry_type == 0:
+        return dict(zip(dim_names, points[0]))
+    if geometry_type == 1:
+        return {'points': points}
+    parts = []
+    start = 0
+    for n in lengths or [len(points)]:
+        parts.append(points[start:start + n])
+        start += n
+    if geometry_type == 2:
+        return {'paths': parts}
+    return {'rings': parts}
+#------------------------------------------------------------------------------ 
 def read_geojson(in_geojson):
     """
     Function reads/loads a geojson object, gzip 
@@ -510,16 +1571,16 @@ def read_geojson(in_geojson):
         return {}
     elif isinstance(in_geojson, str):
         if not os.path.isfile(in_geojson):
-            return json.loads(in_geojson)
+            return GRALE_JSON.loads(in_geojson)
         else:
             try:
                 in_ext = os.path.splitext(in_geojson)[1]
                 if in_ext == '.gz' or in_ext == '.gzip':
                     with gzip.open(in_geojson,'rb') as f:
-                        json_obj = json.loads(f.read().decode())
+                        json_obj = GRALE_JSON.loads(f.read())
                 elif in_ext == '.geojson' or in_ext == '.json':
-                    with open(in_geojson) as f:
-                        json_obj = json.loads(f.read())            
+                    with open(in_geojson, 'rb') as f:
+                        json_obj = GRALE_JSON.loads(f.read())            
                 else:
                     _print(f'Unsupported file: {in_geojson}')
                 return json_obj
@@ -561,7 +1622,7 @@ def read_geojsons(in_geojsons):
         results.append(data)
     return results
 #------------------------------------------------------------------------------ 
-def merge_geojsons(in_geojsons, out_path=None): 
+def merge_geojsons(in_geojsons, out_path=None, profile=None): 
     """
     Function merges a list of grale geojson objects
     into a single output geojson object including the
@@ -577,7 +1638,13 @@ def merge_geojsons(in_geojsons, out_path=None):
         Optional file path to output merged geojson 
         data to a file. 
         default, None 
+    profile : outputProfile, optional
+        Output serialization options (indent and coordinate
+        precision) for the merged geojson string and file;
+        Default, None uses grale.GRALE_OUTPUT
     """
+    if profile is None:
+        profile = GRALE_OUTPUT
 
     out_gj = {'type' : [], 
               'features' : [],  
@@ -592,7 +1659,7 @@ def merge_geojsons(in_geojsons, out_path=None):
     elif isinstance(in_geojsons,list):
         geojsons = in_geojsons
     elif isinstance(in_geojsons,str):    
-        return json.dumps(read_geojson(in_geojsons), indent=4)
+        return profile.dumps(read_geojson(in_geojsons))
     else:
         geojsons = in_geojsons
     read_gj = read_geojsons(geojsons)
@@ -607,8 +1674,8 @@ def merge_geojsons(in_geojsons, out_path=None):
                     out_gj[k].append(i_val)
     
     # only store unique metadata objects once joinable on the ppid
-    rm_set = set([json.dumps(i) for i in out_gj['request_metadata']])
-    out_gj['request_metadata'] =  [json.loads(m) for m in rm_set]
+    rm_dict = {GRALE_JSON.dumpb(i): i for i in out_gj['request_metadata']}
+    out_gj['request_metadata'] = list(rm_dict.values())
     
     feat_types = set(out_gj['type'])
     if len(feat_types) == 1:
@@ -617,14 +1684,143 @@ def merge_geojsons(in_geojsons, out_path=None):
         _print('Warning: inputs are of mixed GeoJSON text sequences!')
     _print(f'\t-Merged {len(out_gj["features"])} features')
     
+    out_str = profile.dumps(out_gj)
     if out_path:
         f_path = _get_file_name_seq_path(out_path) 
         with open(f_path, 'w') as gjf:
-            gjf.write(json.dumps(out_gj, indent=4))
+            gjf.write(out_str)
         _print(f'\t-Output merged results to:  {f_path}')
-    return json.dumps(out_gj, indent=4)
+    return out_str
+#------------------------------------------------------------------------------ 
+def _geojson_geometries(geoms):
+    """
+    Function builds a numpy array of shapely geometries from a list 
+    of GeoJSON geometry dictionaries in a single vectorized (GEOS) 
+    call.  Null geometries, and invalid geometries (with a warning), 
+    are returned as None.
+    
+    Parameters
+    ----------
+    geoms : list, Required
+        List of GeoJSON geometry dictionaries or None
+    """
+    return shapely.from_geojson([GRALE_JSON.dumpb(g) if g else None 
+                                 for g in geoms], on_invalid='warn')
+#------------------------------------------------------------------------------ 
+def _geojson_columns(in_geojsons):
+    """
+    Function reads grale geojson chunks one at a time and 
+    appends their feature properties to per-column lists,
+    avoiding the merged GeoJSON text and the per-row dict
+    merges. Returns a tuple of (columns dict, shapely 
+    geometry array, row count, field definitions from the 
+    first chunk's request_metadata or None).
+    
+    Parameters
+    ----------
+    in_geojson : str or list, Required
+        list of strings or a single string geojson 
+        object or a file path pointing to a gzip or
+        geojson file. 
+    """
+    columns = {}
+    geoms = []
+    n_rows = 0
+    fields = None
+    
+    if not isinstance(in_geojsons, list):
+        in_geojsons = [in_geojsons]
+    for in_gj in in_geojsons:
+        gj = read_geojson(in_gj)
+        # unreadable chunks are reported by read_geojson and skipped
+        if not gj:
+            continue
+        feats = gj.get('features')
+        if fields is None:
+            for md in gj.get('request_metadata') or []:
+                if isinstance(md, dict) and md.get('fields'):
+                    fields = md['fields']
+                    break
+        if not feats:
+            continue
+        props = [f.get('properties') or {} for f in feats]
+        keys = dict.fromkeys([k for p in props for k in p])
+        
+        # backfill new columns and pad columns absent from this chunk
+        for k in keys:
+            if k not in columns:
+                columns[k] = [None] * n_rows
+        for k, col in columns.items():
+            if k in keys:
+                col.extend([p.get(k) for p in props])
+            else:
+                col.extend([None] * len(props))
+        geoms.extend([f.get('geometry') for f in feats])
+        n_rows += len(feats)
+    return columns, _geojson_geometries(geoms), n_rows, fields
+#------------------------------------------------------------------------------ 
+def _typed_column(values, field):
+    """
+    Function converts a column of raw property values into
+    the array type matching its ESRI field definition. 
+    Dates (epoch milliseconds) become UTC datetimes, integers 
+    become nullable integers, doubles become floats and 
+    coded value domains become categoricals. Returns None
+    when the field type has no typed mapping.
+    
+    Parameters
+    ----------
+    values : list, Required
+        Column values, None for missing values.
+    field : dict, Required
+        ESRI field definition, {'name', 'type', 'domain'...}
+    """
+    domain = field.get('domain') or {}
+    if domain.get('type') == 'codedValue':
+        # keep values outside of the domain as extra categories
+        codes = [c['code'] for c in domain.get('codedValues') or []]
+        observed = dict.fromkeys([v for v in values if v is not None])
+        categories = list(dict.fromkeys(codes + list(observed)))
+        return pd.Categorical(values, categories=categories)
+    
+    f_type = field.get('type')
+    if f_type == 'esriFieldTypeDate':
+        # epoch milliseconds to UTC datetimes, None becomes NaT
+        return pd.to_datetime(values, unit='ms', utc=True)
+    dtype = _ESRI_FIELD_DTYPES.get(f_type)
+    if dtype is None:
+        return None
+    if dtype.startswith('float'):
+        return np.array([np.nan if v is None else v for v in values], dtype=dtype)
+    return pd.array(values, dtype=dtype)
 #------------------------------------------------------------------------------ 
-def geojsons_to_df(in_geojsons, df_type='DataFrame'):
+def _typed_columns(columns, fields):
+    """
+    Function converts the columns which have an ESRI field
+    definition to typed arrays in place. Columns that fail 
+    to convert keep their raw values and a warning is printed. 
+    
+    Parameters
+    ----------
+    columns : dict, Required
+        Dictionary of column name to list of values.
+    fields : list, Required
+        List of ESRI field definitions.
+    """
+    for field in fields or []:
+        name = field.get('name')
+        if name not in columns:
+            continue
+        try:
+            typed = _typed_column(columns[name], field)
+        except (TypeError, ValueError, OverflowError) as e:
+            _print(f'Warning: unable to type column {name} as {field.get("type")}: {e}')
+            continue
+        if typed is not None:
+            columns[name] = typed
+    return columns
+#------------------------------------------------------------------------------ 
+def geojsons_to_df(in_geojsons, df_type='DataFrame', fields=None):
     """
     Function converts a geojson or a list of geojson
     objects into a dataframe of either the pandas
@@ -632,54 +1828,980 @@ def geojsons_to_df(in_geojsons, df_type='DataFrame'):
     retain the geometry/spatial info as a string while
     the geopandas dataframe is a fully spatially enabled 
     data type with available spatial properties/functions. 
+    Columns are built straight from each chunk's features
+    without first merging the chunks into one geojson.
+    
+    Parameters
+    ----------
+    in_geojson : str or list, Required
+        list of strings or a single string geojson 
+        object or a file path pointing to a gzip or
+        geojson file. 
+    df_type : str, Optional
+        Option to return a pandas 'DataFrame' type or
+        a geopandas 'GeoDataFrame' type.  Allowed 
+        values include 'DataFrame' and 'GeoDataFrame'
+        **Note: Due to the complexity of installing 
+            the GeoPandas package correctly, it was not 
+            set as a direct dependency of GRALE. Instead,
+            it must be installed separately from GRALE. 
+            If Geopandas is not installed/available and 
+            df_type is set to 'GeoDataFrame', a warning 
+            will be printed and a regular pandas 
+            (non-spatial) DataFrame will be returned.
+        Default, 'DataFrame'
+    fields : bool or list, Optional
+        ESRI field definitions used to type the columns
+        up front instead of letting pandas infer them. 
+        Dates become datetime64 (UTC), integers become 
+        nullable Int16/Int32/Int64, doubles become floats 
+        and coded value domain fields become categoricals.
+        Use True to read the 'fields' from the chunks'
+        'request_metadata', or pass a list such as 
+        ESRI.get_service_metadata(url)['fields'].
+        Default, None (types are inferred by pandas)
+        
+    """
+    if df_type =='GeoDataFrame':
+        try: 
+            if 'geopandas' not in sys.modules:
+                import geopandas
+            geopandas = sys.modules['geopandas']
+        except:
+            _print('''Warning: GeoPandas install is not available!
+                      Please ensure GeoPandas is installed then try to 
+                      import the package directly. If errors persist,
+                      attempt to reinstall GeoPandas. 
+                      Defaulting data to pandas.dataframe''')
+            df_type ='DataFrame'
+    
+    if df_type =='GeoDataFrame':
+        columns, geoms, n_rows, md_fields = _geojson_columns(in_geojsons)
+        _print(f'\t-Merged {n_rows} features')
+        if fields:
+            _typed_columns(columns, md_fields if fields is True else fields)
+        columns.pop('geometry', None)
+        return geopandas.GeoDataFrame(
+                    columns, index=pd.RangeIndex(n_rows),
+                    geometry=geopandas.GeoSeries(geoms))
+            
+    if df_type =='DataFrame':
+        columns, geoms, n_rows, md_fields = _geojson_columns(in_geojsons)
+        _print(f'\t-Merged {n_rows} features')
+        if fields:
+            _typed_columns(columns, md_fields if fields is True else fields)
+        # full precision WKT, the format of the shapely 2 .wkt property
+        columns['geometry'] = shapely.to_wkt(geoms, rounding_precision=-1)
+        return pd.DataFrame(columns, index=pd.RangeIndex(n_rows))
+#------------------------------------------------------------------------------ 
+def _geometry_wkb_bounds(geoms):
+    """
+    Function writes an array of shapely geometries to little endian 
+    ISO WKB (3D geometries typed 1000 + type, as used by GeoParquet 
+    and GeoPackage) and returns the WKB list with the list of 
+    (xmin, ymin, xmax, ymax) bounding boxes, None for null or empty 
+    geometries.
+    
+    Parameters
+    ----------
+    geoms : numpy.ndarray, Required
+        Array of shapely geometries or None, see _geojson_geometries
+    """
+    wkb = shapely.to_wkb(geoms, flavor='iso', byte_order=1).tolist()
+    bounds = shapely.bounds(geoms)
+    valid = ~np.isnan(bounds).any(axis=1)
+    boxes = [tuple(b) if v else None for b, v in zip(bounds.tolist(), valid)]
+    return wkb, boxes
+#------------------------------------------------------------------------------ 
+def _geoparquet_type(geom):
+    """
+    Function returns the GeoParquet geometry type name of a GeoJSON
+    geometry, with the " Z" suffix (Ex. "Point Z") when the coordinates
+    have a z value.
+    """
+    if geom['type'] == 'GeometryCollection':
+        has_z = any(_geoparquet_type(g).endswith(' Z') 
+                    for g in geom.get('geometries') or [])
+    else:
+        first = geom.get('coordinates')
+        while first and isinstance(first[0], list):
+            first = first[0]
+        has_z = bool(first) and len(first) > 2
+    return f"{geom['type']} Z" if has_z else geom['type']
+#------------------------------------------------------------------------------ 
+def _geoparquet_crs(out_sr):
+    """
+    Function converts an ESRI spatial reference (wkid number or 
+    spatial reference JSON) to the GeoParquet column 'crs' entry.
+    Returns an empty dictionary for WGS-84 (wkid 4326), which is 
+    the GeoParquet default (OGC:CRS84), and a PROJJSON dictionary 
+    otherwise.  pyproj is used to build the full PROJJSON when
+    available, else an identifier only PROJJSON is returned.
+    """
+    try:
+        if isinstance(out_sr, str) and out_sr.strip().startswith('{'):
+            sr = GRALE_JSON.loads(out_sr)
+        elif isinstance(out_sr, dict):
+            sr = out_sr
+        else:
+            sr = {'wkid': int(out_sr)}
+        wkid = int(sr.get('latestWkid') or sr.get('wkid'))
+    except (TypeError, ValueError):
+        return {'crs': None}
+    if wkid == 4326:
+        return {}
+    authority = 'ESRI' if wkid >= 100000 else 'EPSG'
+    try:
+        import pyproj
+        return {'crs': pyproj.CRS.from_authority(authority, wkid).to_json_dict()}
+    except Exception:
+        return {'crs': {'id': {'authority': authority, 'code': wkid}}}
+#------------------------------------------------------------------------------ 
+def _output_fields(metadata, out_fields='*'):
+    """
+    Function returns the ESRI field definitions of the layer 
+    'fields' metadata which are included in the requested 
+    outFields, skipping geometry and raster fields.
+    
+    Parameters
+    ----------
+    metadata : dictionary, required
+        ESRI service metadata 
+    out_fields : str, optional
+        Comma separated list of requested fields or '*'
+        Default, '*'
+    """
+    req = None
+    if out_fields and out_fields.strip() != '*':
+        req = {f.strip().lower() for f in out_fields.split(',')}
+    return [field for field in metadata.get('fields') or []
+            if (req is None or field.get('name', '').lower() in req) and 
+            field.get('type') not in ('esriFieldTypeGeometry', 
+                                      'esriFieldTypeRaster')]
+#------------------------------------------------------------------------------ 
+def _arrow_schema(metadata, out_fields='*'):
+    """
+    Function builds the pyarrow schema of a GeoParquet chunk from
+    the ESRI layer 'fields' metadata, the requested outFields and 
+    the grale lineage columns, followed by the WKB geometry and the
+    bbox covering columns.
+    
+    Parameters
+    ----------
+    metadata : dictionary, required
+        ESRI service metadata 
+    out_fields : str, optional
+        Comma separated list of requested fields or '*'
+        Default, '*'
+    """
+    import pyarrow as pa
+    
+    cols = []
+    for field in _output_fields(metadata, out_fields):
+        name = field['name']
+        f_type = field.get('type')
+        if f_type == 'esriFieldTypeDate':
+            pa_type = pa.timestamp('ms', tz='UTC')
+        else:
+            pa_type = getattr(pa, _ESRI_FIELD_ARROW_TYPES.get(f_type, 'string'))()
+        cols.append(pa.field(name, pa_type))
+    cols.extend([pa.field('grale_utc', pa.string()),
+                 pa.field('grale_uuid', pa.string()),
+                 pa.field('geometry', pa.binary()),
+                 pa.field('bbox', pa.struct([(k, pa.float64()) for k in 
+                                             ('xmin', 'ymin', 'xmax', 'ymax')]))])
+    return pa.schema(cols)
+#------------------------------------------------------------------------------ 
+def _arrow_array(values, field):
+    """
+    Function builds the pyarrow array of a column of property values.
+    Values which do not match the type declared in the layer fields
+    metadata are cast to the column type (Ex. numbers to strings or 
+    numeric strings to numbers) or written as null, with a warning.
+    
+    Parameters
+    ----------
+    values : list, Required
+        Column values, None for missing values.
+    field : pyarrow.Field, Required
+        Column name and type of the schema
+    """
+    import pyarrow as pa
+    
+    errors = (pa.ArrowException, TypeError, ValueError, OverflowError)
+    try:
+        return pa.array(values, type=field.type)
+    except errors:
+        pass
+    coerced, n_null = [], 0
+    for v in values:
+        try:
+            coerced.append(pa.scalar(v, type=field.type).as_py())
+            continue
+        except errors:
+            pass
+        try:
+            coerced.append(pa.scalar(v).cast(field.type).as_py())
+        except errors:
+            coerced.append(None)
+            n_null += 1
+    if n_null:
+        _print(f'Warning: {n_null} value(s) of {field.name} do not match '
+               f'the field type ({field.type}) and were written as null')
+    return pa.array(coerced, type=field.type)
+#------------------------------------------------------------------------------ 
+def _geojson_to_arrow(geoJsonDict, schema):
+    """
+    Function converts the features of a grale geojson dictionary to
+    a pyarrow table matching the schema, with WKB geometry and a per 
+    row bbox column.  Returns the table and the chunk bounding box.
+    """
+    import pyarrow as pa
+    
+    feats = geoJsonDict.get('features') or []
+    props = [f.get('properties') or {} for f in feats]
+    wkb, boxes = _geometry_wkb_bounds(_geojson_geometries(
+                                        [f.get('geometry') for f in feats]))
+    arrays = []
+    for field in schema:
+        if field.name == 'geometry':
+            arrays.append(pa.array(wkb, type=pa.binary()))
+        elif field.name == 'bbox':
+            arrays.append(pa.array([None if b is None else dict(zip(
+                                    ('xmin', 'ymin', 'xmax', 'ymax'), b)) 
+                                    for b in boxes], type=field.type))
+        else:
+            arrays.append(_arrow_array([p.get(field.name) for p in props], 
+                                       field))
+    table = pa.Table.from_arrays(arrays, schema=schema)
+    
+    bbox = None
+    boxes = [b for b in boxes if b is not None]
+    if boxes:
+        b = np.array(boxes)
+        bbox = [float(b[:, 0].min()), float(b[:, 1].min()), 
+                float(b[:, 2].max()), float(b[:, 3].max())]
+    return table, bbox
+#------------------------------------------------------------------------------ 
+def _gpkg_geometries(geoms, srs_id):
+    """
+    Function packs GeoJSON geometry dictionaries into GeoPackage 
+    binary geometry blobs (little endian header with an xy envelope 
+    followed by ISO WKB).  Returns a tuple of the blob list and the 
+    list of (xmin, ymin, xmax, ymax) bounding boxes, None for null 
+    geometries (and boxes of empty geometries).
     
     Parameters
     ----------
-    in_geojson : str or list, Required
-        list of strings or a single string geojson 
-        object or a file path pointing to a gzip or
-        geojson file. 
-    df_type : str, Optional
-        Option to return a pandas 'DataFrame' type or
-        a geopandas 'GeoDataFrame' type.  Allowed 
-        values include 'DataFrame' and 'GeoDataFrame'
-        **Note: Due to the complexity of installing 
-            the GeoPandas package correctly, it was not 
-            set as a direct dependency of GRALE. Instead,
-            it must be installed separately from GRALE. 
-            If Geopandas is not installed/available and 
-            df_type is set to 'GeoDataFrame', a warning 
-            will be printed and a regular pandas 
-            (non-spatial) DataFrame will be returned.
-        Default, 'DataFrame'
-        
+    geoms : list, Required
+        List of GeoJSON geometry objects or None.
+    srs_id : int, Required
+        GeoPackage spatial reference system id
     """
-    merged = merge_geojsons(in_geojsons)
-    gj = json.loads(merged)
-
-    if df_type =='GeoDataFrame':
-        try: 
-            if 'geopandas' not in sys.modules:
-                import geopandas
-            return geopandas.GeoDataFrame.from_features(gj["features"])  
-        except:
-            _print('''Warning: GeoPandas install is not available!
-                      Please ensure GeoPandas is installed then try to 
-                      import the package directly. If errors persist,
-                      attempt to reinstall GeoPandas. 
-                      Defaulting data to pandas.dataframe''')
-            df_type ='DataFrame'
-            
-    if df_type =='DataFrame':
-        df_rows = [ {**gj['features'][i]['properties'], 
-                     **{'geometry':shape(gj['features'][i]['geometry']).wkt}
-                    } 
-                    for i in range(len(gj['features']))
-                   ]
-        return pd.DataFrame(df_rows)
+    wkb, boxes = _geometry_wkb_bounds(_geojson_geometries(geoms))
+    blobs = []
+    for w, bbox in zip(wkb, boxes):
+        if w is None:
+            blobs.append(None)
+        elif bbox is None:
+            # flags: little endian, no envelope, empty geometry
+            blobs.append(struct.pack('<2sBBi', b'GP', 0, 0b00010001, srs_id) + w)
+        else:
+            # flags: little endian, [minx, maxx, miny, maxy] envelope
+            blobs.append(struct.pack('<2sBBi4d', b'GP', 0, 0b00000011, srs_id, 
+                                     bbox[0], bbox[2], bbox[1], bbox[3]) + w)
+    return blobs, boxes
+#------------------------------------------------------------------------------ 
+def _gpkg_srs(out_sr):
+    """
+    Function converts an ESRI spatial reference (wkid number or 
+    spatial reference JSON) to a GeoPackage gpkg_spatial_ref_sys 
+    row of (srs_id, organization, organization_coordsys_id, 
+    definition).  pyproj is used for the WKT definition when 
+    available, else the definition is 'undefined'.
+    """
+    try:
+        if isinstance(out_sr, str) and out_sr.strip().startswith('{'):
+            sr = GRALE_JSON.loads(out_sr)
+        elif isinstance(out_sr, dict):
+            sr = out_sr
+        else:
+            sr = {'wkid': int(out_sr)}
+        wkid = int(sr.get('latestWkid') or sr.get('wkid'))
+    except (TypeError, ValueError):
+        return (0, 'NONE', 0, 'undefined')
+    authority = 'ESRI' if wkid >= 100000 else 'EPSG'
+    try:
+        import pyproj
+        definition = pyproj.CRS.from_authority(authority, wkid).to_wkt('WKT1_GDAL')
+    except Exception:
+        definition = _GPKG_WGS84_WKT if wkid == 4326 else 'undefined'
+    return (wkid, authority, wkid, definition)
+#------------------------------------------------------------------------------ 
+def _gpkg_rows(geoJsonDict, fields, srs_id):
+    """
+    Function converts the features of a grale geojson dictionary to 
+    GeoPackage insert rows of (geometry blob, field values..., 
+    grale_utc, grale_uuid) and rtree rows of (minx, maxx, miny, maxy). 
+    ESRI dates (epoch milliseconds) are written as ISO 8601 UTC text.
+    Returns a tuple of the row list, the rtree row list (None for null 
+    or empty geometries) and the set of geometry types.
+    """
+    names = [f['name'] for f in fields] + ['grale_utc', 'grale_uuid']
+    dates = {f['name'] for f in fields if f.get('type') == 'esriFieldTypeDate'}
+    rows, boxes, g_types = [], [], set()
+    feats = geoJsonDict.get('features') or []
+    blobs, bboxes = _gpkg_geometries([f.get('geometry') for f in feats], srs_id)
+    for feat, blob, bbox in zip(feats, blobs, bboxes):
+        props = feat.get('properties') or {}
+        geom = feat.get('geometry')
+        values = [props.get(n) for n in names]
+        for i, n in enumerate(names):
+            if n in dates and isinstance(values[i], numbers.Number):
+                values[i] = (dt(1970, 1, 1) + timedelta(milliseconds=values[i])
+                             ).isoformat(timespec='milliseconds') + 'Z'
+        rows.append([blob] + values)
+        boxes.append(None if bbox is None else (bbox[0], bbox[2], bbox[1], bbox[3]))
+        if geom:
+            g_types.add(geom['type'])
+    return rows, boxes, g_types
 #------------------------------------------------------------------------------
 # module classes
 #------------------------------------------------------------------------------   
+class jsonCodec(object):
+    """
+    Class object wrapping the JSON parser/serializer used for grale
+    request, chunk and file payloads.  The fastest available backend 
+    is selected at import, orjson then ujson, falling back to the
+    python standard library json module. 
+    **Note: orjson and ujson are not direct dependencies of GRALE 
+        and must be installed separately.
+    ...
+
+    Attributes
+    ----------
+    backend : str
+        Name of the backend in use, 'orjson', 'ujson' or 'json'.
+        Set to switch backends; unavailable backends print a 
+        warning and fall back to the standard library.  
+
+    Methods
+    -------
+    loads(s)
+        Parse a JSON str or bytes object
+    dumps(obj, indent=None)
+        Serialize an object to a JSON string
+    dumpb(obj, indent=None)
+        Serialize an object to UTF-8 encoded JSON bytes
+    """
+    def __init__(self, backend=None):
+        """
+        Parameters
+        ----------
+        backend : str, optional
+            JSON backend to use, 'orjson', 'ujson' or 'json'
+            Default, None selects the fastest installed backend
+        """
+        self.backend = backend
+    @property
+    def backend(self):
+        return self._backend
+    @backend.setter
+    def backend(self, value):
+        self._mod = json
+        self._backend = 'json'
+        names = ('orjson', 'ujson') if value is None else (value,)
+        for name in names:
+            if name == 'json':
+                break
+            try:
+                self._mod = __import__(name)
+                self._backend = name
+                break
+            except ImportError:
+                if value is not None:
+                    _print(f'Warning: {name} is not available! '
+                            'Defaulting to the json standard library.')
+    def loads(self, s):
+        """
+        Parse a JSON str or bytes object into python objects.
+        """
+        return self._mod.loads(s)
+    def dumpb(self, obj, indent=None):
+        """
+        Serialize an object to UTF-8 encoded JSON bytes. 
+        **Note: orjson only writes compact or 2 space indented 
+            JSON, other indents fall back to ujson when it is 
+            installed, else the standard library, so every backend 
+            writes the requested indent.  Objects orjson can not 
+            serialize (e.g. integers over 64 bits) also fall back 
+            to the standard library.
+        """
+        ujson = self._mod if self._backend == 'ujson' else None
+        if self._backend == 'orjson':
+            if not indent or indent == 2:
+                try:
+                    return self._mod.dumps(obj, option=(self._mod.OPT_INDENT_2 
+                                                        if indent else 0))
+                except TypeError:
+                    pass
+            else:
+                ujson = sys.modules.get('ujson')
+                if ujson is None:
+                    try:
+                        import ujson
+                    except ImportError:
+                        pass
+        if ujson is not None:
+            try:
+                return ujson.dumps(obj, indent=indent or 0, 
+                                   ensure_ascii=False, 
+                                   escape_forward_slashes=False).encode()
+            except (TypeError, OverflowError):
+                pass
+        return self._stdlib_dumps(obj, indent).encode()
+    def dumps(self, obj, indent=None):
+        """
+        Serialize an object to a JSON string. 
+        """
+        if self._backend == 'json':
+            return self._stdlib_dumps(obj, indent)
+        return self.dumpb(obj, indent=indent).decode()
+    @staticmethod
+    def _stdlib_dumps(obj, indent):
+        # match the compact output of orjson and ujson when not indented
+        if indent is None:
+            return json.dumps(obj, separators=(',', ':'))
+        return json.dumps(obj, indent=indent)
+#------------------------------------------------------------------------------   
+class outputProfile(object):
+    """
+    Class object holding the serialization options applied to grale 
+    GeoJSON output files and merged results.
+    ...
+
+    Attributes
+    ----------
+    indent : int or None
+        JSON indent level, None writes compact JSON without 
+        whitespace between separators.
+        Default, 4
+    precision : int or None
+        Number of decimal places geometry coordinates are 
+        rounded to, None leaves coordinates unchanged. 
+        Ex. 6 decimal places of WGS-84 degrees is ~0.1 meter.
+        Default, None
+    compresslevel : int
+        gzip compression level (1-9) for compressed outputs,
+        lower levels compress faster with larger files.
+        Default, 9
+
+    Methods
+    -------
+    dumpb(geojson)
+        Serialize a geojson dictionary to bytes using the profile
+    dumps(geojson)
+        Serialize a geojson dictionary to a string using the profile
+    """
+    def __init__(self, indent=4, precision=None, compresslevel=9):
+        self.indent = indent
+        self.precision = precision
+        self.compresslevel = compresslevel
+    def round_geojson(self, geojson):
+        """
+        Return a copy of a geojson dictionary with the geometry 
+        coordinates rounded to the profile precision.  The input 
+        is not modified and is returned as is if precision is None.
+        """
+        if self.precision is None or 'features' not in geojson:
+            return geojson
+        features = []
+        for f in geojson['features']:
+            geom = f.get('geometry')
+            if geom:
+                f = {**f, 'geometry': _round_geometry(geom, self.precision)}
+            features.append(f)
+        return {**geojson, 'features': features}
+    def dumpb(self, geojson):
+        """
+        Serialize a geojson dictionary to UTF-8 encoded JSON bytes.
+        """
+        return GRALE_JSON.dumpb(self.round_geojson(geojson), indent=self.indent)
+    def dumps(self, geojson):
+        """
+        Serialize a geojson dictionary to a JSON string.
+        """
+        return GRALE_JSON.dumps(self.round_geojson(geojson), indent=self.indent)
+#------------------------------------------------------------------------------   
+class metadataCache(object):
+    """
+    Class object for a persistent SQLite cache of service metadata 
+    responses (layer and service definitions, folder listings and record
+    counts) keyed by the normalized request URL and parameters.  Fresh 
+    entries are returned without a request.  Expired entries holding an 
+    ETag or Last-Modified validator are revalidated with a conditional 
+    (If-None-Match/If-Modified-Since) request, a 304 response renews the
+    entry without transferring the body.  Only successful responses are 
+    stored. 
+    ...
+
+    Attributes
+    ----------
+    path : str
+        SQLite database file, shared by runs and processes.
+        Default, ~/.cache/grale/metadata.sqlite
+    ttl : float
+        Seconds an entry is used without revalidation, 0 revalidates 
+        (or re-requests) on every use.
+        **Note: record counts are query responses which servers rarely 
+            validate, they are re-requested once the ttl expires.
+        Default, 86400 (one day)
+
+    Methods
+    -------
+    get(url)
+        Return the cached or requested response for a url
+    clear()
+        Remove all cached entries
+
+    Example
+    -------
+    >>> grale.ESRI.metadata_cache = grale.metadataCache(ttl=12*3600)
+    """
+    def __init__(self, path=None, ttl=86400):
+        import sqlite3
+        if path is None:
+            path = os.path.join(os.path.expanduser('~'), '.cache', 
+                                'grale', 'metadata.sqlite')
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._lock, self.conn:
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute('CREATE TABLE IF NOT EXISTS responses ('
+                              'key TEXT PRIMARY KEY, url TEXT, body BLOB, '
+                              'content_type TEXT, etag TEXT, '
+                              'last_modified TEXT, stored REAL)')
+    #--------------------------------------------------------------------------
+    @staticmethod
+    def _key(url):
+        """
+        Return the normalized url (lower case scheme and host, sorted
+        parameters) and its sha256 cache key.
+        """
+        pUrl = urlparse(url)
+        query = urlencode(sorted(parse_qsl(pUrl.query, keep_blank_values=True)))
+        url = pUrl._replace(scheme=pUrl.scheme.lower(), 
+                            netloc=pUrl.netloc.lower(),
+                            query=query, fragment='').geturl()
+        return url, hashlib.sha256(url.encode()).hexdigest()
+    #--------------------------------------------------------------------------
+    def get(self, url):
+        """
+        Return a requests.Response for the url from the cache, after a 
+        conditional request when the entry expired, or from 
+        GRALE_SESSION.get when the url is not cached.  The 'grale_cache'
+        attribute of cached responses is 'hit' or 'revalidated'. 
+        """
+        n_url, key = self._key(url)
+        with self._lock:
+            row = self.conn.execute('SELECT body, content_type, etag, '
+                                    'last_modified, stored FROM responses '
+                                    'WHERE key = ?', (key,)).fetchone()
+        now = time.time()
+        if row and now - row[4] < (self.ttl or 0):
+            return self._response(url, row, 'hit')
+        headers = {}
+        if row and row[2]:
+            headers['If-None-Match'] = row[2]
+        if row and row[3]:
+            headers['If-Modified-Since'] = row[3]
+        resp = GRALE_SESSION.get(url, headers=headers or None)
+        if row and resp.status_code == 304:
+            with self._lock, self.conn:
+                self.conn.execute('UPDATE responses SET stored = ? WHERE key = ?', 
+                                  (now, key))
+            return self._response(url, row, 'revalidated', 
+                                  elapsed=resp.elapsed.total_seconds())
+        if resp.status_code == 200 and not _is_esri_error(resp):
+            with self._lock, self.conn:
+                self.conn.execute('INSERT OR REPLACE INTO responses '
+                                  'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                                  (key, n_url, gzip.compress(resp.content, 6), 
+                                   resp.headers.get('Content-Type'),
+                                   resp.headers.get('ETag'),
+                                   resp.headers.get('Last-Modified'), now))
+        return resp
+    #--------------------------------------------------------------------------
+    @staticmethod
+    def _response(url, row, state, elapsed=0):
+        """
+        Return a requests.Response built from a cache entry.
+        """
+        headers = {k: v for k, v in zip(('Content-Type', 'ETag', 'Last-Modified'),
+                                        row[1:4]) if v}
+        resp = _build_response(url, 200, gzip.decompress(row[0]), 
+                               headers=headers, elapsed=elapsed, reason='OK')
+        resp.grale_cache = state
+        return resp
+    #--------------------------------------------------------------------------
+    def clear(self):
+        """
+        Remove all cached entries.
+        """
+        with self._lock, self.conn:
+            self.conn.execute('DELETE FROM responses')
+#------------------------------------------------------------------------------   
+class responseCache(object):
+    """
+    Class object for an on-disk HTTP response cache used by 
+    sessionWrapper.get, keyed by the prepared request URL (_prep_url).  
+    Bodies are gzip compressed and content addressed (stored once per 
+    sha256 digest of the body under objects/), an SQLite index maps each
+    URL to its body and tracks use for least recently used eviction once
+    the stored bodies exceed max_bytes.  Re-runs of a job are answered 
+    from disk; in replay only mode requests which are not cached fail
+    instead of reaching the server.  Only successful responses are 
+    stored.
+    ...
+
+    Attributes
+    ----------
+    path : str
+        Cache directory.
+        Default, ~/.cache/grale/responses
+    max_bytes : int
+        Size limit of the compressed bodies, least recently used 
+        responses are evicted beyond it.  The size is aggregated when 
+        the cache is opened and tracked as responses are stored, bodies
+        stored by other processes sharing the path are counted on the 
+        next open.
+        Default, 2 GiB
+    replay_only : bool
+        Option to answer only from the cache (offline), requests which 
+        are not cached raise requests.exceptions.ConnectionError.
+        Default, False
+
+    Methods
+    -------
+    get(url)
+        Return the cached response of a url or None
+    put(url, resp)
+        Store a successful response
+    clear()
+        Remove all cached responses
+
+    Example
+    -------
+    >>> grale.GRALE_SESSION.response_cache = grale.responseCache()
+    >>> # re-run offline from the cached responses
+    >>> grale.GRALE_SESSION.response_cache.replay_only = True
+    """
+    def __init__(self, path=None, max_bytes=2*1024**3, replay_only=False):
+        import sqlite3
+        if path is None:
+            path = os.path.join(os.path.expanduser('~'), '.cache', 
+                                'grale', 'responses')
+        os.makedirs(os.path.join(path, 'objects'), exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.replay_only = replay_only
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(path, 'index.sqlite'), 
+                                    timeout=30, check_same_thread=False)
+        with self._lock, self.conn:
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute('CREATE TABLE IF NOT EXISTS responses ('
+                              'key TEXT PRIMARY KEY, url TEXT, digest TEXT, '
+                              'size INTEGER, content_type TEXT, used REAL)')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS responses_used '
+                              'ON responses (used)')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS responses_digest '
+                              'ON responses (digest)')
+            # running size of the stored bodies, aggregated once per object
+            self._bytes = self._stored_bytes()
+    #--------------------------------------------------------------------------
+    def _blob_path(self, digest):
+        return os.path.join(self.path, 'objects', digest[:2], f'{digest}.gz')
+    #--------------------------------------------------------------------------
+    def _stored_bytes(self):
+        return self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM '
+                                 '(SELECT DISTINCT digest, size FROM responses)'
+                                 ).fetchone()[0]
+    #--------------------------------------------------------------------------
+    def _release_blob(self, digest, size):
+        """
+        Remove a body once no response references it. 
+        """
+        if self.conn.execute('SELECT 1 FROM responses WHERE digest = ?',
+                             (digest,)).fetchone():
+            return
+        self._bytes -= size
+        try:
+            os.remove(self._blob_path(digest))
+        except OSError:
+            pass
+    #--------------------------------------------------------------------------
+    def get(self, url):
+        """
+        Return a requests.Response for the url from the cache, with the 
+        'grale_cache' attribute 'replay', or None when it is not cached.
+        """
+        key = hashlib.sha256(url.encode()).hexdigest()
+        with self._lock:
+            row = self.conn.execute('SELECT digest, content_type FROM responses '
+                                    'WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            with self.conn:
+                self.conn.execute('UPDATE responses SET used = ? WHERE key = ?',
+                                  (time.time(), key))
+        try:
+            with open(self._blob_path(row[0]), 'rb') as f:
+                content = gzip.decompress(f.read())
+        except OSError:
+            return None
+        resp = _build_response(url, 200, content, reason='OK', 
+                               headers={'Content-Type': row[1]} if row[1] else None)
+        resp.grale_cache = 'replay'
+        return resp
+    #--------------------------------------------------------------------------
+    def put(self, url, resp):
+        """
+        Store a successful (200, not an ESRI error body) response, then 
+        evict the least recently used responses beyond max_bytes.
+        """
+        # protocol buffer bodies are binary, errors are returned as JSON
+        is_pbf = 'protobuf' in resp.headers.get('Content-Type', '')
+        if resp.status_code != 200 or (not is_pbf and _is_esri_error(resp)):
+            return
+        key = hashlib.sha256(url.encode()).hexdigest()
+        digest = hashlib.sha256(resp.content).hexdigest()
+        f_path = self._blob_path(digest)
+        # compress outside of the lock, new bodies are the common case
+        data = None if os.path.isfile(f_path) else gzip.compress(resp.content, 6)
+        with self._lock, self.conn:
+            # eviction removes bodies under the same lock, so the body can
+            # not be removed between the check, the write and the insert
+            try:
+                if not os.path.isfile(f_path):
+                    if data is None:
+                        data = gzip.compress(resp.content, 6)
+                    os.makedirs(os.path.dirname(f_path), exist_ok=True)
+                    tmp_path = f'{f_path}.{uuid.uuid4().hex}.tmp'
+                    with open(tmp_path, 'wb') as f:
+                        f.write(data)
+                    os.replace(tmp_path, f_path)
+                size = os.path.getsize(f_path)
+            except OSError:
+                # not cached, Ex. the disk is full
+                return
+            new_blob = not self.conn.execute('SELECT 1 FROM responses WHERE '
+                                             'digest = ?', (digest,)).fetchone()
+            old = self.conn.execute('SELECT digest, size FROM responses '
+                                    'WHERE key = ?', (key,)).fetchone()
+            self.conn.execute('INSERT OR REPLACE INTO responses VALUES '
+                              '(?, ?, ?, ?, ?, ?)', 
+                              (key, url, digest, size, 
+                               resp.headers.get('Content-Type'), time.time()))
+            if new_blob:
+                self._bytes += size
+            # the url previously answered with another body
+            if old and old[0] != digest:
+                self._release_blob(*old)
+            self._evict()
+    #--------------------------------------------------------------------------
+    def _evict(self):
+        """
+        Remove the least recently used responses, and bodies no longer 
+        referenced, until the stored bodies fit within max_bytes.
+        """
+        if not self.max_bytes:
+            return
+        while self._bytes > self.max_bytes:
+            # least recently used first, read in small batches (used index)
+            rows = self.conn.execute('SELECT key, digest, size FROM responses '
+                                     'ORDER BY used LIMIT 64').fetchall()
+            if not rows:
+                self._bytes = 0
+                break
+            for key, digest, size in rows:
+                if self._bytes <= self.max_bytes:
+                    break
+                self.conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+                self._release_blob(digest, size)
+    #--------------------------------------------------------------------------
+    def clear(self):
+        """
+        Remove all cached responses.
+        """
+        with self._lock, self.conn:
+            for (digest,) in self.conn.execute('SELECT DISTINCT digest '
+                                               'FROM responses').fetchall():
+                try:
+                    os.remove(self._blob_path(digest))
+                except OSError:
+                    pass
+            self.conn.execute('DELETE FROM responses')
+            self._bytes = 0
+#------------------------------------------------------------------------------   
+class _geoPackageWriter(object):
+    """
+    Internal class writing grale chunks into a GeoPackage (v1.2) feature
+    table with the python standard library sqlite3 module.  Each chunk 
+    is inserted with executemany in one transaction, the feature bounding
+    boxes are staged in a plain table and the rtree spatial index is 
+    built once when the writer is closed.  All methods must be called
+    from the same (writer) thread.
+    """
+    def __init__(self, f_path, metadata, fields, srs):
+        """
+        Parameters
+        ----------
+        f_path : str, required
+            Output GeoPackage file path
+        metadata : dictionary, required
+            ESRI service metadata 
+        fields : list, required
+            ESRI field definitions of the output columns
+        srs : tuple, required
+            gpkg_spatial_ref_sys row (see _gpkg_srs)
+        """
+        import sqlite3
+        self.f_path = f_path
+        self.srs = srs
+        self.table = re.sub(r'\W', '_', str(metadata.get('name') or 'features'))
+        self.identifier = str(metadata.get('name') or self.table)
+        self.bbox = None
+        self.g_types = set()
+        self.n_rows = 0
+        self.conn = sqlite3.connect(f_path)
+        self.conn.execute('PRAGMA application_id = 1196444487')  # 'GPKG'
+        self.conn.execute('PRAGMA user_version = 10200')
+        self.conn.execute('PRAGMA synchronous = OFF')
+        
+        # SQLite column names are case insensitive, fields colliding with 
+        # the fid, geom and grale columns (e.g. a shapefile 'FID' ObjectID) 
+        # or with each other are renamed 'name_1', 'name_2'...
+        used = {'fid', 'geom', 'grale_utc', 'grale_uuid'}
+        self.names = []
+        for f in fields:
+            name, i = f['name'], 1
+            while name.lower() in used:
+                name, i = f"{f['name']}_{i}", i + 1
+            used.add(name.lower())
+            self.names.append(name)
+        columns = [f'"{n}" {_ESRI_FIELD_SQL_TYPES.get(f.get("type"), "TEXT")}' 
+                   for n, f in zip(self.names, fields)]
+        
+        with self.conn:
+            self.conn.executescript(_GPKG_SCHEMA_SQL)
+            self.conn.executemany('INSERT OR IGNORE INTO gpkg_spatial_ref_sys '
+                                  '(srs_name, srs_id, organization, '
+                                  'organization_coordsys_id, definition) '
+                                  'VALUES (?, ?, ?, ?, ?)',
+                                  [('Undefined cartesian SRS', -1, 'NONE', -1, 'undefined'),
+                                   ('Undefined geographic SRS', 0, 'NONE', 0, 'undefined'),
+                                   ('WGS 84 geodetic', 4326, 'EPSG', 4326, _GPKG_WGS84_WKT),
+                                   (f'{srs[1]}:{srs[2]}', *srs)])
+            self.conn.execute(f'CREATE TABLE "{self.table}" ('
+                              'fid INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL, '
+                              'geom BLOB, ' + 
+                              ', '.join(columns + ['grale_utc TEXT', 'grale_uuid TEXT']) + 
+                              ')')
+            self.conn.execute('CREATE TABLE _grale_rtree_stage '
+                              '(id INTEGER PRIMARY KEY, minx REAL, maxx REAL, '
+                              'miny REAL, maxy REAL)')
+        cols = ', '.join(['fid', 'geom'] + [f'"{n}"' for n in self.names] + 
+                         ['grale_utc', 'grale_uuid'])
+        self._insert_sql = (f'INSERT INTO "{self.table}" ({cols}) VALUES '
+                            f'({", ".join(["?"] * (len(self.names) + 4))})')
+    def write(self, rows, boxes, g_types):
+        """
+        Insert one chunk of rows (see _gpkg_rows) in a single transaction.
+        """
+        if not rows:
+            return
+        # fids are assigned sequentially by the single writer
+        first = self.n_rows + 1
+        with self.conn:
+            self.conn.executemany(self._insert_sql, 
+                                  [[first + i] + r for i, r in enumerate(rows)])
+            self.conn.executemany('INSERT INTO _grale_rtree_stage VALUES '
+                                  '(?, ?, ?, ?, ?)',
+                                  [(first + i, *b) for i, b in enumerate(boxes) if b])
+        for b in boxes:
+            if b:
+                self.bbox = b if self.bbox is None else (
+                                min(self.bbox[0], b[0]), max(self.bbox[1], b[1]),
+                                min(self.bbox[2], b[2]), max(self.bbox[3], b[3]))
+        self.g_types.update(g_types)
+        self.n_rows += len(rows)
+    def close(self, lineage=None):
+        """
+        Register the feature table, build the rtree spatial index from the 
+        staged bounding boxes, store the lineage dictionary (request 
+        metadata and logging) in the grale_lineage attributes table and 
+        close the connection.
+        """
+        g_types = {t.replace('Multi', '') for t in self.g_types}
+        if len(self.g_types) == 1:
+            g_type = next(iter(self.g_types)).upper()
+        elif len(g_types) == 1:
+            g_type = f'MULTI{next(iter(g_types)).upper()}'
+        else:
+            g_type = 'GEOMETRY'
+        minx, maxx, miny, maxy = self.bbox or (None,) * 4
+        rtree = f'rtree_{self.table}_geom'
+        with self.conn:
+            self.conn.execute('INSERT INTO gpkg_contents (table_name, data_type, '
+                              'identifier, last_change, min_x, min_y, max_x, max_y, '
+                              'srs_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                              (self.table, 'features', self.identifier, 
+                               dt.utcnow().isoformat(timespec='milliseconds') + 'Z',
+                               minx, miny, maxx, maxy, self.srs[0]))
+            self.conn.execute('INSERT INTO gpkg_geometry_columns VALUES '
+                              '(?, ?, ?, ?, ?, ?)', 
+                              (self.table, 'geom', g_type, self.srs[0], 2, 0))
+            self.conn.execute(f'CREATE VIRTUAL TABLE "{rtree}" USING '
+                              'rtree(id, minx, maxx, miny, maxy)')
+            self.conn.execute(f'INSERT INTO "{rtree}" SELECT * FROM _grale_rtree_stage')
+            self.conn.execute('DROP TABLE _grale_rtree_stage')
+            self.conn.execute('INSERT INTO gpkg_extensions VALUES (?, ?, ?, ?, ?)',
+                              (self.table, 'geom', 'gpkg_rtree_index', 
+                               'http://www.geopackage.org/spec120/#extension_rtree',
+                               'write-only'))
+            # rtree maintenance triggers, the ST_ functions are provided by 
+            # GeoPackage clients (GDAL, QGIS...) that later edit the table
+            self.conn.executescript(_GPKG_RTREE_TRIGGERS_SQL.format(
+                                                t=self.table, c='geom', i='fid'))
+            if lineage:
+                self.conn.execute('CREATE TABLE grale_lineage (id INTEGER PRIMARY '
+                                  'KEY AUTOINCREMENT NOT NULL, key TEXT, value TEXT)')
+                self.conn.executemany('INSERT INTO grale_lineage (key, value) '
+                                      'VALUES (?, ?)', 
+                                      [(k, GRALE_JSON.dumps(v)) 
+                                       for k, v in lineage.items()])
+                self.conn.execute('INSERT INTO gpkg_contents (table_name, '
+                                  'data_type, identifier, last_change) '
+                                  'VALUES (?, ?, ?, ?)',
+                                  ('grale_lineage', 'attributes', 
+                                   f'{self.identifier} grale lineage',
+                                   dt.utcnow().isoformat(timespec='milliseconds') + 'Z'))
+        self.conn.execute('PRAGMA synchronous = FULL')
+        self.conn.close()
+    def abort(self):
+        """
+        Close the connection without registering the feature table or 
+        building the spatial index and remove the partial GeoPackage.
+        """
+        self.conn.close()
+        if os.path.isfile(self.f_path):
+            os.remove(self.f_path)
+#------------------------------------------------------------------------------  
 class graleReqestLog:
     """
     Class object to store/log request parameters and result metadata.
@@ -700,7 +2822,8 @@ class graleReqestLog:
                 'status' : 'status category of an iteration/process','  
                 'results': 'detailed messages of an iteration/process',
                 'elapsed_time': 'total time to run an iteration/process',
-                'size': 'size of iteration/process return object'
+                'size': 'size of iteration/process return object',
+                'rate_limit_wait': 'time queued behind a host rate limit'
                 }
             }
 
@@ -710,7 +2833,8 @@ class graleReqestLog:
         
     Methods
     -------
-    log_message(self, parameters, status, message, elapsed_time, size_bytes)
+    log_message(self, parameters, status, message, elapsed_time, size_bytes,
+                rate_wait)
         Method for updating the log attribute/dictionary with values from 
         a given process/iteration.   
 
@@ -726,6 +2850,8 @@ class graleReqestLog:
             total time for the process iteration
         size_bytes : str, required
             return size in bytes for the process iteration
+        rate_wait : str, optional
+            time the request was queued behind a host rate limit
 
         Returns
         -------
@@ -759,7 +2885,7 @@ class graleReqestLog:
 
     def log_message(self, req_url, status, message, 
                             elapsed_time, size_bytes,
-                            pid=None):
+                            pid=None, rate_wait='0(ms)'):
         if not pid:
             pid = str(uuid.uuid4())
         ts = dt.utcnow().isoformat(timespec='seconds', sep='T')
@@ -776,10 +2902,155 @@ class graleReqestLog:
                         'status' : status,   
                         'results': message,
                         'elapsed_time': elapsed_time,
-                        'size': size_bytes
+                        'size': size_bytes,
+                        'rate_limit_wait': rate_wait
                         }
                                 
 #------------------------------------------------------------------------------   
+class _tokenBucket(object):
+    """
+    Class implements a token bucket rate limit shared by all threads and 
+    event loops requesting a host.  Each request reserves a token; when 
+    the bucket is empty the request is queued behind the earlier 
+    reservations rather than failed, so requests are released in arrival 
+    order at the configured rate.
+    
+    Parameters
+    ----------
+    rate : float, required
+        Requests per second
+    burst : int, optional
+        Number of requests which may be sent back to back;
+        Default, 1 spaces every request 1/rate seconds apart
+    """
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.burst = max(float(burst), 1.0)
+        self.tokens = self.burst
+        self.stamp = time.monotonic()
+        self._lock = threading.Lock()
+    #--------------------------------------------------------------------------
+    def reserve(self):
+        """
+        Method reserves a token and returns the seconds to wait before
+        sending the request.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, 
+                              self.tokens + (now - self.stamp) * self.rate)
+            self.stamp = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+#------------------------------------------------------------------------------   
+class _hostConcurrency(object):
+    """
+    Class tracks an additive increase, multiplicative decrease (AIMD) limit
+    on the number of in-flight requests to one host.  The limit grows by 
+    one for each limit healthy responses (about one per round trip of the
+    window) and halves on 429/503 responses and timeouts, once per round 
+    trip.  A response slower than twice (or one second over) the recent 
+    fastest response holds the limit.
+    
+    Parameters
+    ----------
+    initial : int, optional
+        Starting limit on in-flight requests;
+        Default, 4
+    maximum : int, optional
+        Upper bound of the limit;
+        Default, 32
+    """
+    def __init__(self, initial=4, maximum=32):
+        self.maximum = max(int(maximum), 1)
+        self.limit = float(min(max(int(initial), 1), self.maximum))
+        self.in_flight = 0
+        # recent fastest response (seconds), drifts up 5% per response
+        self.baseline = None
+        self._decreased = 0.0
+        self._cond = threading.Condition()
+    #--------------------------------------------------------------------------
+    def acquire(self):
+        """
+        Method blocks until a request slot is available and returns the 
+        request start time.
+        """
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+            return time.monotonic()
+    #--------------------------------------------------------------------------
+    def release(self, start, congested=False):
+        """
+        Method frees the request slot taken at start and updates the limit
+        from the response outcome.
+        """
+        with self._cond:
+            self.in_flight -= 1
+            elapsed = time.monotonic() - start
+            if congested:
+                # responses to requests sent before the last decrease 
+                # belong to the same congestion event
+                if start >= self._decreased:
+                    self.limit = max(1.0, self.limit / 2)
+                    self._decreased = time.monotonic()
+            else:
+                if self.baseline is None:
+                    self.baseline = elapsed
+                self.baseline = min(elapsed, self.baseline * 1.05)
+                if elapsed <= max(2 * self.baseline, self.baseline + 1):
+                    self.limit = min(float(self.maximum), 
+                                     self.limit + 1 / self.limit)
+            self._cond.notify_all()
+#------------------------------------------------------------------------------   
+class _chunkScheduler(object):
+    """
+    Class holds the pending chunks of each layer of a bulk download and 
+    returns them in the order of the scheduling policy: 'fair' takes one 
+    chunk from each layer in turn (round robin), 'smallest' takes the 
+    chunks of the layer with the fewest pending chunks first.
+    
+    Parameters
+    ----------
+    scheduling : str, optional
+        Scheduling policy, 'fair' or 'smallest';
+        Default, 'fair'
+    """
+    def __init__(self, scheduling='fair'):
+        self.scheduling = scheduling
+        # pending chunks per layer, and the round robin order of the 
+        # layers with pending chunks
+        self.queues = {}
+        self.order = deque()
+    #--------------------------------------------------------------------------
+    def enqueue(self, url, chunks):
+        """
+        Method adds chunks to the queue of a layer.
+        """
+        pending = self.queues.setdefault(url, deque())
+        if not chunks:
+            return
+        if not pending and url not in self.order:
+            self.order.append(url)
+        pending.extend(chunks)
+    #--------------------------------------------------------------------------
+    def next(self):
+        """
+        Method returns the (url,) + chunk tuple of the next chunk by the 
+        scheduling policy, or None when no chunk is pending.
+        """
+        if self.scheduling == 'smallest':
+            url = min((u for u in self.queues if self.queues[u]), 
+                      key=lambda u: len(self.queues[u]), default=None)
+        else:
+            url = self.order.popleft() if self.order else None
+            if url is not None and len(self.queues[url]) > 1:
+                self.order.append(url)
+        if url is None:
+            return None
+        return (url,) + self.queues[url].popleft()
+#------------------------------------------------------------------------------   
 class sessionWrapper(object):
     """ 
     Class constructor builds a wrapper around all standard request 
@@ -868,6 +3139,7 @@ class sessionWrapper(object):
         Default, 10 set by requests.adapters.DEFAULT_POOLSIZE
     pool_maxsize : int, optional, *requests.adapters.HTTPAdapter
         The maximum number of connections to save in the pool.
+        The pool grows to track the number of request workers.
         Default, 10 set by requests.adapters.DEFAULT_POOLSIZE 
     pool_block : bool, optional, *requests.adapters.HTTPAdapter
         Whether the connection pool should block for connections.
@@ -889,6 +3161,10 @@ class sessionWrapper(object):
     ssl_protocol : _SSLMethod , optional, *See requests_pkcs12.Pkcs12Adapter
         A protocol version from the ssl library.
         Default, requests_pkcs12.default_ssl_protocol       
+    pkcs12_base_url : str , optional
+        Base url the pkcs12 adapter is mounted on, the PKCS#12 client 
+        certificate is only presented to urls starting with the base url.
+        Default, None set to the base url of the first request
     headers : dict, optional, *requests.Session
         Dictionary of HTTP Headers to send with a request.
         Default, requests.utils.default_headers()
@@ -933,6 +3209,36 @@ class sessionWrapper(object):
         Details how long (sec) to wait for a client connection 
         and how long (sec) to wait for a read response.
         Default, (30,180)
+    adaptive_concurrency : bool, optional
+        Option to limit the in-flight get requests per host with an 
+        additive increase, multiplicative decrease controller, raising the 
+        limit while responses stay fast and halving it on 429/503 
+        responses and timeouts (including retried ones).  Threads beyond
+        the limit wait for a free request slot.
+        Default, False
+    response_cache : responseCache, optional
+        On-disk cache answering repeated get requests for the same 
+        prepared url (re-runs, offline replay) without a request.  
+        Requests with extra headers bypass the cache.
+        Default, None
+    rate_limits : dict, optional
+        Dictionary of host (Ex. 'gis.agency.gov', a host:port or a 
+        scheme://host) to the maximum requests per second, or a tuple 
+        of (requests per second, burst).  Requests to a limited host are 
+        queued across all threads and calls, never failed, and the 
+        queued time is logged as the 'rate_limit_wait' of the request. 
+        Retries to a limited host are sent by the get method rather 
+        than the urllib3 Retry, so every attempt is queued behind the 
+        limit.
+        Default, {} no limits
+    initial_concurrency : int, optional
+        Starting limit of in-flight requests per host
+        Default, 4
+    max_concurrency : int, optional
+        Upper bound of in-flight requests per host, also the default 
+        number of workers of ESRI chunk requests when adaptive_concurrency
+        is enabled
+        Default, 32
     verify : bool or str, optional,  *requests.get
         Either a Boolean, in which case it controls whether to 
         verify the server's TLS certificate, or a string, in 
@@ -979,6 +3285,7 @@ class sessionWrapper(object):
         self.pkcs12_filename = None
         self.pkcs12_password = None
         self.ssl_protocol = requests_pkcs12.default_ssl_protocol
+        self.pkcs12_base_url = None
         
         # default requests.Session params
         self.headers = requests.utils.default_headers()
@@ -994,6 +3301,15 @@ class sessionWrapper(object):
         
         # default requests.get params
         self.timeout = (30, 180)  # 30 sec connect and 180 sec read
+
+        # per-host requests per second, Ex. {'gis.agency.gov': 20}
+        self.rate_limits = {}
+        # on-disk response cache (responseCache), None disables caching
+        self.response_cache = None
+        # per-host AIMD limit of in-flight requests
+        self.adaptive_concurrency = False
+        self.initial_concurrency = 4
+        self.max_concurrency = 32
         
         # default urllib3.Retry object
         self._Retry = None        
@@ -1001,8 +3317,19 @@ class sessionWrapper(object):
         self._HTTPAdapter = None
         # default requests_pkcs12 adapter
         self._Pkcs12Adapter = None
-        # default requests session 
-        self._Session = None
+        # requests HTTP adapter without retries, mounted for rate limited hosts
+        self._LimitedAdapter = None
+        # per-thread session pool state
+        self._session_key = str(uuid.uuid4())
+        self._session_lock = threading.RLock()
+        self._session_generation = 0
+        self._adapter_generation = None
+        # open sessions and replaced adapters per adapter generation
+        self._generation_sessions = {}
+        self._retired_adapters = {}
+        self._pool_workers = 0
+        self._host_limits = {}
+        self._rate_buckets = {}
 
         # allow the object to be initialized with kwargs
         self.__dict__.update(kwargs)
@@ -1022,6 +3349,74 @@ class sessionWrapper(object):
         # parse the base url from the url
         pUrl = urlparse(url)
         return pUrl._replace(query=None).geturl()        
+    #--------------------------------------------------------------------------
+    def _get_host(self, url):
+        """
+        Method returns the scheme and host of a url, the key of the 
+        per-host concurrency limits. 
+
+        Parameters
+        --------------------- 
+        url : str, required
+            Uniform Resource Locator (URL) string of characters which 
+            identifies a name or a resource on the internet
+        """    
+        pUrl = urlparse(self._get_base_url(url))
+        return f'{pUrl.scheme}://{pUrl.netloc}'
+    #--------------------------------------------------------------------------
+    def _host_concurrency(self, url):
+        """
+        Method returns the AIMD concurrency limit (_hostConcurrency) of 
+        the url host, created on the first request to the host. 
+        """
+        host = self._get_host(url)
+        with self._session_lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = _hostConcurrency(
+                                            initial=self.initial_concurrency,
+                                            maximum=self.max_concurrency)
+            return self._host_limits[host]
+    #--------------------------------------------------------------------------
+    def _rate_limit_host(self, url):
+        """
+        Method returns the rate_limits key (host, host:port or 
+        scheme://host) matching the url, else None. 
+        """
+        if not self.rate_limits:
+            return None
+        pUrl = urlparse(url)
+        for host in (pUrl.netloc, pUrl.hostname, f'{pUrl.scheme}://{pUrl.netloc}'):
+            if host in self.rate_limits:
+                return host
+        return None
+    #--------------------------------------------------------------------------
+    def _rate_wait(self, url):
+        """
+        Method reserves a request on the rate limit of the url host and 
+        returns the seconds to wait before sending it (0 when the host 
+        is not limited). 
+        """
+        host = self._rate_limit_host(url)
+        if host is None:
+            return 0.0
+        limit = self.rate_limits[host]
+        with self._session_lock:
+            # rebuild the bucket when the configured limit changes
+            config, bucket = self._rate_buckets.get(host, (None, None))
+            if config != limit:
+                rate, burst = limit if isinstance(limit, tuple) else (limit, 1)
+                bucket = _tokenBucket(rate, burst)
+                self._rate_buckets[host] = (limit, bucket)
+        return bucket.reserve()
+    #--------------------------------------------------------------------------
+    def get_concurrency_limits(self):
+        """
+        Method returns a dictionary of the current in-flight request 
+        limit of each host when adaptive_concurrency is enabled. 
+        """
+        with self._session_lock:
+            return {host: int(hc.limit) for host, hc in self._host_limits.items()}
+    #--------------------------------------------------------------------------
     
     def _set_retry(self):
         """
@@ -1153,6 +3548,7 @@ class sessionWrapper(object):
             Default, 10 set by requests.adapters.DEFAULT_POOLSIZE
         self.pool_maxsize : int, optional, *requests.adapters.HTTPAdapter
             The maximum number of connections to save in the pool.
+            The pool grows to track the number of request workers.
             Default, 10 set by requests.adapters.DEFAULT_POOLSIZE 
         self.pool_block : bool, optional, *requests.adapters.HTTPAdapter
             Whether the connection pool should block for connections.
@@ -1163,7 +3559,8 @@ class sessionWrapper(object):
         self._HTTPAdapter = requests.adapters.HTTPAdapter(
                                         max_retries = self._Retry,
                                         pool_connections = self.pool_connections,
-                                        pool_maxsize = self.pool_maxsize,
+                                        pool_maxsize = max(self.pool_maxsize,
+                                                           self._pool_workers),
                                         pool_block = self.pool_block
                                                           )
     #--------------------------------------------------------------------------        
@@ -1210,27 +3607,103 @@ class sessionWrapper(object):
                                         ssl_protocol = self.ssl_protocol
                                                             )
     #--------------------------------------------------------------------------
-    def _set_session(self, url=None):
+    def _size_pool(self, n_workers):
         '''
-        Method updates the default requests session 
-        (self.default_session) using http and/or pkcs12 
-        adapters using custom properties defined in the 
-        sessionWrapper object attributes.
-        
+        Method grows the connection pool to track the number of workers 
+        sending requests through the sessionWrapper.  When the number of 
+        workers exceeds the current pool size, the shared adapters (and 
+        the per-thread sessions mounting them) are rebuilt so connections 
+        are no longer discarded when the pool is full.  The replaced 
+        adapters are closed once every session mounting them is released.
+
+        Attributes/Parameters
+        --------------------- 
+        n_workers : int, required
+            Number of threads/workers sending concurrent requests
+        '''
+        with self._session_lock:
+            if n_workers and n_workers > self._pool_workers:
+                self._pool_workers = n_workers
+                self._session_generation += 1
+    #--------------------------------------------------------------------------
+    def _get_adapters(self):
+        '''
+        Method returns the HTTP and pkcs12 adapters shared by all 
+        per-thread sessions, building them once per session generation 
+        using the sessionWrapper object attributes.
+
+        Returns
+        -------
+        adapters : tuple
+            Tuple of the session generation, HTTPAdapter, 
+            Pkcs12Adapter (None when p12/PFX credentials are not supplied)
+            and the HTTPAdapter without retries mounted for rate limited 
+            hosts
+        '''
+        with self._session_lock:
+            if self._adapter_generation != self._session_generation or \
+                self._HTTPAdapter is None:
+                # retire the replaced adapters, other threads may still be 
+                # sending requests through them
+                replaced = [a for a in (self._HTTPAdapter, self._Pkcs12Adapter,
+                                        self._LimitedAdapter)
+                            if a is not None]
+                if self._generation_sessions.get(self._adapter_generation):
+                    self._retired_adapters[self._adapter_generation] = replaced
+                else:
+                    for adapter in replaced:
+                        adapter.close()
+                # set/update the _HTTPAdapter
+                self._set_http_adapter()
+                # rate limited hosts are retried by the get method, each 
+                # attempt queued behind the rate limit
+                self._LimitedAdapter = requests.adapters.HTTPAdapter(
+                                        max_retries = 0,
+                                        pool_connections = self.pool_connections,
+                                        pool_maxsize = max(self.pool_maxsize,
+                                                           self._pool_workers),
+                                        pool_block = self.pool_block)
+                # if p12/PFX data is supplied, create a pkcs12 adapter        
+                self._Pkcs12Adapter = None
+                if (self.pkcs12_data or self.pkcs12_filename) and \
+                    self.pkcs12_password:
+                    self._set_pkcs12_adapter()
+                self._adapter_generation = self._session_generation
+            return (self._adapter_generation, self._HTTPAdapter, 
+                    self._Pkcs12Adapter, self._LimitedAdapter)
+    #--------------------------------------------------------------------------
+    def _release_generation(self, generation):
+        '''
+        Method releases a session of an adapter generation, closing the 
+        replaced adapters of the generation when its last session is 
+        released.  Called once per session when the session is replaced 
+        or garbage collected.
+
+        Attributes/Parameters
+        --------------------- 
+        generation : int, required
+            Adapter generation of the released session
+        '''
+        with self._session_lock:
+            n_sessions = self._generation_sessions.get(generation, 1) - 1
+            if n_sessions > 0:
+                self._generation_sessions[generation] = n_sessions
+                return
+            self._generation_sessions.pop(generation, None)
+            replaced = self._retired_adapters.pop(generation, [])
+        for adapter in replaced:
+            adapter.close()
+    #--------------------------------------------------------------------------
+    def _new_session(self):
+        '''
+        Method returns a new requests session configured with the 
+        sessionWrapper object attributes and mounting the shared 
+        HTTP and/or pkcs12 adapters.
+
         *See requests.Session for complete documentation
-        
-        requests.Session objects persist cookies, connection-pooling, 
-        request configurations and other parameters across requests 
-        using connection pooling. A a primary benefit, when 
-        multiple requests are made to the same API, the connection 
-        can be reused for more performant request response cycles.  
 
         Attributes/Parameters
         --------------------- 
-        url : str, optional
-            Uniform Resource Locator (URL) string of characters which 
-            identifies a name or a resource on the internet
-        ---------------------    
         self.headers : dict, optional, *requests.Session
             Dictionary of HTTP Headers to send with a request.
             Default, requests.utils.default_headers()
@@ -1274,57 +3747,80 @@ class sessionWrapper(object):
         self.max_redirects : int, optional, *See urllib3.Retry
             How many redirects to perform. Limit this to avoid infinite 
             redirect loops.
-            Default, set to self.max_redirects default of 10      
-        '''        
-        # parse the base url from the url
-        if url:
-            url_base = self._get_base_url(url)
-        
-        # create a general request session
-        self._Session = requests.Session()
-        
-        # set the session attributes based on the class attributes
-        self._Session.headers = self.headers
-        self._Session.cookies = self.cookies
-        self._Session.auth = self.auth
-        self._Session.proxies = self.proxies
-        self._Session.hooks = self.hooks
-        self._Session.params = self.params
-        self._Session.verify = self.verify
-        self._Session.cert = self.cert
-        self._Session.stream = self.stream
-        self._Session.trust_env = self.trust_env
-        self._Session.max_redirects = self.max_redirects        
-        
-        # set/update the _HTTPAdapter
-        self._set_http_adapter()
-        
-        if url: 
-            self._Session.mount(url_base, self._HTTPAdapter)       
-        
-        # if p12/PFX data is supplied, create a pkcs12 adapter        
-        if (self.pkcs12_data or self.pkcs12_filename) and self.pkcs12_password:
-            self._Pkcs12Adapter = self._set_pkcs12_adapter()
-            # mount the pkcs12 adapter
-            self._Session.mount(url_base, self._Pkcs12Adapter)
+            Default, set to self.max_redirects default of 10
+
+        Returns
+        -------
+        session : requests.Session
+            Configured request session
+        '''
+        with self._session_lock:
+            generation, http_adapter, pkcs12_adapter, limited_adapter = \
+                self._get_adapters()
+            self._generation_sessions[generation] = \
+                self._generation_sessions.get(generation, 0) + 1
+        session = requests.Session()
+
+        # set the session attributes based on the class attributes
+        session.headers = requests.structures.CaseInsensitiveDict(self.headers)
+        session.cookies = self.cookies
+        session.auth = self.auth
+        session.proxies = self.proxies
+        session.hooks = self.hooks
+        session.params = self.params
+        session.verify = self.verify
+        session.cert = self.cert
+        session.stream = self.stream
+        session.trust_env = self.trust_env
+        session.max_redirects = self.max_redirects        
+
+        session.mount('http://', http_adapter)
+        session.mount('https://', http_adapter)
+        # mount the pkcs12 adapter on the base url only, the client 
+        # certificate is not presented to other hosts
+        if pkcs12_adapter and self.pkcs12_base_url:
+            session.mount(self.pkcs12_base_url, pkcs12_adapter)
+        session.grale_generation = generation
+        # mounted per rate limited host by the get method
+        session.grale_limited_adapter = limited_adapter
+        # release the generation once, when replaced or garbage collected,
+        # requests.Session.close would close the shared adapters
+        session.grale_release = weakref.finalize(session, 
+                                                 self._release_generation, 
+                                                 generation)
+        return session
     #--------------------------------------------------------------------------
     def _thread_safe_session(self):
         """
         Method returns a thread safe request session. 
         Ambiguity exists around request sessions being 
-        thread safe. The returned session/data should 
-        be thread specific.
+        thread safe, so each thread is given its own session 
+        from a per-thread pool. Sessions are built once per 
+        thread (and rebuilt after a reset or pool resize) and 
+        mount the shared adapters, whose connection pool is 
+        sized to track the number of workers.
         
         Attributes/Parameters
         --------------------- 
-        self._Session : request.Session, Required
-            An initialized request session object
+        self._session_generation : int, Required
+            Generation counter, incremented on session reset or 
+            pool resize to rebuild the per-thread sessions
         """
-        if not hasattr(THREAD_LOCAL,'session'):
-            THREAD_LOCAL.session = self._Session
-        return THREAD_LOCAL.session
+        if not hasattr(THREAD_LOCAL,'sessions'):
+            THREAD_LOCAL.sessions = {}
+        session = THREAD_LOCAL.sessions.get(self._session_key)
+        if session is None or \
+            session.grale_generation != self._session_generation:
+            previous = session
+            session = self._new_session()
+            THREAD_LOCAL.sessions[self._session_key] = session
+            # the stale session mounts the replaced adapters
+            if previous is not None:
+                previous.grale_release()
+        return session
     #--------------------------------------------------------------------------
-    def get(self, url, timeout=None, verify=None, reset_session=False):
+    def get(self, url, timeout=None, verify=None, reset_session=False,
+            headers=None):
         '''
         Method preforms a get request using a thread safe 
         request wrapper session. The request wrapper session 
@@ -1353,8 +3849,13 @@ class sessionWrapper(object):
             may be useful during local development or testing.
             Default, self.verify=True)
         reset_session : bool, optional, 
-            Option to reset/re-create a the request.session object
+            Option to reset/re-create the request.session objects
+            for all threads
             Default, False
+        headers : dict, optional, *requests.get
+            Headers sent with this request in addition to the session
+            headers, Ex. conditional request headers
+            Default, None
         '''            
         
         # if no timeout set, use default (30sec connect and 180sec read)
@@ -1368,24 +3869,299 @@ class sessionWrapper(object):
         if not verify:
             urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning) 
         
-        if not isinstance(self._Session, requests.Session) or reset_session:
-            # initialize a session if none or reset the session
-            self._set_session(url)
-            
-        elif not self._get_base_url(url) in \
-            list(self._Session.__dict__['adapters'].keys()):
-            # mount the new url to the session
-            self._Session.mount(self._get_base_url(url), self._HTTPAdapter)
+        if reset_session:
+            # re-create the sessions and adapters for all threads
+            with self._session_lock:
+                self._session_generation += 1
         
+        # answer repeated requests from the response cache
+        cache = self.response_cache if not headers else None
+        if cache is not None:
+            resp = cache.get(url)
+            if resp is not None:
+                return resp
+            if cache.replay_only:
+                raise requests.exceptions.ConnectionError(
+                                    f'Replay only, response not cached: {url}')
+
+        # the pkcs12 adapter is mounted on the base url of the first url
+        if self.pkcs12_base_url is None and \
+            (self.pkcs12_data or self.pkcs12_filename):
+            with self._session_lock:
+                if self.pkcs12_base_url is None:
+                    self.pkcs12_base_url = self._get_base_url(url)
         # get a thread safe session object
         s = self._thread_safe_session()
-        # get the response object        
-        resp = s.get(
-                     url,
-                     timeout=timeout,
-                     verify=verify
-                     )           
+        # requests to a rate limited host go through the adapter without 
+        # retries and are retried here, so each attempt is queued behind 
+        # the rate limit (as the aget method)
+        limited = self._rate_limit_host(url) is not None
+        prefix = self._get_host(url)
+        if limited:
+            if s.adapters.get(prefix) is not s.grale_limited_adapter:
+                s.mount(prefix, s.grale_limited_adapter)
+        elif s.adapters.get(prefix) is s.grale_limited_adapter:
+            del s.adapters[prefix]
+        retries = (self.max_retries or 0) if limited else 0
+        retry_n = 0
+        rate_wait = 0.0
+        try:
+            while True:
+                # queue the request behind the host rate limit
+                wait = self._rate_wait(url)
+                if wait:
+                    time.sleep(wait)
+                    rate_wait += wait
+                try:
+                    if not self.adaptive_concurrency:
+                        # get the response object        
+                        resp = s.get(
+                                     url,
+                                     timeout=timeout,
+                                     verify=verify,
+                                     headers=headers
+                                     )           
+                    else:
+                        resp = self._adaptive_get(s, url, timeout, verify, headers)
+                except (requests.exceptions.ConnectionError,
+                        requests.exceptions.Timeout):
+                    if retry_n < retries:
+                        retry_n += 1
+                        time.sleep(self._retry_sleep(retry_n))
+                        continue
+                    raise
+                if limited and resp.status_code in (self.status_forcelist or []):
+                    if retry_n < retries:
+                        retry_n += 1
+                        time.sleep(self._retry_sleep(retry_n, resp))
+                        continue
+                    if self.raise_on_status:
+                        raise requests.exceptions.RetryError(
+                                    f'Max retries exceeded with url: {url} '
+                                    f'(too many {resp.status_code} responses)')
+                break
+        except requests.exceptions.RequestException as err:
+            err.grale_rate_wait = rate_wait
+            raise
+        resp.grale_rate_wait = rate_wait
+        if cache is not None:
+            cache.put(url, resp)
         return resp         
+    #--------------------------------------------------------------------------
+    def _adaptive_get(self, s, url, timeout, verify, headers=None):
+        '''
+        Method performs a get request within the AIMD concurrency limit 
+        of the url host, waiting for a request slot and reporting the 
+        outcome (429/503 responses and timeouts) to the limit.
+        '''
+        hc = self._host_concurrency(url)
+        start = hc.acquire()
+        congested = False
+        try:
+            resp = s.get(url, timeout=timeout, verify=verify, headers=headers)
+            congested = _is_congested(resp)
+            return resp
+        except requests.exceptions.Timeout:
+            congested = True
+            raise
+        except requests.exceptions.RetryError as err:
+            congested = bool(re.search(r'too many (429|503) (error )?responses', 
+                                       str(err)))
+            raise
+        finally:
+            hc.release(start, congested)
+    #--------------------------------------------------------------------------
+    def _aclient(self, limit=100):
+        '''
+        Method returns an aiohttp client session configured from the 
+        sessionWrapper object attributes (headers, cookies, auth, 
+        trust_env and .p12/PFX credentials) for use with the aget method. 
+        The client should be used as an asynchronous context manager. 
+        **Note: aiohttp is not a direct dependency of GRALE and must be 
+            installed separately. If aiohttp is not available, a client 
+            placeholder is returned and aget falls back to running get 
+            in the event loop's default executor.
+
+        Parameters
+        --------------------- 
+        limit : int, optional
+            Maximum number of simultaneous connections
+            Default, 100
+        '''
+        try:
+            import aiohttp
+        except ImportError:
+            _print('Warning: aiohttp is not available! '
+                   'Asynchronous requests will run in threads.')
+            return _syncClient()
+
+        auth = None
+        if isinstance(self.auth, tuple):
+            auth = aiohttp.BasicAuth(*self.auth)
+        # if p12/PFX data is supplied, use the pkcs12 ssl context
+        ssl = None
+        pkcs12_adapter = self._get_adapters()[2]
+        if pkcs12_adapter:
+            ssl = pkcs12_adapter.ssl_context
+        elif not self.verify:
+            ssl = False
+        connector = aiohttp.TCPConnector(limit=limit, ssl=ssl)
+        return aiohttp.ClientSession(
+                                     connector=connector,
+                                     headers=dict(self.headers),
+                                     cookies={c.name: c.value 
+                                              for c in self.cookies},
+                                     auth=auth,
+                                     trust_env=self.trust_env
+                                     )
+    #--------------------------------------------------------------------------
+    def _retry_sleep(self, retry_n, resp=None):
+        '''
+        Method returns the seconds to sleep before an asynchronous retry 
+        or a retry to a rate limited host, following the urllib3.Retry 
+        backoff and Retry-After semantics.
+
+        Parameters
+        --------------------- 
+        retry_n : int, required
+            Number of retries performed so far (1 for the first retry)
+        resp : requests.Response, optional
+            Response which triggered the retry
+        '''
+        if resp is not None and self.respect_retry_after_header and \
+            resp.status_code in urllib3.util.Retry.RETRY_AFTER_STATUS_CODES:
+            retry_after = resp.headers.get('Retry-After')
+            if retry_after and retry_after.isdigit():
+                return int(retry_after)
+        if retry_n <= 1 or not self.backoff_factor:
+            return 0
+        backoff_max = getattr(urllib3.util.Retry, 'DEFAULT_BACKOFF_MAX',
+                              getattr(urllib3.util.Retry, 'BACKOFF_MAX', 120))
+        return min(self.backoff_factor * (2 ** (retry_n - 1)), backoff_max)
+    #--------------------------------------------------------------------------
+    async def aget(self, url, timeout=None, verify=None, client=None):
+        '''
+        Method preforms an asynchronous get request through an aiohttp 
+        client session.  The retry (max_retries, status_forcelist, 
+        backoff_factor, Retry-After), timeout and verify semantics of the 
+        get method are honoured and a requests.Response object is 
+        returned.  Errors are raised as requests exceptions so responses
+        are handled the same as the get method.  Each attempt is queued 
+        behind the host rate_limits. 
+        
+        Parameters
+        --------------------- 
+        url : str, required
+            Uniform Resource Locator (URL) string of characters which 
+            identifies a name or a resource on the internet  
+        timeout : int or tuple, optional
+            Details how long (sec) to wait for a client connection 
+            and how long (sec) to wait for a read response.
+            Default, , self.timeout=(30,180)
+        verify : bool or str, optional
+            Option to verify the server's TLS certificate.
+            Default, self.verify=True)
+        client : aiohttp.ClientSession, optional, 
+            Client session returned by the _aclient method, shared between 
+            requests;
+            Default, a client session is opened for the request
+        '''
+        if client is None:
+            async with self._aclient(limit=1) as client:
+                return await self.aget(url, timeout=timeout, 
+                                       verify=verify, client=client)
+        if isinstance(client, _syncClient):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, lambda: self.get(
+                                                            url, 
+                                                            timeout=timeout,
+                                                            verify=verify))
+        # answer repeated requests from the response cache
+        cache = self.response_cache
+        if cache is not None:
+            resp = cache.get(url)
+            if resp is not None:
+                return resp
+            if cache.replay_only:
+                raise requests.exceptions.ConnectionError(
+                                    f'Replay only, response not cached: {url}')
+        import aiohttp
+
+        # if no timeout set, use default (30sec connect and 180sec read)
+        if timeout is None:
+            timeout = self.timeout
+        if isinstance(timeout, tuple):
+            connect_timeout, read_timeout = timeout
+        else:
+            connect_timeout = read_timeout = timeout
+        client_timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout, 
+                                               sock_read=read_timeout)
+        # if no verify set, use default (True)        
+        if verify is None:
+            verify = self.verify
+        ssl = None if verify else False
+
+        retries = self.max_retries or 0
+        retry_n = 0
+        rate_wait = 0.0
+        try:
+            while True:
+                # queue each attempt behind the host rate limit
+                wait = self._rate_wait(url)
+                if wait:
+                    await asyncio.sleep(wait)
+                    rate_wait += wait
+                start = time.perf_counter()
+                try:
+                    async with client.get(url, timeout=client_timeout, ssl=ssl,
+                                          proxy=self.proxies.get(urlparse(url).scheme),
+                                          max_redirects=self.max_redirects or 10,
+                                          ) as r:
+                        content = await r.read()
+                        resp = _build_response(str(r.url), r.status, content, 
+                                               headers=r.headers, 
+                                               elapsed=time.perf_counter() - start,
+                                               reason=r.reason)
+                except asyncio.TimeoutError as err:
+                    if retry_n < retries:
+                        retry_n += 1
+                        await asyncio.sleep(self._retry_sleep(retry_n))
+                        continue
+                    raise requests.exceptions.Timeout(err)
+                except aiohttp.ClientError as err:
+                    if retry_n < retries:
+                        retry_n += 1
+                        await asyncio.sleep(self._retry_sleep(retry_n))
+                        continue
+                    raise requests.exceptions.ConnectionError(err)
+
+                if resp.status_code in (self.status_forcelist or []):
+                    if retry_n < retries:
+                        retry_n += 1
+                        await asyncio.sleep(self._retry_sleep(retry_n, resp))
+                        continue
+                    if self.raise_on_status:
+                        raise requests.exceptions.RetryError(
+                                    f'Max retries exceeded with url: {url} '
+                                    f'(too many {resp.status_code} responses)')
+                resp.grale_rate_wait = rate_wait
+                if cache is not None:
+                    cache.put(url, resp)
+                return resp
+        except requests.exceptions.RequestException as err:
+            err.grale_rate_wait = rate_wait
+            raise
+#------------------------------------------------------------------------------  
+class _syncClient(object):
+    """
+    Placeholder client returned by sessionWrapper._aclient when aiohttp 
+    is not available, signaling sessionWrapper.aget to run the blocking 
+    get method in the event loop's default executor.
+    """
+    async def __aenter__(self):
+        return self
+    async def __aexit__(self, *args):
+        return False
 #------------------------------------------------------------------------------  
 # ESRI REST class with specific methods
 #------------------------------------------------------------------------------ 
@@ -1404,6 +4180,22 @@ class esriRestApi(object):
         # Set default attributes
         #----------------------------------------------------------------------
 
+        # request f=pbf from services supporting protocol buffer queries
+        self.use_pbf = True
+        # number of times chunks which errored or returned fewer features 
+        # than requested are requested again after the first pass
+        self.max_refetch = 2
+        # split re-requested chunks in half (not applied to checkpointed 
+        # downloads, which retry the planned chunk requests as is)
+        self.split_refetch = False
+        # chunk_size='auto' starts with a probe chunk of probe_chunk_size 
+        # records, then sizes chunks to the target response time (seconds)
+        # and optionally the target response size (bytes)
+        self.probe_chunk_size = 100
+        self.target_chunk_seconds = 5
+        self.target_chunk_bytes = None
+        # persistent metadata cache (metadataCache), None disables caching
+        self.metadata_cache = None
         #----------------------------------------------------------------------
         # allow the object to be initialized with kwargs
         self.__dict__.update(kwargs)    
@@ -1449,11 +4241,12 @@ class esriRestApi(object):
         response, status, message = _request_handler(
                                                      prepedUrl, 
                                                      log=log,
-                                                     pid=pid
+                                                     pid=pid,
+                                                     cache=self.metadata_cache
                                                      )
                 
         if not status.startswith('Error:'):
-            json_resp = response.json()
+            json_resp = _response_json(response)
         else:
             json_resp = {'Error': {'status':status, 'message':message}}
             return json_resp
@@ -1499,10 +4292,11 @@ class esriRestApi(object):
         response, status, message = _request_handler(
                                                      prepedUrl, 
                                                      log=log,
-                                                     pid=pid
+                                                     pid=pid,
+                                                     cache=self.metadata_cache
                                                      )      
         if not status.startswith('Error:'):
-            json_resp = response.json()
+            json_resp = _response_json(response)
         else:
             json_resp = {}
 
@@ -1512,14 +4306,104 @@ class esriRestApi(object):
             rec_cnt = 0
         return rec_cnt
     #--------------------------------------------------------------------------
+    def get_wfs_object_ids(self, url, where=None, oid_field=None,
+                           showMessages=False, log=None):
+        """
+        Return the sorted ObjectIDs from an ESRI REST API query.
+
+        This function requests the ObjectIDs (returnIdsOnly) matching a
+        query against an ESRI REST feature service.  When the ID request
+        fails or returns no ID's, the min/max ObjectID statistics are
+        requested instead and the full ID range is returned.
+
+        Parameters
+        ----------
+        url : str, required
+            REST API query (/query) url for the ESRI Feature Service
+        where : str, optional
+            String specifying the selection clause to query a subset of data;
+            Default behavior ('None') selects all data
+        oid_field : str, optional
+            Name of the ObjectID field, required for the statistics fallback;
+            Default behavior uses the 'objectIdFieldName' of the ID response
+        showMessages: Boolean, optional
+            Boolean option to print messages;
+            Default, no messages will be printed to the console
+        log : object, optional
+            grale request logging object (processLog class).
+            If unspecified logging results will persist in grale.GRALE_LOG.log;
+        Returns
+        -------
+        oid_info : tuple
+            Tuple of the ObjectID field name (str), a sorted list of
+            ObjectID's (list) and a boolean that is True when the ID's
+            represent the min/max range from the statistics fallback,
+            (oid_field, oids, is_range).  An empty list is returned when
+            no ID's are available.
+
+        """
+        if not log:
+            log=GRALE_LOG
+
+        headers = {'where': where, 'returnIdsOnly': 'true', 'f': 'json'}
+        prepedUrl = _prep_url(url, headers=headers)
+        pid     = str(uuid.uuid4())
+        response, status, message = _request_handler(
+                                                     prepedUrl,
+                                                     log=log,
+                                                     showMessages=showMessages,
+                                                     pid=pid
+                                                     )
+        json_resp = {}
+        if not status.startswith('Error:'):
+            json_resp = _response_json(response)
+
+        if json_resp.get('objectIdFieldName'):
+            oid_field = json_resp['objectIdFieldName']
+        oids = json_resp.get('objectIds') or []
+        if oids:
+            return oid_field, sorted(oids), False
+        if not oid_field:
+            return oid_field, [], False
+
+        # fall back to the min/max ObjectID statistics
+        stats = [{'statisticType': s,
+                  'onStatisticField': oid_field,
+                  'outStatisticFieldName': f'grale_{s}'}
+                 for s in ('min', 'max')]
+        headers = {'where': where, 'outStatistics': json.dumps(stats),
+                   'f': 'json'}
+        prepedUrl = _prep_url(url, headers=headers)
+        pid     = str(uuid.uuid4())
+        response, status, message = _request_handler(
+                                                     prepedUrl,
+                                                     log=log,
+                                                     showMessages=showMessages,
+                                                     pid=pid
+                                                     )
+        if status.startswith('Error:'):
+            return oid_field, [], False
+        try:
+            attrs = _response_json(response)['features'][0]['attributes']
+            attrs = {k.lower(): v for k, v in attrs.items()}
+            oid_min, oid_max = attrs['grale_min'], attrs['grale_max']
+        except (KeyError, IndexError, TypeError, ValueError):
+            return oid_field, [], False
+        if oid_min is None or oid_max is None:
+            return oid_field, [], False
+        return oid_field, [int(oid_min), int(oid_max)], True
+    #--------------------------------------------------------------------------
     def get_rest_services(self, url, service_types=[], 
-                               dirs=[],showMessages=False, log=None):
+                               dirs=[],showMessages=False, log=None,
+                               max_workers=None):
         """
         Function returns a dictionary of service definitions found on
         a given ESRI REST endpoint.  The function searches for services 
         at the top level directory (services) and also within sub-directories
-        (folders). Once located, a dictionary item is created using the 
-        service URL as the key and the service definition as the value.  
+        (folders), recursively. Once located, a dictionary item is created 
+        using the service URL as the key and the service definition as the 
+        value.  Folder listings and service definitions are requested 
+        concurrently on a bounded thread pool.  
         
         Parameters
         ----------
@@ -1537,7 +4421,8 @@ class esriRestApi(object):
         dirs: list, optional
             List of directories (folders) to search for services within.  
             Ex. ['services', 'airports'] were 'services' is the top level 
-            directory and 'airports' is a sub-folder. 
+            directory and 'airports' is a sub-folder (nested folders of
+            'airports' are included). 
             Default behavior of an empty list returns all services
         showMessages: Boolean, optional
             Boolean option to print messages;
@@ -1545,12 +4430,15 @@ class esriRestApi(object):
         log : object, optional
             grale request logging object (processLog class).
             If unspecified logging results will persist in grale.GRALE_LOG.log;        
+        max_workers : int, optional
+            Number of threads used to issue the requests;
+            Default, min(32, os.cpu_count() + 4)
                  
         Returns
         -------
         svc_defs : dictionary 
             Dictionary where the key is the service URL and the service 
-            definition is the value
+            definition is the value, ordered as listed by the server
         Example
         -------
         >>> url = r'https://some_url/arcgis/rest'
@@ -1570,67 +4458,88 @@ class esriRestApi(object):
         #--------------------------------------------------------------------------
         if not log:
             log=GRALE_LOG
-        pid     = str(uuid.uuid4())    
-        svc_defs = {}
-        prepedUrl = _prep_url(f"{url}/services", headers={'f':'json'})
-
-        response, status, message = _request_handler(prepedUrl, 
-                                                     log=log, 
-                                                     showMessages=showMessages,
-                                                     pid=pid)
-        svcs_root = response.json()
+        if not max_workers:
+            max_workers = min(32, (os.cpu_count() or 1) + 4)
+        GRALE_SESSION._size_pool(max_workers)
         #--------------------------------------------------------------------------
-        # list out all of the paths/dirs containing services
-        root_dirs =[]
-        if (bool(dirs) and 'services' in dirs) or not bool(dirs): 
-            if 'services' in svcs_root.keys():
-                if len(svcs_root['services']) > 0:
-                    root_dirs.append('services')
-        
-        if 'folders' in svcs_root.keys():
-            if bool(dirs):  
-                root_dirs.extend([fldr for fldr in 
-                                  svcs_root['folders'] 
-                                  if fldr in dirs ])
-            else:
-                root_dirs.extend([fldr for fldr in svcs_root['folders']])
+        def _get_json(req_url):
+            """
+            Internal function of get_rest_services requests a folder 
+            listing or service definition, returning None on errors.
+            """
+            pid     = str(uuid.uuid4())
+            prepedUrl = _prep_url(req_url, headers={'f':'json'})
+            response, status, message = _request_handler(prepedUrl, 
+                                                         log=log, 
+                                                         showMessages=showMessages,
+                                                         pid=pid,
+                                                         cache=self.metadata_cache)
+            if response is None:
+                return None
+            try:
+                return _response_json(response)
+            except ValueError:
+                return None
         #--------------------------------------------------------------------------
-        # list out all of the services
-        svcs = {}
-        for rd in root_dirs:
-            pid  = str(uuid.uuid4())
-            if rd == 'services':
-                prepedUrl = _prep_url(f"{url}/services", headers={'f':'json'})
-                response, status, message  = _request_handler(prepedUrl, 
-                                                              log=log, 
-                                                              showMessages=showMessages,
-                                                              pid=pid)            
-            else:
-                prepedUrl = _prep_url(f"{url}/services/{rd}", headers={'f':'json'})
-
-                response, status, message  = _request_handler(prepedUrl, 
-                                                              log=log, 
-                                                              showMessages=showMessages,
-                                                              pid=pid)              
-               
-            svcs[f'{rd}'] = response.json()['services']
+        def _in_dirs(folder):
+            """
+            Internal function of get_rest_services returns True when a 
+            folder (or its top level folder) is in the dirs filter.
+            """
+            return not bool(dirs) or folder in dirs or \
+                folder.split('/')[0] in dirs
         #--------------------------------------------------------------------------
-        # build a dictionary to store the services by url with the service definitions
-        for k,v in svcs.items():
-            for s in v:
-                if bool(service_types):
-                    if s['type'] not in service_types: continue
-                svc_url = (f"{url}/services/{s['name']}/{s['type']}")
-                
-                pid     = str(uuid.uuid4())
-                prepedUrl = _prep_url(svc_url, headers={'f':'JSON'}) 
-                response, status, message  = _request_handler(url=prepedUrl, 
-                                                              log=log, 
-                                                              showMessages=showMessages,
-                                                              pid=pid) 
-                svc_defs[svc_url] = response.json()       
+        # crawl the folders (recursively) and service definitions on a 
+        # bounded pool, folder listings are keyed by folder path ('' root)
+        listings = {}
+        svc_defs = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            in_flight = {executor.submit(_get_json, f"{url}/services"): ('', None)}
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    folder, svc_url = in_flight.pop(future)
+                    result = future.result()
+                    if svc_url is not None:
+                        if result is not None:
+                            svc_defs[svc_url] = result
+                        continue
+                    listing = {'folders': [], 'services': []}
+                    if isinstance(result, dict):
+                        for fldr in result.get('folders') or []:
+                            # folder names are full paths, Ex. 'F1/Sub'
+                            if folder and not fldr.startswith(f'{folder}/'):
+                                fldr = f'{folder}/{fldr}'
+                            if _in_dirs(fldr):
+                                listing['folders'].append(fldr)
+                        # root services are filtered by the 'services' dir
+                        services = result.get('services') or []
+                        if not folder and not _in_dirs('services'):
+                            services = []
+                        for svc in services:
+                            if bool(service_types):
+                                if svc['type'] not in service_types: continue
+                            listing['services'].append(
+                                    f"{url}/services/{svc['name']}/{svc['type']}")
+                    listings[folder] = listing
+                    for fldr in listing['folders']:
+                        if fldr not in listings:
+                            listings[fldr] = None
+                            in_flight[executor.submit(_get_json, 
+                                        f"{url}/services/{fldr}")] = (fldr, None)
+                    for svc_url in listing['services']:
+                        in_flight[executor.submit(_get_json, svc_url)] = (folder, svc_url)
         #--------------------------------------------------------------------------
-        return svc_defs
+        # order the services as listed, root services then each folder
+        ordered = []
+        def _walk(folder):
+            listing = listings.get(folder) or {'folders': [], 'services': []}
+            ordered.extend(listing['services'])
+            for fldr in listing['folders']:
+                _walk(fldr)
+        _walk('')
+        return {svc_url: svc_defs[svc_url] for svc_url in ordered 
+                if svc_url in svc_defs}
     #--------------------------------------------------------------------------
     def get_rest_data_sources(self, service_defs):
         """
@@ -1678,7 +4587,8 @@ class esriRestApi(object):
                     data_sources[f"{url}/{lyr['id']}"] = tbl
         return data_sources
     #--------------------------------------------------------------------------
-    def get_rest_data_source_defs(self, data_sources, showMessages=False, log=None):
+    def get_rest_data_source_defs(self, data_sources, showMessages=False, log=None,
+                                  max_workers=None):
         """
         Function returns a dictionary of data sources with the full data 
         source definition including metadata and data structures. The input 
@@ -1687,7 +4597,9 @@ class esriRestApi(object):
         basic properties of the data source.  The output returned is a deep copy of
         the "data_sources" dictionary with an additional nested key/property 
         "source_definition" containing a dictionary containing the full metadata 
-        and data structure for the given data source. 
+        and data structure for the given data source.  Definitions are 
+        requested concurrently on a bounded thread pool and every request is
+        logged under the ppid of the log object. 
         
         Parameters
         ----------
@@ -1701,6 +4613,9 @@ class esriRestApi(object):
         log : object, optional
             grale request logging object (processLog class).
             If unspecified logging results will persist in grale.GRALE_LOG.log;     
+        max_workers : int, optional
+            Number of threads used to issue the requests;
+            Default, min(32, os.cpu_count() + 4)
                  
         Returns
         -------
@@ -1734,76 +4649,525 @@ class esriRestApi(object):
                  }
             }             
         """        
-        data_src_defs = {k: v for k, v in data_sources.items()}
-        for url, ds_def in data_src_defs.items():
+        if not log:
+            log=GRALE_LOG
+        if not max_workers:
+            max_workers = min(32, (os.cpu_count() or 1) + 4)
+        GRALE_SESSION._size_pool(max_workers)
+        #--------------------------------------------------------------------------
+        def _source_definition(url):
+            """
+            Internal function of get_rest_data_source_defs requests the 
+            definition of a data source.
+            """
             prepedUrl = _prep_url(url, headers={'f':'json'})
             pid     = str(uuid.uuid4())
             response, status, message  = _request_handler(prepedUrl, 
                                                           log=log, 
                                                           showMessages=showMessages,
-                                                          pid=pid)
-            d = {k: v for k, v in ds_def.items()}
-            d['source_definition'] = response.json()                                              
-            data_src_defs[url] = d
+                                                          pid=pid,
+                                                          cache=self.metadata_cache)
+            if response is None:
+                return {'Error': {'status':status, 'message':message}}
+            # Ex. an HTML error page returned by a proxy
+            try:
+                return _response_json(response)
+            except ValueError as err:
+                return {'Error': {'status': status or 'Error: (Unidentified)', 
+                                  'message': f'Invalid JSON response: {err}'}}
+        #--------------------------------------------------------------------------
+        data_src_defs = {k: v for k, v in data_sources.items()}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # map keeps the order of the data sources
+            src_defs = executor.map(_source_definition, list(data_src_defs))
+            for (url, ds_def), src_def in zip(list(data_src_defs.items()), src_defs):
+                d = {k: v for k, v in ds_def.items()}
+                d['source_definition'] = src_def
+                data_src_defs[url] = d
          
         return data_src_defs
     #--------------------------------------------------------------------------  
     def get_wfs_geojsons(self, url, headers={}, chunk_size=None, log=None, 
-                           low_memory=False, max_workers=None):
+                           low_memory=False, max_workers=None,
+                           pagination='offset'):
+        """
+        Function performs a paginated request to an ESRI REST WFS service 
+        and returns the results as a list of geoJSON files or compressed
+        geoJson files along with full feature service metadata nested under 
+        the 'service_metadata' key.  Function determines the total number
+        of records available given the header criteria.  The function then 
+        paginates the results based on the lesser of the chnk_size and the 
+        service maxRecord limit and appends the results to a list of outputs.  
+        When the log parameter is specified, data will also be returned 
+        nested under the 'request_logging' key. The geojson format is often 
+        not enabled, available, or operational on each ESRI feature service 
+        to include those that have M-values. As a result, the function defaults 
+        to requesting a standard ESRI JSON format that is post processed into 
+        geoJSON via grale.esri_to_geojson. To provide the time of request 
+        for each process/subprocess, the UTC timestamp for each request will be 
+        nested under the 'request_metadata' key as the 'grale_utc'.  
+        
+        Parameters
+        ----------
+        url : str, required
+            REST API url for the ESRI Feature Service
+        headers: dictionary, optional
+            Dictionary of request headers;
+            See ESRI REST documentation on WFS API requests for all options;
+            Default behavior requests all records and fields without additional 
+            headers beyond a default output spatial reference (outSR) WKID
+            of '4326'/WGS-84.  See ESRI REST API documentation for a full list 
+            of allowed request headers.
+        chunk_size : int, optional
+            Number of records to return per response, or 'auto' to size
+            the chunks from the observed response time and size (see
+            ESRI.target_chunk_seconds and ESRI.target_chunk_bytes), halving
+            chunks which time out or return a 5xx error;
+            Default behavior follows the REST API "max record" value
+        log : object, optional
+            grale request logging object (processLog class).
+            If unspecified logging results will persist in grale.GRALE_LOG.log; 
+        low_memory : bool, optional
+            Option to compress each return result with the gzip algorithm
+            When set to True, the chunked results are written to gzip files over 
+            retaining the data in memory/RAM. When set to False, the geojson data 
+            is retained in memory/RAM for speed among smaller datasets;
+            Default behavior of False returns a list of uncompressed geojson files        
+        max_workers : int, optional
+            Default python 3.5: 
+                If max_workers is None or not given,
+                it will default to the number of processors on the machine,
+                multiplied by 5. 
+                See https://docs.python.org/3/library/concurrent.futures.html
+            Default python 3.8: 
+                Default value of max_workers is changed to 
+                min(32, os.cpu_count() + 4). This default value preserves at 
+                least 5 workers for I/O bound tasks. It utilizes at most 32 CPU 
+                cores for CPU bound tasks which release the GIL. And it avoids 
+                using very large resources implicitly on many-core machines.
+                See https://docs.python.org/3/library/concurrent.futures.html
+        pagination : str, optional
+            Paging strategy used to chunk the requests;
+            'offset' pages with resultOffset/resultRecordCount.
+            'objectid' requests the ObjectIDs (or the min/max ObjectID
+            statistics) up front and pages with ObjectID range where
+            clauses, keeping each page equally cheap on large layers and
+            supporting services where pagination is not supported;
+            Default, 'offset'
+
+        Returns
+        -------
+        out_geojsons : list
+            out_geojsons:  list of uncompressed or compressed string geojson
+                objects which result from a series of requests against an ESRI
+                REST feature service.     
+        Example
+        -------
+        >>> url="https://website.com/.../ArcGIS/rest/services/Parks/FeatureServer/0"
+        >>> results = grale.esri.get_wfs_download(
+        >>>                         url, 
+                                    headers={'fields' :['STATE', 'CITY'], 
+                                             'where':'COUNTRY=US')
+        """
+        return list(self.iter_wfs_geojsons(url, headers=headers, 
+                                           chunk_size=chunk_size, log=log, 
+                                           low_memory=low_memory, 
+                                           max_workers=max_workers,
+                                           pagination=pagination))
+    #--------------------------------------------------------------------------
+    def iter_wfs_geojsons(self, url, headers={}, chunk_size=None, log=None, 
+                          low_memory=False, max_workers=None,
+                          pagination='offset', window=None):
+        """
+        Generator variant of get_wfs_geojsons which yields each chunk as 
+        soon as its request completes.  At most 'window' chunk requests are 
+        in flight (or completed and waiting to be consumed) at one time, 
+        so downstream loaders can begin writing while later pages are 
+        still downloading and peak memory is bounded by the window rather 
+        than the layer size.  Chunks are yielded in completion order.
+        *See get_wfs_geojsons for complete documentation
+
+        Parameters
+        ----------
+        url : str, required
+            REST API url for the ESRI Feature Service
+        headers: dictionary, optional
+            Dictionary of request headers;
+            See get_wfs_geojsons for more information
+        chunk_size : int, optional
+            Number of records to return per response, or 'auto' to size
+            the chunks from the observed response time and size (see
+            ESRI.target_chunk_seconds and ESRI.target_chunk_bytes), halving
+            chunks which time out or return a 5xx error;
+            Default behavior follows the REST API "max record" value
+        log : object, optional
+            grale request logging object (processLog class).
+            If unspecified logging results will persist in grale.GRALE_LOG.log; 
+        low_memory : bool, optional
+            Option to compress each return result with the gzip algorithm;
+            When set to True, gzip file paths are yielded
+            Default behavior of False yields uncompressed geojson strings        
+        max_workers : int, optional
+            Number of threads used to issue chunk requests;
+            Default, min(32, os.cpu_count() + 4)
+        pagination : str, optional
+            Paging strategy used to chunk the requests, 'offset' or
+            'objectid'.  See get_wfs_geojsons for more information;
+            Default, 'offset'
+        window : int, optional
+            Maximum number of chunks in flight at one time;
+            Default, 2 x max_workers
+
+        Yields 
+        -------
+        geojson : str 
+            Uncompressed geojson string or compressed geojson file path 
+            for each chunk.     
+        Example
+        -------
+        >>> url="https://website.com/.../ArcGIS/rest/services/Parks/FeatureServer/0"
+        >>> for gj in grale.ESRI.iter_wfs_geojsons(url, window=8):
+        >>>     load_chunk(gj)
+        """
+        # if low memory, default to gzip outputs and set the temp directory
+        temp_dir = _make_temp_dir() if low_memory else None
+
+        # store the output compression size
+        uncompSize  = 0
+        compSize    = 0
+        chunks = self._iter_wfs_chunks(url, headers=headers, 
+                                       chunk_size=chunk_size, log=log,
+                                       max_workers=max_workers,
+                                       pagination=pagination, window=window,
+                                       transform=lambda gj: _dump_wfs_chunk(
+                                                                gj, temp_dir))
+        for gj, uncomp, comp in chunks:
+            uncompSize += uncomp
+            compSize += comp
+            yield gj
+
+        if low_memory:
+            _print('Compressed results using gzip from' + \
+                  f'{_bytes_unit_conversion(uncompSize)} to ' + \
+                  f'{_bytes_unit_conversion(compSize)}')
+        _print('-'*79)    
+    #--------------------------------------------------------------------------
+    def _iter_wfs_chunks(self, url, headers={}, chunk_size=None, log=None, 
+                         max_workers=None, pagination='offset', window=None,
+                         transform=None, plan=None, with_headers=False):
+        """
+        Internal generator which plans the chunk requests for an ESRI REST 
+        WFS service, issues them on a thread pool with a bounded number of 
+        chunks in flight, and yields each converted grale geojson 
+        dictionary (or the result of transform) in completion order.
+
+        Parameters
+        ----------
+        url : str, required
+            REST API url for the ESRI Feature Service
+        headers: dictionary, optional
+            Dictionary of request headers;
+            See get_wfs_geojsons for more information
+        chunk_size : int, optional
+            Number of records to return per response, or 'auto' to size
+            the chunks from the observed response time and size (see
+            ESRI.target_chunk_seconds and ESRI.target_chunk_bytes), halving
+            chunks which time out or return a 5xx error;
+            Default behavior follows the REST API "max record" value
+        log : object, optional
+            grale request logging object (processLog class).
+            If unspecified logging results will persist in grale.GRALE_LOG.log; 
+        max_workers : int, optional
+            Number of threads used to issue chunk requests;
+            Default, min(32, os.cpu_count() + 4)
+        pagination : str, optional
+            Paging strategy used to chunk the requests, 'offset' or
+            'objectid'.  See get_wfs_geojsons for more information;
+            Default, 'offset'
+        window : int, optional
+            Maximum number of chunks in flight at one time;
+            Default, 2 x max_workers
+        transform : function, optional
+            Function applied to each grale geojson dictionary within the 
+            worker thread, Ex. serialization;
+            Default, None yields the geojson dictionaries
+        plan : dictionary, optional
+            Request plan returned by _plan_wfs_requests, Ex. with
+            completed requests removed when resuming a download;
+            Default, None plans the requests from the url and headers
+        with_headers : bool, optional
+            Option to yield (chunk request headers, result) tuples;
+            Default, False
+        """
+        if not log:
+            log=GRALE_LOG
+
+        if plan is None:
+            plan = self._plan_wfs_requests(url, headers=headers,
+                                           chunk_size=chunk_size, log=log,
+                                           pagination=pagination)
+        if not plan:
+            return
+        if not max_workers and GRALE_SESSION.adaptive_concurrency:
+            # threads are the ceiling, the per-host limit sets the concurrency
+            max_workers = GRALE_SESSION.max_concurrency
+        if not max_workers:
+            max_workers = min(32, (os.cpu_count() or 1) + 4)
+        if not window:
+            window = max_workers * 2
+        GRALE_SESSION._size_pool(max_workers)
+
+        # store the returned record count
+        rtnRecordCnt = 0
+        # request headers of the chunks held back to be requested again
+        incomplete, still_incomplete = [], 0
+        max_refetch = max(int(self.max_refetch or 0), 0)
+        # splitting would change the chunk keys of checkpointed downloads
+        split_refetch = self.split_refetch and not with_headers
+        # adaptive chunk sizing, resumable downloads keep the planned chunks
+        adaptive = plan.get('adaptive') and not with_headers
+        if adaptive:
+            cursor = plan['cursor'][0]
+            size = max(min(int(self.probe_chunk_size), plan['chunk_size']), 1)
+            ceiling = plan['chunk_size']
+            # False until the probe chunk is sent, None once it returned
+            probing = False
+            requeued = deque()
+        #--------------------------------------------------------------------------
+        def _finish(iheaders, geoJsonDict):
+            """
+            Internal function of _iter_wfs_chunks returns the transformed 
+            geojson data of a chunk.
+            """
+            if transform:
+                geoJsonDict = transform(geoJsonDict)
+            if with_headers:
+                geoJsonDict = (iheaders, geoJsonDict)
+            return geoJsonDict
+        #--------------------------------------------------------------------------
+        def _wfs_request(iheaders, last=False):
+            """
+            Internal function of _iter_wfs_chunks performs a request 
+            to an ESRI REST WFS service and returns the request headers, 
+            the number of features, the request log entry, the geojson 
+            data and True when the data is transformed.  Chunks which may 
+            be requested again (split or re-requested) are not transformed,
+            Ex. no temp file is written for a discarded attempt.
+            """
+            geoJsonDict = self._wfs_chunk_request(plan['queryURL'], iheaders, 
+                                                  plan['metadata'], log=log)
+            n_features = len(geoJsonDict['features'])
+            ld = geoJsonDict['request_logging'][0]
+            if not last and ((adaptive and _is_overload(ld)) or 
+                             (max_refetch and _incomplete(iheaders, n_features, ld))):
+                return iheaders, n_features, ld, geoJsonDict, False
+            return iheaders, n_features, ld, _finish(iheaders, geoJsonDict), True
+        #--------------------------------------------------------------------------
+        def _incomplete(iheaders, n_features, ld):
+            """
+            Internal function of _iter_wfs_chunks returns True when a chunk
+            errored or returned fewer features than requested.
+            """
+            expected = self._expected_features(plan, iheaders)
+            return (str(ld.get('status', '')).startswith('Error') or 
+                    (expected is not None and n_features < expected))
+        #--------------------------------------------------------------------------
+        def _next_request():
+            """
+            Internal function of _iter_wfs_chunks returns the headers of the
+            next chunk request, or None when no request is ready.  Adaptive
+            chunks wait on the probe chunk, then advance the plan cursor by 
+            the current chunk size.
+            """
+            nonlocal cursor, probing
+            if not adaptive:
+                return next(pending, None)
+            if requeued:
+                return requeued.popleft()
+            if probing or cursor >= plan['cursor'][1]:
+                return None
+            iheaders, cursor = self._cursor_request(plan, cursor, size)
+            if probing is False:
+                probing = True
+            return iheaders
+        #--------------------------------------------------------------------------
+        def _resize(iheaders, n_features, ld):
+            """
+            Internal function of _iter_wfs_chunks updates the adaptive chunk
+            size from the response time and size of a chunk, splits chunks
+            which timed out or returned a 5xx error and returns True when the
+            chunk was re-queued.
+            """
+            nonlocal size, ceiling, probing
+            probing = None
+            if _is_overload(ld):
+                # keep later chunks below the size which overloaded the server
+                ceiling = max((self._expected_features(plan, iheaders) or size) // 2, 1)
+                size = min(size, ceiling)
+                split = self._split_wfs_request(plan, iheaders)
+                requeued.extend(split)
+                return bool(split)
+            seconds, n_bytes = _log_measure(ld)
+            if n_features and seconds and not str(ld['status']).startswith('Error'):
+                target = self.target_chunk_seconds * n_features / seconds
+                if self.target_chunk_bytes and n_bytes:
+                    target = min(target, self.target_chunk_bytes * n_features / n_bytes)
+                # grow at most 2x per response, shrink immediately
+                size = int(max(1, min(target, size * 2, ceiling)))
+            return False
+        #--------------------------------------------------------------------------
+        pending = iter(plan['requests'])
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            in_flight = set()
+            while len(in_flight) < window:
+                iheaders = _next_request()
+                if iheaders is None:
+                    break
+                in_flight.add(executor.submit(_wfs_request, iheaders))
+            while in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                results = []
+                for future in done:
+                    chunk = future.result()
+                    if adaptive and _resize(*chunk[:3]):
+                        continue
+                    results.append(chunk)
+                # top up the window before handing results downstream
+                while len(in_flight) < window:
+                    iheaders = _next_request()
+                    if iheaders is None:
+                        break
+                    in_flight.add(executor.submit(_wfs_request, iheaders))
+                for iheaders, n_features, ld, result, final in results:
+                    if max_refetch and _incomplete(iheaders, n_features, ld):
+                        # hold the chunk back to request it again
+                        incomplete.append(iheaders)
+                        continue
+                    rtnRecordCnt += n_features
+                    yield result if final else _finish(iheaders, result)
+                del(results)
+
+            # request the errored and short chunks again, optionally split 
+            # in half, within the same window, the last attempt is returned 
+            # as is
+            for attempt in range(1, max_refetch + 1):
+                if not incomplete:
+                    break
+                _print(f'Re-requesting {len(incomplete)} incomplete chunks '
+                       f'(attempt {attempt} of {max_refetch})')
+                irequests = deque()
+                for iheaders in incomplete:
+                    split = self._split_wfs_request(plan, iheaders) if split_refetch else []
+                    irequests.extend(split or [iheaders])
+                incomplete = []
+                last = attempt == max_refetch
+                in_flight = set()
+                while irequests or in_flight:
+                    while irequests and len(in_flight) < window:
+                        in_flight.add(executor.submit(_wfs_request, 
+                                                      irequests.popleft(), last))
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    results = [future.result() for future in done]
+                    # top up the window before handing results downstream
+                    while irequests and len(in_flight) < window:
+                        in_flight.add(executor.submit(_wfs_request, 
+                                                      irequests.popleft(), last))
+                    for iheaders, n_features, ld, result, final in results:
+                        if _incomplete(iheaders, n_features, ld):
+                            if not last:
+                                incomplete.append(iheaders)
+                                continue
+                            still_incomplete += 1
+                        rtnRecordCnt += n_features
+                        yield result if final else _finish(iheaders, result)
+                    del(results)
+
+        if still_incomplete:
+            _print(f'Warning: {still_incomplete} chunks errored or returned fewer '
+                   'features than requested...See log for more information')
+        _print(f'Returned: {rtnRecordCnt} of {plan["request_size"]} requested features')
+    #--------------------------------------------------------------------------
+    def _wfs_chunk_request(self, queryURL, iheaders, metadata, log=None):
         """
-        Function performs a paginated request to an ESRI REST WFS service 
-        and returns the results as a list of geoJSON files or compressed
-        geoJson files along with full feature service metadata nested under 
-        the 'service_metadata' key.  Function determines the total number
-        of records available given the header criteria.  The function then 
-        paginates the results based on the lesser of the chnk_size and the 
-        service maxRecord limit and appends the results to a list of outputs.  
-        When the log parameter is specified, data will also be returned 
-        nested under the 'request_logging' key. The geojson format is often 
-        not enabled, available, or operational on each ESRI feature service 
-        to include those that have M-values. As a result, the function defaults 
-        to requesting a standard ESRI JSON format that is post processed into 
-        geoJSON via the arcgis2geojson package. To provide the time of request 
-        for each process/subprocess, the UTC timestamp for each request will be 
-        nested under the 'request_metadata' key as the 'grale_utc'.  
+        Internal method performs a single chunk request to an ESRI REST 
+        WFS service and returns the resulting grale geojson dictionary.  
         
+        Parameters
+        ----------
+        queryURL : str, required
+            REST API query url for the ESRI Feature Service
+        iheaders: dictionary, required
+            Dictionary of request headers for the chunk
+        metadata : dictionary, required
+            ESRI service metadata 
+        log : object, optional
+            grale request logging object (processLog class).
+            If unspecified logging results will persist in grale.GRALE_LOG.log; 
+        Returns
+        -------
+        geoJsonDict : dictionary 
+            grale geojson dictionary 
+        """
+        if not log:
+            log=GRALE_LOG
+
+        # get features/records 
+        prepedUrl = _prep_url(queryURL, headers=iheaders)
+        pid     = str(uuid.uuid4())
+        response, status, message = _request_handler(
+                                                     url=prepedUrl, 
+                                                     log=log, 
+                                                     showMessages=True,
+                                                     pid=pid
+                                                     )
+        return _wfs_response_geojson(response, status, iheaders['f'], 
+                                     metadata, log.log[pid])
+    #--------------------------------------------------------------------------
+    async def aget_wfs_geojsons(self, url, headers={}, chunk_size=None, 
+                                log=None, low_memory=False, 
+                                max_concurrency=100, pagination='offset'):
+        """
+        Asynchronous variant of get_wfs_geojsons.  Function performs a 
+        paginated request to an ESRI REST WFS service on an asyncio event 
+        loop and returns the results as a list of geoJSON strings or 
+        compressed geoJSON file paths.  Chunk requests are issued through 
+        sessionWrapper.aget, allowing a single process to keep hundreds of 
+        chunk requests in flight (across many layers when awaited together) 
+        without a thread per request.  Chunk conversion and compression run 
+        on the default executor so the event loop is not blocked.  Retry, 
+        timeout and logging semantics follow get_wfs_geojsons. 
+        *See get_wfs_geojsons for complete documentation
+        **Note: unlike get_wfs_geojsons, the asynchronous variant does not 
+            re-request short or errored chunks (ESRI.max_refetch), resize 
+            'auto' chunks or use adaptive host concurrency 
+            (sessionWrapper.adaptive_concurrency); chunks are requested as 
+            planned and at most max_concurrency requests are in flight.
+
         Parameters
         ----------
         url : str, required
             REST API url for the ESRI Feature Service
         headers: dictionary, optional
             Dictionary of request headers;
-            See ESRI REST documentation on WFS API requests for all options;
-            Default behavior requests all records and fields without additional 
-            headers beyond a default output spatial reference (outSR) WKID
-            of '4326'/WGS-84.  See ESRI REST API documentation for a full list 
-            of allowed request headers.
+            See get_wfs_geojsons for more information
         chunk_size : int, optional
-            Number of records to return per response;
+            Number of records to return per response, 'auto' requests 
+            chunks of the REST API "max record" value without resizing;
             Default behavior follows the REST API "max record" value
         log : object, optional
             grale request logging object (processLog class).
             If unspecified logging results will persist in grale.GRALE_LOG.log; 
         low_memory : bool, optional
-            Option to compress each return result with the gzip algorithm
-            When set to True, the chunked results are written to gzip files over 
-            retaining the data in memory/RAM. When set to False, the geojson data 
-            is retained in memory/RAM for speed among smaller datasets;
+            Option to compress each return result with the gzip algorithm;
             Default behavior of False returns a list of uncompressed geojson files        
-        max_workers : int, optional
-            Default python 3.5: 
-                If max_workers is None or not given,
-                it will default to the number of processors on the machine,
-                multiplied by 5. 
-                See https://docs.python.org/3/library/concurrent.futures.html
-            Default python 3.8: 
-                Default value of max_workers is changed to 
-                min(32, os.cpu_count() + 4). This default value preserves at 
-                least 5 workers for I/O bound tasks. It utilizes at most 32 CPU 
-                cores for CPU bound tasks which release the GIL. And it avoids 
-                using very large resources implicitly on many-core machines.
-                See https://docs.python.org/3/library/concurrent.futures.html
-                              
+        max_concurrency : int, optional
+            Maximum number of chunk requests in flight at one time;
+            Default, 100
+        pagination : str, optional
+            Paging strategy used to chunk the requests, 'offset' or
+            'objectid'.  See get_wfs_geojsons for more information;
+            Default, 'offset'
+
         Returns 
         -------
         out_geojsons : list 
@@ -1812,158 +5176,133 @@ class esriRestApi(object):
                 REST feature service.     
         Example
         -------
+        >>> import asyncio
         >>> url="https://website.com/.../ArcGIS/rest/services/Parks/FeatureServer/0"
-        >>> results = grale.esri.get_wfs_download(
-        >>>                         url, 
-                                    headers={'fields' :['STATE', 'CITY'], 
-                                             'where':'COUNTRY=US')
+        >>> results = asyncio.run(grale.ESRI.aget_wfs_geojsons(url, 
+                                                      max_concurrency=200))
         """
         if not log:
             log=GRALE_LOG
-            
-        # if low memory, default to gzip outputs and set the temp directory
-        temp_dir = None
-        if low_memory:
-            import tempfile
-            temp_dir = os.path.join(tempfile.gettempdir(),
-                                    _validate_file_name(str(uuid.uuid4()))
-                                    )
-            os.mkdir(temp_dir)
-            
-        # store the returned record count
+
+        # metadata and record count requests are issued once, off the loop
+        loop = asyncio.get_running_loop()
+        plan = await loop.run_in_executor(None, lambda: self._plan_wfs_requests(
+                                                        url, headers=headers,
+                                                        chunk_size=chunk_size, 
+                                                        log=log,
+                                                        pagination=pagination))
+        if not plan:
+            return []
+        metadata = plan['metadata']
+        temp_dir = _make_temp_dir() if low_memory else None
+
         rtnRecordCnt = 0
-        # store the output compression size
         uncompSize  = 0
         compSize    = 0
+        out_geojsons = []
+        pending = iter(plan['requests'])
         #--------------------------------------------------------------------------
-        def _wfs_request(queryURL, iheaders):
+        def _convert_chunk(response, status, iheaders, ld):
+            """
+            Internal function of aget_wfs_geojsons converts and serializes 
+            a chunk response on an executor thread, off the event loop.
+            """
+            geoJsonDict = _wfs_response_geojson(response, status, 
+                                                iheaders['f'], metadata, ld)
+            # release the response body before the chunk is serialized
+            del(response)
+            gj, uncomp, comp = _dump_wfs_chunk(geoJsonDict, temp_dir)
+            return gj, uncomp, comp, len(geoJsonDict['features'])
+        #--------------------------------------------------------------------------
+        async def _awfs_worker(client):
+            """
+            Internal coroutine of aget_wfs_geojsons requests the next 
+            pending chunk of an ESRI REST WFS service until none remain and 
+            appends the resulting geojson data to a list named 
+            'out_geojsons'.  One worker runs per concurrent request, so 
+            the number of chunks held in memory is bounded by 
+            max_concurrency rather than the layer size.
             """
-            Internal function of get_wfs_geojsons performs a requests 
-            to an ESRI REST WFS service and appends the resulting geojson 
-            data to a list named 'out_geojsons'.  
-            
-            Parameters
-            ----------
-            queryURL : str, required
-                REST API url for the ESRI Feature Service
-            iheaders: dictionary, required
-                Dictionary of request headers;
-                See ESRI REST documentation on WFS API requests for all options;
-                Default behavior requests all records without parameters
-                     
-            Returns
-            -------
-            iheaders : dictionary 
-                iheaders:  Modified dictionary of request headers;    
-            """        
             nonlocal rtnRecordCnt
             nonlocal uncompSize
             nonlocal compSize
-            nonlocal out_geojsons
-            
-            
-            remaining = total_records - iheaders["resultOffset"]
-            if remaining < chunk_size:
-                iheaders["resultRecordCount"] = remaining
-            else:
-                iheaders["resultRecordCount"] = chunk_size
-            # get features/records 
-            prepedUrl = _prep_url(queryURL, headers=iheaders)
-            pid     = str(uuid.uuid4())
-            response, status, message = _request_handler(
+
+            for iheaders in pending:
+                prepedUrl = _prep_url(plan['queryURL'], headers=iheaders)
+                pid     = str(uuid.uuid4())
+                response, status, message = await _arequest_handler(
                                                          url=prepedUrl, 
                                                          log=log, 
                                                          showMessages=True,
-                                                         pid=pid
+                                                         pid=pid,
+                                                         client=client
                                                          )
-            
-            # check for errors and return empty json with errors
-            if not status.startswith('Error:'):
-                if iheaders['f']  == 'JSON':
-                    # convert ESRI JSON records to a dictionary/sudo geojson 
-                    geoJsonDict = arcgis2geojson(response.json())
-                elif iheaders['f']  == 'geoJSON':
-                    geoJsonDict = response.json()
-            else:
-                geoJsonDict = {'type':'FeatureCollection'}
-
-            # tag the request_metadata with the grale_uuid
-            ld = log.log[pid]
-            metadata['ppid']= ld['ppid']
+                gj, uncomp, comp, n_features = await loop.run_in_executor(
+                                                None, _convert_chunk, response, 
+                                                status, iheaders, log.log[pid])
+                del(response)
+                out_geojsons.append(gj)
+                uncompSize += uncomp
+                compSize += comp
+                rtnRecordCnt += n_features
+                del(gj)
+        #--------------------------------------------------------------------------
+        n_workers = max(1, min(max_concurrency, len(plan['requests'])))
+        async with GRALE_SESSION._aclient(limit=max_concurrency) as client:
+            await asyncio.gather(*[_awfs_worker(client) 
+                                   for _ in range(n_workers)])
 
-            # add the request logging to the geojson feature
-            geoJsonDict['request_logging']  = [ld]
-     
-            # embed WFS metadata within the geojson object        
-            geoJsonDict['request_metadata']  = [metadata] 
+        _print(f'Returned: {rtnRecordCnt} of {plan["request_size"]} requested features')
+        if low_memory:
+            _print('Compressed results using gzip from' + \
+                  f'{_bytes_unit_conversion(uncompSize)} to ' + \
+                  f'{_bytes_unit_conversion(compSize)}')
+        _print('-'*79)    
+        return out_geojsons
+    #--------------------------------------------------------------------------
+    def _plan_wfs_requests(self, url, headers={}, chunk_size=None, log=None,
+                           pagination='offset'):
+        """
+        Internal method of get_wfs_geojsons and aget_wfs_geojsons which 
+        gathers the service metadata and record count for an ESRI REST WFS 
+        service and builds the request headers for each chunk/page.  
 
+        Parameters
+        ----------
+        url : str, required
+            REST API url for the ESRI Feature Service
+        headers: dictionary, optional
+            Dictionary of request headers;
+            See get_wfs_geojsons for more information
+        chunk_size : int, optional
+            Number of records to return per response, or 'auto' to size
+            the chunks from the observed response time and size (see
+            ESRI.target_chunk_seconds and ESRI.target_chunk_bytes), halving
+            chunks which time out or return a 5xx error;
+            Default behavior follows the REST API "max record" value
+        log : object, optional
+            grale request logging object (processLog class).
+            If unspecified logging results will persist in grale.GRALE_LOG.log; 
+        pagination : str, optional
+            Paging strategy used to chunk the requests, 'offset' or
+            'objectid'.  See get_wfs_geojsons for more information;
+            Default, 'offset'
 
-            # add a record level request timestamp attribute      
-            if 'features' in geoJsonDict:
-                for f in geoJsonDict['features']:
-                    f['properties']['grale_utc'] = ld['utc_timestamp']
-                    f['properties']['grale_uuid'] = ld['grale_uuid']
-                    
-            else:
-                 geoJsonDict['features'] = []
+        Returns
+        -------
+        plan : dictionary 
+            Dictionary of the query url ('queryURL'), service metadata 
+            ('metadata'), chunk request headers ('requests'), number of
+            requested records ('request_size'), the chunk size 
+            ('chunk_size') and the adaptive chunking state ('adaptive', 
+            'cursor').  None is returned when there is nothing to request.
+        """
+        if not log:
+            log=GRALE_LOG
 
-            gj = json.dumps(geoJsonDict)
-            
-            # if low memory, write the files to temp files and return the paths
-            if temp_dir:
-                tf = _write_geojson_files(geojsons=[gj], 
-                                          out_dir=temp_dir, 
-                                          low_memory=True)[0]
-                uncompSize += sys.getsizeof(gj)
-                compSize += os.path.getsize(tf)
-                out_geojsons.append(tf)
-            else:
-                # append the results to the output list
-                out_geojsons.append(gj)
-            
-            # add the number of features to rtnRecordCnt
-            rtnRecordCnt +=  len(geoJsonDict['features'])
-            
-            # clean up
-            del(geoJsonDict, gj, response)
-            
-            # return the headers
-            #return iheaders
-        #--------------------------------------------------------------------------
-        def _threaded_wfs_requests(gen_reqests, max_workers=None):
+        # copy the headers so the caller's dictionary is left untouched
+        headers = {k: v for k, v in headers.items()}
 
-            """
-            Internal function of get_wfs_geojsons that enables
-            multi-threading of requests against an ESRI REST WFS service,
-            using the internal '_wfs_request' function. 
-
-            Parameters
-            ----------
-            max_workers : int, optional
-                Default python 3.5: 
-                    If max_workers is None or not given,
-                    it will default to the number of processors on the machine,
-                    multiplied by 5. 
-                    See https://docs.python.org/3/library/concurrent.futures.html
-                Default python 3.8: 
-                    Default value of max_workers is changed to 
-                    min(32, os.cpu_count() + 4). This default value preserves at 
-                    least 5 workers for I/O bound tasks. It utilizes at most 32 CPU 
-                    cores for CPU bound tasks which release the GIL. And it avoids 
-                    using very large resources implicitly on many-core machines.
-                    See https://docs.python.org/3/library/concurrent.futures.html
-            Returns
-            -------
-            iheaders : dictionary 
-                iheaders:  Modified dictionary of request headers;    
-            """              
-            
-            threads= []
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                for r in gen_reqests:
-                    threads.append(executor.submit(_wfs_request, r[0], r[1]))
-                    
-        #-------------------------------------------------------------------------- 
         _print('-'*79)       
         # default behavior matches all features
         if 'where' in headers.keys():
@@ -1975,7 +5314,7 @@ class esriRestApi(object):
         if 'outFields' in headers.keys():
             if headers['outFields'] is None:
                 headers['outFields'] = '*'
-            else:
+            elif not isinstance(headers['outFields'], str):
                 headers['outFields'] = ', '.join(headers['outFields'])
         else:
             headers['outFields'] = '*'      
@@ -1988,12 +5327,18 @@ class esriRestApi(object):
 
         if 'Error' in metadata.keys():
             _print(f'Invalid URL: {url} See status in log for more info!')
-            return []
+            return None
             
-        headers['f'] = 'JSON'
+        # group and raster layers do not list query formats
+        supported_formats = [f.strip().upper() for f in 
+                             (metadata.get('supportedQueryFormats') or '').split(',')]
+        # request protocol buffers when supported, else ESRI JSON
+        if self.use_pbf and 'PBF' in supported_formats:
+            headers['f'] = 'PBF'
+        else:
+            headers['f'] = 'JSON'
         # ensure the requested type is supported
-        if headers['f'] not in [f.strip() for f in 
-                   (metadata['supportedQueryFormats']).split(',')]:
+        if headers['f'].upper() not in supported_formats:
 
             _print(f'{headers["f"]} is not supported on WFS service!')
             _print('Supported formats include: ' +\
@@ -2019,68 +5364,194 @@ class esriRestApi(object):
             headers['resultOffset'] = 0
         result_offset = headers['resultOffset']
         
-        if 'Error' not in metadata:
-            #set the max chunk size
-            if not chunk_size:
-                chunk_size = metadata["maxRecordCount"]
-            else:
-                chunk_size = min([chunk_size, metadata["maxRecordCount"]])    
-        
-            # params for feature/record request(s)
-            if 'outSR' in headers:
-                if headers['outSR'] is None:        
-                    headers['outSR'] = metadata["wkid"]
-            else:
-                 headers['outSR'] = '4326'
+        # adaptive chunks are planned at the max chunk size for consumers
+        # which do not adapt, Ex. aget_wfs_geojsons and resumable downloads
+        adaptive = chunk_size == 'auto'
+        if adaptive:
+            chunk_size = None
+
+        #set the max chunk size
+        if not chunk_size:
+            chunk_size = metadata["maxRecordCount"]
+        else:
+            chunk_size = min([chunk_size, metadata["maxRecordCount"]])    
+    
+        # params for feature/record request(s)
+        if 'outSR' in headers:
+            if headers['outSR'] is None:        
+                headers['outSR'] = metadata["wkid"]
+        else:
+             headers['outSR'] = '4326'
         
-        if total_records > 0: 
-           
-            if result_offset > total_records:
-                _print(f'Warning: resultOffset({result_offset}) is ',
-                    f'greater than available records({total_records})\n',
-                    'Please see logging for more information')
-                return [], metadata
+        if total_records <= 0:
+            _print('No records returned...See log for more information')
+            return None
+        if result_offset > total_records:
+            _print(f'Warning: resultOffset({result_offset}) is '
+                   f'greater than available records({total_records})\n'
+                   'Please see logging for more information')
+            return None
+        request_size = total_records - result_offset
+
+        gen_reqests = []
+        if pagination == 'objectid':
+            # page on ObjectID ranges rather than deep result offsets
+            oid_field = metadata.get('objectIdField')
+            if not oid_field:
+                oid_field = next((f['name'] for f in metadata.get('fields') or []
+                                  if f.get('type') == 'esriFieldTypeOID'), None)
+            oid_field, oids, is_range = self.get_wfs_object_ids(
+                                                    url=queryURL,
+                                                    where=headers['where'],
+                                                    oid_field=oid_field,
+                                                    log=log)
+            if not oids:
+                _print('No ObjectIDs returned...See log for more information')
+                return None
+            if is_range:
+                # statistics fallback, fixed width ranges of ObjectIDs, the
+                # ObjectIDs are unknown so a record offset can not be applied
+                if result_offset:
+                    _print(f'Warning: resultOffset({result_offset}) is not '
+                           'supported when the ObjectIDs are planned from '
+                           'statistics, all matching features are requested')
+                    request_size = total_records
+                cursor = (oids[0], oids[1] + 1)
+                oid_ranges = [(lo, min(lo + chunk_size - 1, oids[1]))
+                              for lo in range(oids[0], oids[1] + 1, chunk_size)]
             else:
-                request_size = total_records - result_offset
-                # determine the number of calls required
-                n_calls = int((request_size) / chunk_size) + \
-                             ((request_size) % chunk_size > 0)
-                _print(f'Pull will require {n_calls} request(s)')
+                oids = oids[result_offset:total_records]
+                request_size = len(oids)
+                cursor = (0, len(oids))
+                oid_ranges = [(oids[i], oids[min(i + chunk_size, len(oids)) - 1])
+                              for i in range(0, len(oids), chunk_size)]
+            for lo, hi in oid_ranges:
+                iheaders = self._oid_range_request(headers, oid_field, lo, hi)
+                gen_reqests.append(iheaders)
         else:
-            _print('No records returned...See log for more information')
-            return [], metadata
-        
-        out_geojsons = []
+            adv_caps = metadata.get('advancedQueryCapabilities') or {}
+            if adv_caps.get('supportsPagination') is False and \
+                request_size > chunk_size:
+                _print('Warning: service does not support pagination, '
+                       "consider pagination='objectid'")
+            cursor = (result_offset, total_records)
+            while result_offset < total_records:
+                iheaders = {k: v for k, v in headers.items()}
+                iheaders['resultOffset'] = result_offset
+                iheaders['resultRecordCount'] = min(chunk_size, 
+                                                    total_records - result_offset)
+                gen_reqests.append(iheaders)
+
+                # add the number of features to the result offset
+                result_offset += chunk_size
+
+        _print(f'Pull will require {len(gen_reqests)} request(s)')
         _print('Requesting: {0} out of {1} total features'.format(
                                                                  request_size,
                                                                  total_records
                                                                  ))
         _print(f'Chunk size set at: {chunk_size} features:\n')
-        
-        gen_reqests = []
-        
-        while result_offset < total_records:
-            iheaders = {k: v for k, v in headers.items()}
-            iheaders['resultOffset'] = result_offset
-            gen_reqests.append((queryURL, iheaders))
-            
-            # add the number of features to the result offset
-            result_offset += chunk_size
-
-        _threaded_wfs_requests(gen_reqests, max_workers=max_workers)
-            
-     
-        _print(f'Returned: {rtnRecordCnt} of {request_size} requested features')
-        if low_memory:
-            _print('Compressed results using gzip from' + \
-                  f'{_bytes_unit_conversion(uncompSize)} to ' + \
-                  f'{_bytes_unit_conversion(compSize)}')
-        _print('-'*79)    
-        return out_geojsons
+        plan = {'queryURL': queryURL, 
+                'metadata': metadata, 
+                'requests': gen_reqests, 
+                'request_size': request_size, 
+                'chunk_size': chunk_size,
+                'headers': headers,
+                'adaptive': adaptive,
+                'cursor': cursor}
+        if pagination == 'objectid':
+            # ObjectIDs are used to size and split re-requested chunks
+            plan.update({'oid_field': oid_field, 
+                         'oids': None if is_range else oids,
+                         'oid_ranges': {h['where']: r for h, r in 
+                                        zip(gen_reqests, oid_ranges)}})
+        return plan
+    #--------------------------------------------------------------------------
+    def _oid_range_request(self, headers, oid_field, lo, hi):
+        """
+        Internal method returns the request headers of an ObjectID range
+        [lo, hi] chunk.
+        """
+        iheaders = {k: v for k, v in headers.items()
+                    if k not in ('resultOffset', 'resultRecordCount')}
+        iheaders['where'] = (f'({headers["where"]}) AND '
+                             f'{oid_field} >= {lo} AND '
+                             f'{oid_field} <= {hi}')
+        return iheaders
+    #--------------------------------------------------------------------------
+    def _cursor_request(self, plan, start, size):
+        """
+        Internal method returns the request headers of an adaptive chunk of 
+        size records (ObjectIDs) from the start position of the plan cursor, 
+        and the next cursor position.
+        """
+        stop = min(start + size, plan['cursor'][1])
+        if plan.get('oid_field'):
+            oids = plan['oids']
+            lo, hi = (oids[start], oids[stop - 1]) if oids else (start, stop - 1)
+            iheaders = self._oid_range_request(plan['headers'], 
+                                               plan['oid_field'], lo, hi)
+            plan['oid_ranges'][iheaders['where']] = (lo, hi)
+        else:
+            iheaders = {k: v for k, v in plan['headers'].items()}
+            iheaders['resultOffset'] = start
+            iheaders['resultRecordCount'] = stop - start
+        return iheaders, stop
+    #--------------------------------------------------------------------------
+    def _expected_features(self, plan, iheaders):
+        """
+        Internal method returns the number of features a chunk request 
+        should return, or None when it is unknown.
+        """
+        if 'resultRecordCount' in iheaders:
+            return int(iheaders['resultRecordCount'])
+        oids = plan.get('oids')
+        oid_range = plan.get('oid_ranges', {}).get(iheaders.get('where'))
+        if oids and oid_range:
+            lo, hi = oid_range
+            return bisect.bisect_right(oids, hi) - bisect.bisect_left(oids, lo)
+        return None
+    #--------------------------------------------------------------------------
+    def _split_wfs_request(self, plan, iheaders):
+        """
+        Internal method splits a chunk request into two half sized chunk
+        requests, returns an empty list when the chunk can not be split.
+        """
+        if 'resultRecordCount' in iheaders:
+            count = int(iheaders['resultRecordCount'])
+            if count < 2:
+                return []
+            offset = int(iheaders.get('resultOffset') or 0)
+            half = count // 2
+            return [{**iheaders, 'resultOffset': offset, 'resultRecordCount': half},
+                    {**iheaders, 'resultOffset': offset + half, 
+                     'resultRecordCount': count - half}]
+        oid_range = plan.get('oid_ranges', {}).get(iheaders.get('where'))
+        if oid_range:
+            lo, hi = oid_range
+            oids = plan.get('oids')
+            if oids:
+                # split on the middle ObjectID of the range
+                ids = oids[bisect.bisect_left(oids, lo):bisect.bisect_right(oids, hi)]
+                if len(ids) < 2:
+                    return []
+                mid = ids[len(ids) // 2 - 1]
+            elif hi > lo:
+                mid = (lo + hi) // 2
+            else:
+                return []
+            split = [self._oid_range_request(plan['headers'], plan['oid_field'], 
+                                             *r) for r in ((lo, mid), (mid + 1, hi))]
+            for h, r in zip(split, ((lo, mid), (mid + 1, hi))):
+                plan['oid_ranges'][h['where']] = r
+            return split
+        return []
     #--------------------------------------------------------------------------
     def get_wfs_download(self, url, out_dir, headers={}, max_workers=None, 
                          chunk_size=None, log=None, low_memory=False, 
-                         cleanup=True): 
+                         cleanup=True, pagination='offset', profile=None,
+                         out_format='geojson', compression=None, 
+                         resume=False): 
         """
         Function executes the get_wfs_geojsons function to perform paginated 
         request against an ESRI REST WFS service returning the results as
@@ -2118,7 +5589,10 @@ class esriRestApi(object):
                 using very large resources implicitly on many-core machines.
                 See https://docs.python.org/3/library/concurrent.futures.html        
         chunk_size : int, optional
-            Number of records to return per response;
+            Number of records to return per response, or 'auto' to size
+            the chunks from the observed response time and size (see
+            ESRI.target_chunk_seconds and ESRI.target_chunk_bytes), halving
+            chunks which time out or return a 5xx error;
             Default behavior follows the REST API "max record" value
         log : object, optional
             grale request logging object (processLog class).
@@ -2127,9 +5601,60 @@ class esriRestApi(object):
             Option to compress each return result with the gzip algorithm;
             Default behavior of False returns a list of uncompressed geojson files        
         cleanup : bool, optional
-            Option to clean up temporary files used during compression/low 
-            memory mode;
-            Default behavior removes the temporary directory and files     
+            Retained for compatibility, geojson files are now written 
+            as each chunk completes without temporary files;
+            Default, True
+        pagination : str, optional
+            Paging strategy used to chunk the requests, 'offset' or
+            'objectid'.  See get_wfs_geojsons for more information;
+            Default, 'offset'
+        profile : outputProfile, optional
+            Output file serialization options (indent, coordinate
+            precision and gzip compression level);
+            Default, None uses grale.GRALE_OUTPUT
+        out_format : str, optional
+            Output file format:
+                'geojson' writes one FeatureCollection file per chunk.
+                'geojsonseq' appends the features of each chunk to a
+                    single RFC 8142 GeoJSON text sequence file 
+                    (.geojsons) as chunks arrive, with the request 
+                    metadata and logging written to a sidecar 
+                    .metadata.json file.  Chunks are not held in 
+                    memory or written to temp files (low_memory and
+                    cleanup do not apply).
+                'parquet' writes a single GeoParquet file with one
+                    row group per chunk, WKB geometry, a bbox 
+                    covering column and a schema typed from the 
+                    layer fields metadata.  Requires the pyarrow 
+                    package.  The request metadata and logging are
+                    stored under the 'grale' file metadata key.
+                'gpkg' writes a single GeoPackage file with one 
+                    feature table typed from the layer fields metadata,
+                    batched inserts per chunk from a dedicated writer
+                    thread and an rtree spatial index built once all
+                    chunks are written.  The request metadata and 
+                    logging are stored in the grale_lineage table.
+            Default, 'geojson'
+        compression : str, optional
+            Compression of the 'geojsonseq' output file, None, 'gzip'
+            or 'zstd' (requires the zstandard package), or the column
+            compression of the 'parquet' output file;
+            Default, None ('snappy' for parquet)
+        resume : bool, optional
+            Option to resume an interrupted 'geojson' download, an error 
+            is returned for the other output formats.  Each 
+            completed chunk is recorded (request range, status, output 
+            path, byte and feature counts) in a JSONL checkpoint file 
+            within out_dir, named after the layer and a hash of the 
+            request.  The checkpoint is removed once every chunk is 
+            complete, so it is only left by failed or interrupted runs.  
+            When True, chunks already completed by a previous run with 
+            the same url, headers, chunk_size and pagination are skipped
+            and only missing or failed chunks are requested.
+            **Note: pagination='objectid' is recommended when resuming 
+                layers that are edited between runs, as offsets shift 
+                when records are added or deleted.
+            Default, False
 
         Returns
         -------
@@ -2155,31 +5680,633 @@ class esriRestApi(object):
         if not os.path.isdir(out_dir):
             _print('Error: Output directory does not exist')
             return {'Error: Output directory does not exist'}
-            
-        results = self.get_wfs_geojsons(url=url, 
-                                    headers=headers, 
-                                    log=log, max_workers=max_workers, 
-                                    chunk_size=chunk_size,
-                                    low_memory=low_memory)
-                                    
-        file_paths = _write_geojson_files(results, 
-                                          out_dir, 
-                                          low_memory=low_memory)
         
-        # clean up temp file directory
-        if len(results) > 2 and cleanup:
-            p_dir = os.path.abspath(os.path.join(results[0], os.pardir))
-            if os.path.isdir(p_dir):
-                try:
-                    rmtree(p_dir)
-                except:
-                    _print('Could not clean up temp file directory!')
+        if out_format not in _OUTPUT_FORMATS:
+            _print(f'Error: Unsupported out_format ({out_format}), '
+                   f'expected one of {", ".join(_OUTPUT_FORMATS)}')
+            return {'Error: Unsupported out_format'}
+        if resume and out_format != 'geojson':
+            _print("Error: resume is only supported for out_format='geojson'")
+            return {'Error: resume is only supported for geojson'}
+
+        if out_format == 'geojsonseq':
+            return self._write_wfs_geojsonseq(url, out_dir, headers=headers, 
+                                              max_workers=max_workers,
+                                              chunk_size=chunk_size, log=log,
+                                              pagination=pagination,
+                                              profile=profile,
+                                              compression=compression)
+        if out_format == 'parquet':
+            return self._write_wfs_parquet(url, out_dir, headers=headers, 
+                                           max_workers=max_workers,
+                                           chunk_size=chunk_size, log=log,
+                                           pagination=pagination,
+                                           compression=compression)
+        if out_format == 'gpkg':
+            return self._write_wfs_gpkg(url, out_dir, headers=headers, 
+                                        max_workers=max_workers,
+                                        chunk_size=chunk_size, log=log,
+                                        pagination=pagination)
+
+        plan = self._plan_wfs_requests(url, headers=headers,
+                                       chunk_size=chunk_size, log=log,
+                                       pagination=pagination)
+        if not plan:
+            return []
+        
+        # per layer/request checkpoint of the completed chunks
+        ckpt_path = _checkpoint_path(out_dir, plan['metadata'], plan['queryURL'],
+                                     headers, plan['chunk_size'], pagination)
+        done = _read_checkpoint(ckpt_path) if resume else {}
+        if not resume and os.path.isfile(ckpt_path):
+            os.remove(ckpt_path)
+        n_requests = len(plan['requests'])
+        plan['requests'] = [h for h in plan['requests'] 
+                            if _checkpoint_key(h)[0] not in done or 
+                            done[_checkpoint_key(h)[0]]['status'] != 'complete' or
+                            not os.path.isfile(done[_checkpoint_key(h)[0]]['path'])]
+        if resume:
+            _print(f'Resuming: {n_requests - len(plan["requests"])} of '
+                   f'{n_requests} chunks already completed')
+        
+        with open(ckpt_path, 'a') as ckpt:
+            for iheaders, geoJsonDict in self._iter_wfs_chunks(
+                                                    url, log=log, 
+                                                    max_workers=max_workers,
+                                                    plan=plan, 
+                                                    with_headers=True):
+                f_path = _write_geojson_files([geoJsonDict], out_dir, 
+                                              low_memory=low_memory,
+                                              profile=profile)[0]
+                key, c_range = _checkpoint_key(iheaders)
+                rl = geoJsonDict['request_logging'][0]
+                status = ('error' if str(rl.get('status', '')).startswith('Error') 
+                          else 'complete')
+                # replace the output of a previously failed attempt
+                prev = done.get(key)
+                if prev and prev['path'] != f_path and os.path.isfile(prev['path']):
+                    os.remove(prev['path'])
+                done[key] = {'key': key, 'range': c_range, 'status': status,
+                             'path': f_path, 'bytes': os.path.getsize(f_path),
+                             'features': len(geoJsonDict['features']),
+                             'utc_timestamp': rl.get('utc_timestamp')}
+                ckpt.write(GRALE_JSON.dumps(done[key]) + '\n')
+                ckpt.flush()
+        
+        file_paths = [r['path'] for r in done.values() if os.path.isfile(r['path'])]
+        failed = sum(r['status'] != 'complete' for r in done.values())
+        if failed:
+            _print(f'Warning: {failed} chunk(s) failed, rerun with resume=True '
+                   f'to request them again.  Checkpoint: {ckpt_path}')
+        else:
+            # the checkpoint is only kept to resume failed or interrupted runs
+            os.remove(ckpt_path)
+        return file_paths
+    #--------------------------------------------------------------------------
+    def bulk_download(self, urls, out_dir, headers={}, max_workers=None, 
+                      chunk_size=None, log=None, low_memory=False, 
+                      pagination='offset', profile=None, scheduling='fair'):
+        """
+        Function downloads many ESRI REST WFS services (Ex. every layer of
+        a server) as chunked geoJSON files, see get_wfs_download.  The 
+        chunks of every layer are planned up front, on the same pool as the
+        chunk requests, and run on one shared, bounded thread pool.  Chunks 
+        are scheduled across layers so small layers are not queued behind 
+        large ones and the pool stays saturated while layers are planned
+        and finish.  Chunks which error or return fewer features than 
+        requested are re-queued up to ESRI.max_refetch times.
+        
+        Parameters
+        ----------
+        urls : list, required
+            List of REST API urls of ESRI Feature Services
+        out_dir : str, required
+            Output location/directory for files to be written        
+        headers: dictionary, optional
+            Dictionary of request headers applied to every layer;
+            See get_wfs_download for more information
+        max_workers : int, optional
+            Number of threads shared by all layers;
+            Default, min(32, os.cpu_count() + 4), or 
+            GRALE_SESSION.max_concurrency with adaptive_concurrency 
+        chunk_size : int, optional
+            Number of records to return per response;
+            Default behavior follows the REST API "max record" value
+        log : object, optional
+            grale request logging object (processLog class).
+            If unspecified logging results will persist in grale.GRALE_LOG.log;       
+        low_memory : bool, optional
+            Option to compress each output file with the gzip algorithm;
+            Default, False
+        pagination : str, optional
+            Paging strategy used to chunk the requests, 'offset' or
+            'objectid'.  See get_wfs_geojsons for more information;
+            Default, 'offset'
+        profile : outputProfile, optional
+            Output file serialization options (indent, coordinate
+            precision and gzip compression level);
+            Default, None uses grale.GRALE_OUTPUT
+        scheduling : str, optional
+            Order in which the chunks of the layers are requested:
+                'fair' takes one chunk from each layer in turn 
+                    (round robin).
+                'smallest' requests the layers with the fewest remaining
+                    chunks first, so small layers complete early.
+            Default, 'fair'
+
+        Returns
+        -------
+        file_paths : dictionary 
+            Dictionary of each url to the list of its output file paths.
+        Example
+        -------
+        >>> sd = grale.ESRI.get_rest_services(url=r'https://some_url/arcgis/rest')
+        >>> ds = grale.ESRI.get_rest_data_sources(sd)
+        >>> files = grale.ESRI.bulk_download(list(ds), out_dir, low_memory=True)
+        """
+        if not log:
+            log=GRALE_LOG
+            
+        if not os.path.isdir(out_dir):
+            _print('Error: Output directory does not exist')
+            return {'Error: Output directory does not exist'}
+        if scheduling not in ('fair', 'smallest'):
+            _print(f"Warning: unknown scheduling '{scheduling}', using 'fair'")
+            scheduling = 'fair'
+        if not max_workers and GRALE_SESSION.adaptive_concurrency:
+            max_workers = GRALE_SESSION.max_concurrency
+        if not max_workers:
+            max_workers = min(32, (os.cpu_count() or 1) + 4)
+        window = max_workers * 2
+        GRALE_SESSION._size_pool(max_workers)
+        max_refetch = max(int(self.max_refetch or 0), 0)
+
+        urls = list(dict.fromkeys(urls))
+        file_paths = {url: [] for url in urls}
+        returned = {url: 0 for url in urls}
+        plans = {}
+        # pending (chunk headers, attempt) per layer
+        scheduler = _chunkScheduler(scheduling)
+        #--------------------------------------------------------------------------
+        def _chunk_request(url, iheaders, attempt):
+            """
+            Internal function of bulk_download requests a chunk and writes 
+            it to out_dir, unless the chunk is incomplete and will be 
+            re-queued.  Returns the headers, attempt, number of features, 
+            re-queue flag and output file path.
+            """
+            plan = plans[url]
+            geoJsonDict = self._wfs_chunk_request(plan['queryURL'], iheaders, 
+                                                  plan['metadata'], log=log)
+            n_features = len(geoJsonDict['features'])
+            expected = self._expected_features(plan, iheaders)
+            incomplete = (str(geoJsonDict['request_logging'][0].get('status', '')
+                              ).startswith('Error') or 
+                          (expected is not None and n_features < expected))
+            if incomplete and attempt < max_refetch:
+                return iheaders, attempt, n_features, True, None
+            f_path = _write_geojson_files([geoJsonDict], out_dir, 
+                                          low_memory=low_memory,
+                                          profile=profile)
+            return iheaders, attempt, n_features, False, (f_path or [None])[0]
+        #--------------------------------------------------------------------------
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # plan every layer up front, chunks are queued as plans complete
+            in_flight = {executor.submit(self._plan_wfs_requests, url, 
+                                         headers=headers, 
+                                         chunk_size=chunk_size, log=log,
+                                         pagination=pagination): (url, None)
+                         for url in urls}
+            n_chunks = 0
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url, kind = in_flight.pop(future)
+                    if kind is None:
+                        # one layer which can not be planned (Ex. a group 
+                        # layer) is reported without stopping the others
+                        try:
+                            plan = future.result()
+                        except Exception as e:
+                            _print(f'{url}\n\t-Error: unable to plan the '
+                                   f'requests ({e!r})')
+                            log.log_message(url, 'Error: (Unidentified)', 
+                                            f'Planning failed: {e!r}', 
+                                            '0(ms)', '0(B)')
+                            continue
+                        if plan:
+                            plans[url] = plan
+                            scheduler.enqueue(url, [(h, 0) for h in plan['requests']])
+                        continue
+                    n_chunks -= 1
+                    iheaders, attempt, n_features, requeue, f_path = future.result()
+                    if requeue:
+                        scheduler.enqueue(url, [(iheaders, attempt + 1)])
+                        continue
+                    returned[url] += n_features
+                    if f_path:
+                        file_paths[url].append(f_path)
+                # top up the window of chunk requests
+                while n_chunks < window:
+                    chunk = scheduler.next()
+                    if chunk is None:
+                        break
+                    in_flight[executor.submit(_chunk_request, *chunk)] = (chunk[0], 'chunk')
+                    n_chunks += 1
+
+        for url in urls:
+            if url in plans:
+                _print(f'{url}\n\t-Returned: {returned[url]} of '
+                       f'{plans[url]["request_size"]} requested features')
+            else:
+                _print(f'{url}\n\t-Error: no requests planned, see log')
         return file_paths
+    #--------------------------------------------------------------------------
+    def _write_wfs_geojsonseq(self, url, out_dir, headers={}, max_workers=None,
+                              chunk_size=None, log=None, pagination='offset',
+                              profile=None, compression=None):
+        """
+        Internal method streams the chunks of an ESRI REST WFS service into 
+        a single RFC 8142 GeoJSON text sequence file as the chunk requests 
+        complete.  Features are serialized in the worker threads and the 
+        file is only written from the calling thread.  The request metadata 
+        and logging for all chunks are written to a sidecar .metadata.json
+        file.  See get_wfs_download for parameter information.
+
+        Returns
+        -------
+        file_paths : list 
+            file_paths:  list containing the GeoJSON text sequence file 
+                         path and the metadata file path.
+        """
+        if profile is None:
+            profile = GRALE_OUTPUT
+        
+        def _transform(geoJsonDict):
+            return (_geojsonseq_bytes(geoJsonDict, profile=profile), 
+                    geoJsonDict['request_metadata'],
+                    geoJsonDict['request_logging'])
+        
+        f_path = out = None
+        out_md = {'request_metadata': [], 'request_logging': []}
+        try:
+            for seq, md, rl in self._iter_wfs_chunks(url, headers=headers, 
+                                                      chunk_size=chunk_size,
+                                                      log=log,
+                                                      max_workers=max_workers,
+                                                      pagination=pagination,
+                                                      transform=_transform):
+                if out is None:
+                    # name the file after the layer and the parent process
+                    m = md[0]
+                    f_name = _validate_file_name('_._'.join(
+                                [str(i) for i in (m.get('name', 'temp'), m.get('id'),
+                                 dt.utcnow().strftime('%Y-%m-%dt%H%M%S'),
+                                 m.get('ppid')) if i is not None]))
+                    base_path = os.path.join(out_dir, f_name)
+                    f_path, out = _open_output_stream(f'{base_path}.geojsons', 
+                                                      compression=compression,
+                                                      compresslevel=profile.compresslevel)
+                    out_md['request_metadata'] = md
+                out.write(seq)
+                out_md['request_logging'].extend(rl)
+        except BaseException:
+            # remove the partial file, a truncated text sequence would 
+            # otherwise look like a complete download
+            if out is not None:
+                out.close()
+                out = None
+                os.remove(f_path)
+            raise
+        finally:
+            if out is not None:
+                out.close()
+        if f_path is None:
+            return []
+        
+        md_path = _get_file_name_seq_path(f'{base_path}.metadata.json')
+        with open(md_path, 'w') as mdf:
+            mdf.write(profile.dumps(out_md))
+        _print(f'\t-Output GeoJSON text sequence to:  {f_path}')
+        return [f_path, md_path]
+    #--------------------------------------------------------------------------
+    def _write_wfs_parquet(self, url, out_dir, headers={}, max_workers=None,
+                           chunk_size=None, log=None, pagination='offset',
+                           compression=None):
+        """
+        Internal method streams the chunks of an ESRI REST WFS service into 
+        a single GeoParquet (v1.1) file as the chunk requests complete, 
+        writing each chunk as one row group so memory is bounded by the 
+        chunks in flight.  Chunks are converted to arrow tables in the 
+        worker threads and the file is only written from the calling thread.
+        A per row bbox covering column provides row group statistics for 
+        predicate pushdown.  See get_wfs_download for parameter information.
+        **Note: pyarrow is not a direct dependency of GRALE and must be 
+            installed separately.
+
+        Returns
+        -------
+        file_paths : list 
+            file_paths:  list containing the GeoParquet file path.
+        """
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            _print('Error: pyarrow is not available! '
+                   'Please install pyarrow to write GeoParquet files.')
+            return []
+
+        def _transform(geoJsonDict):
+            md = geoJsonDict['request_metadata']
+            rl = geoJsonDict['request_logging']
+            params = (rl[0].get('parameters') or {}) if rl else {}
+            out_fields = (params.get('outFields') or ['*'])[0]
+            table, bbox = _geojson_to_arrow(geoJsonDict, 
+                                            _arrow_schema(md[0], out_fields))
+            g_types = {_geoparquet_type(f['geometry']) 
+                       for f in geoJsonDict['features'] if f.get('geometry')}
+            return table, bbox, g_types, md, rl, params.get('outSR')
+
+        f_path = writer = None
+        geo = {'version': '1.1.0', 'primary_column': 'geometry', 'columns': {}}
+        out_md = {'request_metadata': [], 'request_logging': []}
+        bbox = None
+        g_types = set()
+        try:
+            for table, c_bbox, c_types, md, rl, out_sr in self._iter_wfs_chunks(
+                                                    url, headers=headers, 
+                                                    chunk_size=chunk_size,
+                                                    log=log,
+                                                    max_workers=max_workers,
+                                                    pagination=pagination,
+                                                    transform=_transform):
+                if writer is None:
+                    m = md[0]
+                    f_name = _validate_file_name('_._'.join(
+                                [str(i) for i in (m.get('name', 'temp'), m.get('id'),
+                                 dt.utcnow().strftime('%Y-%m-%dt%H%M%S'),
+                                 m.get('ppid')) if i is not None]))
+                    f_path = _get_file_name_seq_path(
+                                        os.path.join(out_dir, f'{f_name}.parquet'))
+                    geo['columns']['geometry'] = {
+                        'encoding': 'WKB',
+                        'geometry_types': [],
+                        'covering': {'bbox': {k: ['bbox', k] for k in 
+                                              ('xmin', 'ymin', 'xmax', 'ymax')}},
+                        **_geoparquet_crs((out_sr or [None])[0])
+                        }
+                    writer = pq.ParquetWriter(f_path, table.schema,
+                                              compression=compression or 'snappy')
+                    out_md['request_metadata'] = md
+                if table.num_rows:
+                    writer.write_table(table, row_group_size=table.num_rows)
+                out_md['request_logging'].extend(rl)
+                g_types.update(c_types)
+                if c_bbox:
+                    bbox = c_bbox if bbox is None else [
+                                min(bbox[0], c_bbox[0]), min(bbox[1], c_bbox[1]),
+                                max(bbox[2], c_bbox[2]), max(bbox[3], c_bbox[3])]
+        except BaseException:
+            # remove the partial file, a truncated GeoParquet file would 
+            # otherwise look like a complete download
+            if writer is not None:
+                writer.close()
+                os.remove(f_path)
+            raise
+        if f_path is None:
+            return []
+        # the file bbox, geometry types and logging are known once all 
+        # chunks are written
+        geo['columns']['geometry']['geometry_types'] = sorted(g_types)
+        if bbox:
+            geo['columns']['geometry']['bbox'] = bbox
+        writer.add_key_value_metadata({'geo': GRALE_JSON.dumps(geo),
+                                       'grale': GRALE_JSON.dumps(out_md)})
+        writer.close()
+        _print(f'\t-Output GeoParquet to:  {f_path}')
+        return [f_path]
+    #--------------------------------------------------------------------------
+    def _write_wfs_gpkg(self, url, out_dir, headers={}, max_workers=None,
+                        chunk_size=None, log=None, pagination='offset'):
+        """
+        Internal method streams the chunks of an ESRI REST WFS service into 
+        a single GeoPackage file.  Chunks are converted to insert rows in the 
+        request threads and handed through a bounded queue to one writer 
+        thread, which owns the sqlite3 connection, so the request threads 
+        never wait on disk.  See get_wfs_download for parameter information.
+
+        Returns
+        -------
+        file_paths : list 
+            file_paths:  list containing the GeoPackage file path.
+        """
+        def _transform(geoJsonDict):
+            md = geoJsonDict['request_metadata']
+            rl = geoJsonDict['request_logging']
+            params = (rl[0].get('parameters') or {}) if rl else {}
+            fields = _output_fields(md[0], (params.get('outFields') or ['*'])[0])
+            srs = _gpkg_srs((params.get('outSR') or [None])[0])
+            rows, boxes, g_types = _gpkg_rows(geoJsonDict, fields, srs[0])
+            return rows, boxes, g_types, fields, srs, md, rl
+
+        chunks = queue.Queue(maxsize=max_workers or 8)
+        state = {'f_path': None, 'error': None, 'aborted': False}
+        #--------------------------------------------------------------------------
+        def _writer():
+            """
+            Internal function of _write_wfs_gpkg consumes converted chunks 
+            from the queue and writes them to the GeoPackage.
+            """
+            writer = None
+            lineage = {'request_metadata': [], 'request_logging': []}
+            try:
+                while True:
+                    item = chunks.get()
+                    if item is None:
+                        break
+                    rows, boxes, g_types, fields, srs, md, rl = item
+                    if writer is None:
+                        m = md[0]
+                        f_name = _validate_file_name('_._'.join(
+                                    [str(i) for i in (m.get('name', 'temp'), m.get('id'),
+                                     dt.utcnow().strftime('%Y-%m-%dt%H%M%S'),
+                                     m.get('ppid')) if i is not None]))
+                        state['f_path'] = _get_file_name_seq_path(
+                                        os.path.join(out_dir, f'{f_name}.gpkg'))
+                        writer = _geoPackageWriter(state['f_path'], m, fields, srs)
+                        lineage['request_metadata'] = md
+                    writer.write(rows, boxes, g_types)
+                    lineage['request_logging'].extend(rl)
+            except Exception as e:
+                state['error'] = e
+                # keep draining so the request loop is not blocked
+                while chunks.get() is not None:
+                    pass
+            finally:
+                if state['error'] is None and not state['aborted']:
+                    if writer is not None:
+                        writer.close(lineage)
+                # a partial GeoPackage would otherwise look complete
+                elif writer is not None:
+                    writer.abort()
+                elif state['f_path'] and os.path.isfile(state['f_path']):
+                    os.remove(state['f_path'])
+        #--------------------------------------------------------------------------
+        writer_thread = threading.Thread(target=_writer, daemon=True)
+        writer_thread.start()
+        try:
+            for item in self._iter_wfs_chunks(url, headers=headers, 
+                                              chunk_size=chunk_size,
+                                              log=log,
+                                              max_workers=max_workers,
+                                              pagination=pagination,
+                                              transform=_transform):
+                chunks.put(item)
+        except BaseException:
+            # the request loop failed, the partial file is removed
+            state['aborted'] = True
+            raise
+        finally:
+            chunks.put(None)
+            writer_thread.join()
+        if state['error'] is not None:
+            _print(f'Error: GeoPackage write failed ({state["error"]}), '
+                   'the partial file was removed')
+            return []
+        if state['f_path'] is None:
+            return []
+        _print(f'\t-Output GeoPackage to:  {state["f_path"]}')
+        return [state['f_path']]
 #------------------------------------------------------------------------------  
 #------------------------------------------------------------------------------
 # global vars
 THREAD_LOCAL    = threading.local()
-MESSAGE_LOCK    = threading.Lock()
+_ESRI_CURVE_KEYS = ('curveRings', 'curvePaths', 'a', 'b', 'c')
+# get_wfs_download out_format values
+_OUTPUT_FORMATS = ('geojson', 'geojsonseq', 'parquet', 'gpkg')
+# rings of at most this many vertices are tested without numpy arrays
+_SMALL_RING_SIZE = 32
+_ESRI_PBF_GEOMETRY_TYPES = {0: 'esriGeometryPoint', 
+                            1: 'esriGeometryMultipoint',
+                            2: 'esriGeometryPolyline', 
+                            3: 'esriGeometryPolygon',
+                            4: 'esriGeometryMultipatch'}
+_ESRI_PBF_FIELD_TYPES = {0: 'esriFieldTypeSmallInteger', 
+                         1: 'esriFieldTypeInteger',
+                         2: 'esriFieldTypeSingle', 
+                         3: 'esriFieldTypeDouble',
+                         4: 'esriFieldTypeString', 
+                         5: 'esriFieldTypeDate',
+                         6: 'esriFieldTypeOID', 
+                         7: 'esriFieldTypeGeometry',
+                         8: 'esriFieldTypeBlob', 
+                         9: 'esriFieldTypeRaster',
+                         10: 'esriFieldTypeGUID', 
+                         11: 'esriFieldTypeGlobalID',
+                         12: 'esriFieldTypeXML'}
+_ESRI_FIELD_DTYPES = {'esriFieldTypeSmallInteger': 'Int16',
+                      'esriFieldTypeInteger': 'Int32',
+                      'esriFieldTypeBigInteger': 'Int64',
+                      'esriFieldTypeOID': 'Int64',
+                      'esriFieldTypeSingle': 'float32',
+                      'esriFieldTypeDouble': 'float64'}
+_ESRI_FIELD_ARROW_TYPES = {'esriFieldTypeSmallInteger': 'int16',
+                           'esriFieldTypeInteger': 'int32',
+                           'esriFieldTypeBigInteger': 'int64',
+                           'esriFieldTypeOID': 'int64',
+                           'esriFieldTypeSingle': 'float32',
+                           'esriFieldTypeDouble': 'float64'}
+_ESRI_FIELD_SQL_TYPES = {'esriFieldTypeSmallInteger': 'SMALLINT',
+                         'esriFieldTypeInteger': 'MEDIUMINT',
+                         'esriFieldTypeBigInteger': 'INTEGER',
+                         'esriFieldTypeOID': 'INTEGER',
+                         'esriFieldTypeSingle': 'FLOAT',
+                         'esriFieldTypeDouble': 'DOUBLE',
+                         'esriFieldTypeDate': 'DATETIME'}
+_GPKG_WGS84_WKT = ('GEOGCS["WGS 84",DATUM["WGS_1984",SPHEROID["WGS 84",'
+                   '6378137,298.257223563,AUTHORITY["EPSG","7030"]],'
+                   'AUTHORITY["EPSG","6326"]],PRIMEM["Greenwich",0,'
+                   'AUTHORITY["EPSG","8901"]],UNIT["degree",0.0174532925199433,'
+                   'AUTHORITY["EPSG","9122"]],AXIS["Latitude",NORTH],'
+                   'AXIS["Longitude",EAST],AUTHORITY["EPSG","4326"]]')
+_GPKG_SCHEMA_SQL = '''
+CREATE TABLE gpkg_spatial_ref_sys (
+    srs_name TEXT NOT NULL, 
+    srs_id INTEGER NOT NULL PRIMARY KEY, 
+    organization TEXT NOT NULL, 
+    organization_coordsys_id INTEGER NOT NULL, 
+    definition TEXT NOT NULL, 
+    description TEXT);
+CREATE TABLE gpkg_contents (
+    table_name TEXT NOT NULL PRIMARY KEY, 
+    data_type TEXT NOT NULL, 
+    identifier TEXT UNIQUE, 
+    description TEXT DEFAULT '', 
+    last_change DATETIME NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ','now')), 
+    min_x DOUBLE, min_y DOUBLE, max_x DOUBLE, max_y DOUBLE, 
+    srs_id INTEGER, 
+    CONSTRAINT fk_gc_r_srs_id FOREIGN KEY (srs_id) 
+        REFERENCES gpkg_spatial_ref_sys(srs_id));
+CREATE TABLE gpkg_geometry_columns (
+    table_name TEXT NOT NULL, 
+    column_name TEXT NOT NULL, 
+    geometry_type_name TEXT NOT NULL, 
+    srs_id INTEGER NOT NULL, 
+    z TINYINT NOT NULL, 
+    m TINYINT NOT NULL, 
+    CONSTRAINT pk_geom_cols PRIMARY KEY (table_name, column_name), 
+    CONSTRAINT uk_gc_table_name UNIQUE (table_name), 
+    CONSTRAINT fk_gc_tn FOREIGN KEY (table_name) 
+        REFERENCES gpkg_contents(table_name), 
+    CONSTRAINT fk_gc_srs FOREIGN KEY (srs_id) 
+        REFERENCES gpkg_spatial_ref_sys (srs_id));
+CREATE TABLE gpkg_extensions (
+    table_name TEXT, 
+    column_name TEXT, 
+    extension_name TEXT NOT NULL, 
+    definition TEXT NOT NULL, 
+    scope TEXT NOT NULL, 
+    CONSTRAINT ge_tce UNIQUE (table_name, column_name, extension_name));
+'''
+_GPKG_RTREE_TRIGGERS_SQL = '''
+CREATE TRIGGER "rtree_{t}_{c}_insert" AFTER INSERT ON "{t}"
+WHEN (new."{c}" NOT NULL AND NOT ST_IsEmpty(NEW."{c}"))
+BEGIN
+  INSERT OR REPLACE INTO "rtree_{t}_{c}" VALUES (NEW."{i}",
+    ST_MinX(NEW."{c}"), ST_MaxX(NEW."{c}"), ST_MinY(NEW."{c}"), ST_MaxY(NEW."{c}"));
+END;
+CREATE TRIGGER "rtree_{t}_{c}_update1" AFTER UPDATE OF "{c}" ON "{t}"
+WHEN OLD."{i}" = NEW."{i}" AND (NEW."{c}" NOTNULL AND NOT ST_IsEmpty(NEW."{c}"))
+BEGIN
+  INSERT OR REPLACE INTO "rtree_{t}_{c}" VALUES (NEW."{i}",
+    ST_MinX(NEW."{c}"), ST_MaxX(NEW."{c}"), ST_MinY(NEW."{c}"), ST_MaxY(NEW."{c}"));
+END;
+CREATE TRIGGER "rtree_{t}_{c}_update2" AFTER UPDATE OF "{c}" ON "{t}"
+WHEN OLD."{i}" = NEW."{i}" AND (NEW."{c}" ISNULL OR ST_IsEmpty(NEW."{c}"))
+BEGIN
+  DELETE FROM "rtree_{t}_{c}" WHERE id = OLD."{i}";
+END;
+CREATE TRIGGER "rtree_{t}_{c}_update3" AFTER UPDATE ON "{t}"
+WHEN OLD."{i}" != NEW."{i}" AND (NEW."{c}" NOTNULL AND NOT ST_IsEmpty(NEW."{c}"))
+BEGIN
+  DELETE FROM "rtree_{t}_{c}" WHERE id = OLD."{i}";
+  INSERT OR REPLACE INTO "rtree_{t}_{c}" VALUES (NEW."{i}",
+    ST_MinX(NEW."{c}"), ST_MaxX(NEW."{c}"), ST_MinY(NEW."{c}"), ST_MaxY(NEW."{c}"));
+END;
+CREATE TRIGGER "rtree_{t}_{c}_update4" AFTER UPDATE ON "{t}"
+WHEN OLD."{i}" != NEW."{i}" AND (NEW."{c}" ISNULL OR ST_IsEmpty(NEW."{c}"))
+BEGIN
+  DELETE FROM "rtree_{t}_{c}" WHERE id IN (OLD."{i}", NEW."{i}");
+END;
+CREATE TRIGGER "rtree_{t}_{c}_delete" AFTER DELETE ON "{t}"
+WHEN old."{c}" NOT NULL
+BEGIN
+  DELETE FROM "rtree_{t}_{c}" WHERE id = OLD."{i}";
+END;
+'''
+MESSAGE_LOCK   = threading.Lock()
+GRALE_JSON      = jsonCodec()
+GRALE_OUTPUT    = outputProfile()
 GRALE_SESSION   = sessionWrapper()
 GRALE_LOG       = graleReqestLog()
 ESRI            = esriRestApi()
@@ -0,0 +1,114 @@
+import json
+import os
+import sys
+from urllib.parse import urlparse, parse_qsl
+
+import pytest
+
+# test the module in the source tree without installing the package
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, 'src'))
+
+import grale
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           'fixtures', 'pbf')
+#------------------------------------------------------------------------------
+class FakeService(object):
+    """
+    Offline ESRI feature service answering grale requests from a recorded
+    f=json fixture, pages follow resultOffset/resultRecordCount or the
+    ObjectID range of the where clause.  Set fail to a function of the
+    query parameters returning a (status_code, body) tuple to fail chunks
+    and elapsed to the response time (seconds) of the query responses.
+    """
+    url = 'https://example.com/arcgis/rest/services/Test/FeatureServer/0'
+
+    def __init__(self, name, max_record_count=2):
+        with open(os.path.join(FIXTURE_DIR, f'{name}.json'), 'rb') as f:
+            self.esri_json = json.loads(f.read())
+        self.features = self.esri_json['features']
+        self.oid_field = self.esri_json['objectIdFieldName']
+        self.metadata = {'name': name, 'id': 0,
+                         'fields': self.esri_json['fields'],
+                         'objectIdField': self.oid_field,
+                         'geometryType': self.esri_json['geometryType'],
+                         'maxRecordCount': max_record_count,
+                         'supportedQueryFormats': 'JSON',
+                         'wkid': 4326}
+        self.requests = []
+        self.urls = []
+        self.fail = None
+        self.elapsed = 0
+
+    def get_service_metadata(self, url, meta_props=None, showMessages=False,
+                             log=None):
+        return dict(self.metadata)
+
+    def get_wfs_record_count(self, url, where=None, showMessages=False,
+                             log=None):
+        return len(self.features)
+
+    def get_wfs_object_ids(self, url, where=None, oid_field=None,
+                           showMessages=False, log=None):
+        return (self.oid_field, 
+                sorted(f['attributes'][self.oid_field] for f in self.features),
+                False)
+
+    def get(self, url, timeout=None, verify=None, reset_session=False,
+            headers=None):
+        params = dict(parse_qsl(urlparse(url).query))
+        self.requests.append(params)
+        self.urls.append(url)
+        if self.fail:
+            failure = self.fail(params)
+            if failure:
+                status_code, body = failure
+                return grale._build_response(url, status_code, body)
+        feats = self.features
+        if 'resultRecordCount' in params:
+            start = int(params.get('resultOffset') or 0)
+            feats = feats[start:start + int(params['resultRecordCount'])]
+        elif f' AND {self.oid_field} >= ' in params.get('where', ''):
+            bounds = params['where'].split(f' AND {self.oid_field} ')[1:]
+            lo, hi = [int(b.split('=')[1]) for b in bounds]
+            feats = [f for f in feats
+                     if lo <= f['attributes'][self.oid_field] <= hi]
+        body = {**self.esri_json, 'features': feats}
+        return grale._build_response(url, 200, json.dumps(body).encode(),
+                                     {'Content-Type': 'application/json'},
+                                     elapsed=self.elapsed)
+#------------------------------------------------------------------------------
+@pytest.fixture
+def fake_service(monkeypatch):
+    """
+    Factory fixture patching grale.ESRI and grale.GRALE_SESSION to answer
+    requests from a FakeService built on the named fixture.
+    """
+    def _fake_service(name='points_upper_left', max_record_count=2):
+        service = FakeService(name, max_record_count)
+        for attr in ('get_service_metadata', 'get_wfs_record_count',
+                     'get_wfs_object_ids'):
+            monkeypatch.setattr(grale.ESRI, attr, getattr(service, attr))
+        monkeypatch.setattr(grale.GRALE_SESSION, 'get', service.get)
+        monkeypatch.setattr(grale.GRALE_SESSION, 'response_cache', None)
+        return service
+    return _fake_service
+#------------------------------------------------------------------------------
+class _Clock(object):
+    """
+    Manual time.monotonic replacement, advanced by setting now.
+    """
+    def __init__(self):
+        self.now = 100.0
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    """
+    Fixture patching time.monotonic (as used by grale) with a manual clock.
+    """
+    clock = _Clock()
+    monkeypatch.setattr(grale.time, 'monotonic', clock)
+    return clock
@@ -0,0 +1,284 @@
+"""
+Builds the f=json / f=pbf query response fixture pairs used by
+test_pbf.py.  Each f=json response is encoded to the esriPBuffer
+FeatureCollection message (FeatureCollection.proto, ArcGIS REST API)
+with the response transform, quantizing and delta-encoding the
+geometry coordinates the same way ArcGIS Server does.  Run from the
+repository root to regenerate the fixtures:
+
+    python tests/fixtures/make_pbf_fixtures.py
+"""
+import json
+import os
+import struct
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pbf')
+
+FIELD_TYPES = {'esriFieldTypeSmallInteger': 0, 'esriFieldTypeInteger': 1,
+               'esriFieldTypeSingle': 2, 'esriFieldTypeDouble': 3,
+               'esriFieldTypeString': 4, 'esriFieldTypeDate': 5,
+               'esriFieldTypeOID': 6, 'esriFieldTypeGUID': 10,
+               'esriFieldTypeGlobalID': 11}
+GEOMETRY_TYPES = {'esriGeometryPoint': 0, 'esriGeometryMultipoint': 1,
+                  'esriGeometryPolyline': 2, 'esriGeometryPolygon': 3}
+# esriPBuffer Value message field numbers
+VALUE_FIELDS = {'string': 1, 'float': 2, 'double': 3, 'sint': 4, 'uint': 5,
+                'int64': 6, 'uint64': 7, 'sint64': 8, 'bool': 9}
+#------------------------------------------------------------------------------
+def _varint(n):
+    if n < 0:
+        n += 1 << 64
+    out = bytearray()
+    while True:
+        b = n & 0x7F
+        n >>= 7
+        if n:
+            out.append(b | 0x80)
+        else:
+            out.append(b)
+            return bytes(out)
+def _zigzag(n):
+    return (n << 1) ^ (n >> 63)
+def _key(field, wire_type):
+    return _varint((field << 3) | wire_type)
+def _ld(field, buf):
+    return _key(field, 2) + _varint(len(buf)) + buf
+def _vi(field, n):
+    return _key(field, 0) + _varint(n)
+def _double(field, x):
+    return _key(field, 1) + struct.pack('<d', x)
+def _float(field, x):
+    return _key(field, 5) + struct.pack('<f', x)
+#------------------------------------------------------------------------------
+def _value(v, kind):
+    if v is None:
+        return b''
+    n = VALUE_FIELDS[kind]
+    if kind == 'string':
+        return _ld(n, v.encode('utf-8'))
+    if kind == 'float':
+        return _float(n, v)
+    if kind == 'double':
+        return _double(n, v)
+    if kind in ('sint', 'sint64'):
+        return _vi(n, _zigzag(v))
+    if kind == 'bool':
+        return _vi(n, int(v))
+    return _vi(n, v)
+#------------------------------------------------------------------------------
+def _geometry(geom, dims, scale, translate, upper_left):
+    if 'x' in geom:
+        parts = [[[geom[d] for d in dims]]]
+    elif 'points' in geom:
+        parts = [geom['points']]
+    else:
+        parts = geom.get('paths') or geom.get('rings')
+    coords = []
+    last = [0] * len(dims)
+    for part in parts:
+        for pt in part:
+            for i, d in enumerate(dims):
+                if d == 'y' and upper_left:
+                    q = round((translate[d] - pt[i]) / scale[d])
+                else:
+                    q = round((pt[i] - translate[d]) / scale[d])
+                coords.append(_zigzag(q - last[i]))
+                last[i] = q
+    buf = b''
+    if 'x' not in geom and 'points' not in geom:
+        buf += _ld(2, b''.join(_varint(len(p)) for p in parts))
+    return buf + _ld(3, b''.join(_varint(c) for c in coords))
+#------------------------------------------------------------------------------
+def encode(esri_json, transform, value_types):
+    """
+    Encode an ESRI JSON feature set, count or ObjectID response to an
+    esriPBuffer FeatureCollection message.
+    """
+    if 'count' in esri_json:
+        return _ld(2, _ld(2, _vi(1, esri_json['count'])))
+    if 'objectIds' in esri_json:
+        ids = _ld(1, esri_json['objectIdFieldName'].encode()) + \
+              _ld(3, b''.join(_varint(i) for i in esri_json['objectIds']))
+        return _ld(2, _ld(3, ids))
+    has_z = esri_json.get('hasZ', False)
+    has_m = esri_json.get('hasM', False)
+    dims = ['x', 'y'] + (['z'] if has_z else []) + (['m'] if has_m else [])
+    scale, translate = transform['scale'], transform['translate']
+    upper_left = transform['origin'] == 'upperLeft'
+
+    sr = esri_json['spatialReference']
+    fr = _ld(1, esri_json['objectIdFieldName'].encode())
+    fr += _vi(7, GEOMETRY_TYPES[esri_json['geometryType']])
+    fr += _ld(8, _vi(1, sr['wkid']) +
+                 (_vi(2, sr['latestWkid']) if 'latestWkid' in sr else b''))
+    if esri_json.get('exceededTransferLimit'):
+        fr += _vi(9, 1)
+    if has_z:
+        fr += _vi(10, 1)
+    if has_m:
+        fr += _vi(11, 1)
+    # Transform: origin enum, Scale/Translate messages (x=1, y=2, m=3, z=4)
+    dim_ids = {'x': 1, 'y': 2, 'm': 3, 'z': 4}
+    tf = _vi(1, 0 if upper_left else 1)
+    tf += _ld(2, b''.join(_double(dim_ids[d], scale[d]) for d in dims))
+    tf += _ld(3, b''.join(_double(dim_ids[d], translate[d]) for d in dims))
+    fr += _ld(12, tf)
+    for f in esri_json['fields']:
+        fr += _ld(13, _ld(1, f['name'].encode()) +
+                      _vi(2, FIELD_TYPES[f['type']]) +
+                      _ld(3, f['alias'].encode()))
+    for feat in esri_json['features']:
+        attrs = feat['attributes']
+        fb = b''.join(_ld(1, _value(attrs[f['name']], value_types[f['name']]))
+                      for f in esri_json['fields'])
+        if feat.get('geometry'):
+            fb += _ld(2, _geometry(feat['geometry'], dims, scale, translate,
+                                   upper_left))
+        fr += _ld(15, fb)
+    return _ld(2, _ld(1, fr))
+#------------------------------------------------------------------------------
+FIXTURES = {}
+
+# points, web mercator with an upper left quantize origin, every attribute
+# value type, negative values, unicode text, nulls and a null geometry
+FIXTURES['points_upper_left'] = (
+    {'objectIdFieldName': 'OBJECTID',
+     'geometryType': 'esriGeometryPoint',
+     'spatialReference': {'wkid': 102100, 'latestWkid': 3857},
+     'fields': [
+         {'name': 'OBJECTID', 'type': 'esriFieldTypeOID', 'alias': 'OBJECTID'},
+         {'name': 'NAME', 'type': 'esriFieldTypeString', 'alias': 'Name',
+          'length': 50},
+         {'name': 'POP', 'type': 'esriFieldTypeInteger', 'alias': 'Population'},
+         {'name': 'RANK', 'type': 'esriFieldTypeSmallInteger', 'alias': 'Rank'},
+         {'name': 'AREA', 'type': 'esriFieldTypeDouble', 'alias': 'Area'},
+         {'name': 'RATIO', 'type': 'esriFieldTypeSingle', 'alias': 'Ratio'},
+         {'name': 'FOUNDED', 'type': 'esriFieldTypeDate', 'alias': 'Founded',
+          'length': 8},
+         {'name': 'GLOBALID', 'type': 'esriFieldTypeGlobalID',
+          'alias': 'GlobalID', 'length': 38}],
+     'features': [
+         {'attributes': {'OBJECTID': 1, 'NAME': 'Washington', 'POP': 689545,
+                         'RANK': 20, 'AREA': 177.0123456789, 'RATIO': 0.25,
+                         'FOUNDED': -5364662400000,
+                         'GLOBALID': '{5A8C7E6B-4C2B-4F7E-9A1D-0B8E2C6F1A11}'},
+          'geometry': {'x': -8575605.3955, 'y': 4707174.0316}},
+         {'attributes': {'OBJECTID': 2, 'NAME': 'São Paulo', 'POP': 12325232,
+                         'RANK': -3, 'AREA': 1521.11, 'RATIO': -1.5,
+                         'FOUNDED': 1262304000000,
+                         'GLOBALID': '{0F4D4A3E-8C91-4B0E-A2C5-7D3B9E1F6C22}'},
+          'geometry': {'x': -5193050.2519, 'y': -2698029.7641}},
+         {'attributes': {'OBJECTID': 3, 'NAME': None, 'POP': None,
+                         'RANK': None, 'AREA': None, 'RATIO': None,
+                         'FOUNDED': None, 'GLOBALID': None},
+          'geometry': {'x': 0.0, 'y': 0.0}},
+         {'attributes': {'OBJECTID': 300000, 'NAME': '', 'POP': 0,
+                         'RANK': 0, 'AREA': 0.0, 'RATIO': 0.0,
+                         'FOUNDED': 0,
+                         'GLOBALID': '{9B2E6D1C-3A7F-4E58-B0C4-1D9A8F2E3B33}'}}]},
+    {'origin': 'upperLeft',
+     'scale': {'x': 0.0001, 'y': 0.0001},
+     'translate': {'x': -20037700.0, 'y': 30241100.0}},
+    {'OBJECTID': 'uint', 'NAME': 'string', 'POP': 'sint', 'RANK': 'sint',
+     'AREA': 'double', 'RATIO': 'float', 'FOUNDED': 'int64',
+     'GLOBALID': 'string'})
+
+# polylines with z values, single and multipart paths, a null geometry
+FIXTURES['polylines_z_multipart'] = (
+    {'objectIdFieldName': 'FID',
+     'geometryType': 'esriGeometryPolyline',
+     'spatialReference': {'wkid': 4326, 'latestWkid': 4326},
+     'hasZ': True,
+     'exceededTransferLimit': True,
+     'fields': [
+         {'name': 'FID', 'type': 'esriFieldTypeOID', 'alias': 'FID'},
+         {'name': 'ROUTE', 'type': 'esriFieldTypeString', 'alias': 'Route',
+          'length': 12},
+         {'name': 'LANES', 'type': 'esriFieldTypeInteger', 'alias': 'Lanes'},
+         {'name': 'UPDATED', 'type': 'esriFieldTypeDate', 'alias': 'Updated',
+          'length': 8}],
+     'features': [
+         {'attributes': {'FID': 0, 'ROUTE': 'I-95', 'LANES': 6,
+                         'UPDATED': 1689206400000},
+          'geometry': {'paths': [[[-77.03653, 38.897676, 15.25],
+                                  [-77.035, 38.8977, 16.5],
+                                  [-77.0301, 38.9012, 12.0]]]}},
+         {'attributes': {'FID': 1, 'ROUTE': 'US-1', 'LANES': 4,
+                         'UPDATED': 1689292800000},
+          'geometry': {'paths': [[[-77.1, 38.8, 0.0], [-77.09, 38.81, 1.5]],
+                                 [[-77.2, 38.7, -2.25], [-77.21, 38.69, -3.0],
+                                  [-77.23, 38.7, -2.5]]]}},
+         {'attributes': {'FID': 2, 'ROUTE': 'MISSING', 'LANES': None,
+                         'UPDATED': None}}]},
+    {'origin': 'upperLeft',
+     'scale': {'x': 1e-9, 'y': 1e-9, 'z': 0.0001},
+     'translate': {'x': -400.0, 'y': 400.0, 'z': -100000.0}},
+    {'FID': 'uint', 'ROUTE': 'string', 'LANES': 'sint64', 'UPDATED': 'uint64'})
+
+# polygons with a lower left quantize origin, a hole and a multipart polygon
+FIXTURES['polygons_lower_left'] = (
+    {'objectIdFieldName': 'OBJECTID',
+     'geometryType': 'esriGeometryPolygon',
+     'spatialReference': {'wkid': 4269},
+     'fields': [
+         {'name': 'OBJECTID', 'type': 'esriFieldTypeOID', 'alias': 'OBJECTID'},
+         {'name': 'PARCEL_ID', 'type': 'esriFieldTypeGUID',
+          'alias': 'Parcel ID', 'length': 38},
+         {'name': 'ACRES', 'type': 'esriFieldTypeDouble', 'alias': 'Acres'}],
+     'features': [
+         {'attributes': {'OBJECTID': 11,
+                         'PARCEL_ID': '{1C0E8F0A-2B5D-4A36-9F71-5E2D4C8B9A44}',
+                         'ACRES': 12.5},
+          'geometry': {'rings': [[[-100.0, 40.0], [-100.0, 41.0],
+                                  [-99.0, 41.0], [-99.0, 40.0],
+                                  [-100.0, 40.0]],
+                                 [[-99.75, 40.25], [-99.25, 40.25],
+                                  [-99.25, 40.75], [-99.75, 40.75],
+                                  [-99.75, 40.25]]]}},
+         {'attributes': {'OBJECTID': 12,
+                         'PARCEL_ID': '{7D3A1B9C-6E2F-4C80-8B14-3F5A2D7E1C55}',
+                         'ACRES': 3.14159},
+          'geometry': {'rings': [[[-98.0, 35.0], [-98.0, 35.5],
+                                  [-97.5, 35.5], [-97.5, 35.0],
+                                  [-98.0, 35.0]],
+                                 [[-96.0, 35.0], [-96.0, 35.25],
+                                  [-95.75, 35.25], [-96.0, 35.0]]]}}]},
+    {'origin': 'lowerLeft',
+     'scale': {'x': 1e-8, 'y': 1e-8},
+     'translate': {'x': -180.0, 'y': -90.0}},
+    {'OBJECTID': 'uint', 'PARCEL_ID': 'string', 'ACRES': 'double'})
+
+# multipoints with m values
+FIXTURES['multipoints_m'] = (
+    {'objectIdFieldName': 'OBJECTID',
+     'geometryType': 'esriGeometryMultipoint',
+     'spatialReference': {'wkid': 4326, 'latestWkid': 4326},
+     'hasM': True,
+     'fields': [
+         {'name': 'OBJECTID', 'type': 'esriFieldTypeOID', 'alias': 'OBJECTID'},
+         {'name': 'SENSOR', 'type': 'esriFieldTypeString', 'alias': 'Sensor',
+          'length': 8}],
+     'features': [
+         {'attributes': {'OBJECTID': 1, 'SENSOR': 'A'},
+          'geometry': {'points': [[10.5, -20.25, 0.0], [10.75, -20.5, 12.5],
+                                  [11.0, -20.0, 25.0]]}},
+         {'attributes': {'OBJECTID': 2, 'SENSOR': 'B'},
+          'geometry': {'points': [[-0.5, 0.5, 1000.125]]}}]},
+    {'origin': 'upperLeft',
+     'scale': {'x': 1e-7, 'y': 1e-7, 'm': 0.001},
+     'translate': {'x': -400.0, 'y': 400.0, 'm': 0.0}},
+    {'OBJECTID': 'uint', 'SENSOR': 'string'})
+
+FIXTURES['count'] = ({'count': 1234567}, None, None)
+FIXTURES['object_ids'] = ({'objectIdFieldName': 'OBJECTID',
+                           'objectIds': [1, 2, 3, 127, 128, 16384, 4000000000]},
+                          None, None)
+#------------------------------------------------------------------------------
+if __name__ == '__main__':
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    for name, (esri_json, transform, value_types) in FIXTURES.items():
+        with open(os.path.join(FIXTURE_DIR, f'{name}.json'), 'w',
+                  encoding='utf-8') as f:
+            json.dump(esri_json, f, indent=1, ensure_ascii=False)
+        with open(os.path.join(FIXTURE_DIR, f'{name}.pbf'), 'wb') as f:
+            f.write(encode(esri_json, transform, value_types))
@@ -0,0 +1,68 @@
+"""
+Tests of chunk_size='auto' (ESRI.probe_chunk_size, target_chunk_seconds
+and target_chunk_bytes), run offline against the recorded f=json fixtures
+(see conftest.FakeService).
+"""
+import json
+
+import grale
+#------------------------------------------------------------------------------
+def _chunks(service, **kwargs):
+    feats = [f for gj in grale.ESRI.iter_wfs_geojsons(service.url, 
+                                                      chunk_size='auto',
+                                                      max_workers=1, **kwargs)
+             for f in json.loads(gj)['features']]
+    requested = sorted((int(p['resultOffset']), int(p['resultRecordCount']))
+                       for p in service.requests)
+    return sorted(f['properties']['OBJECTID'] for f in feats), requested
+#------------------------------------------------------------------------------
+def test_chunks_grow_towards_the_target_time(fake_service, monkeypatch):
+    monkeypatch.setattr(grale.ESRI, 'probe_chunk_size', 1)
+    monkeypatch.setattr(grale.ESRI, 'target_chunk_seconds', 5)
+    service = fake_service('points_upper_left', max_record_count=4)
+    service.elapsed = 1
+    oids, requested = _chunks(service)
+    assert oids == [1, 2, 3, 300000]
+    # the probe chunk, then at most twice the previous chunk size
+    assert requested == [(0, 1), (1, 2), (3, 1)]
+
+def test_slow_chunks_shrink(fake_service, monkeypatch):
+    monkeypatch.setattr(grale.ESRI, 'probe_chunk_size', 2)
+    monkeypatch.setattr(grale.ESRI, 'target_chunk_seconds', 5)
+    service = fake_service('points_upper_left', max_record_count=4)
+    service.elapsed = 10
+    oids, requested = _chunks(service)
+    assert oids == [1, 2, 3, 300000]
+    assert requested == [(0, 2), (2, 1), (3, 1)]
+
+def test_chunks_are_capped_by_the_target_size(fake_service, monkeypatch):
+    monkeypatch.setattr(grale.ESRI, 'probe_chunk_size', 1)
+    monkeypatch.setattr(grale.ESRI, 'target_chunk_seconds', 60)
+    service = fake_service('points_upper_left', max_record_count=4)
+    service.elapsed = 1
+    # less than two features per target response size
+    monkeypatch.setattr(grale.ESRI, 'target_chunk_bytes', 1)
+    oids, requested = _chunks(service)
+    assert oids == [1, 2, 3, 300000]
+    assert requested == [(0, 1), (1, 1), (2, 1), (3, 1)]
+
+def test_overloaded_chunks_are_split(fake_service, monkeypatch):
+    monkeypatch.setattr(grale.ESRI, 'probe_chunk_size', 2)
+    monkeypatch.setattr(grale.ESRI, 'max_refetch', 0)
+    service = fake_service('points_upper_left', max_record_count=4)
+    failed = []
+    def _fail(params):
+        if not failed:
+            failed.append(params)
+            return 503, b'Service Unavailable'
+    service.fail = _fail
+    oids, requested = _chunks(service)
+    assert oids == [1, 2, 3, 300000]
+    # the probe is split in half and later chunks stay below its size
+    assert requested == [(0, 1), (0, 2), (1, 1), (2, 1), (3, 1)]
+
+def test_auto_plans_at_the_max_record_count(fake_service):
+    service = fake_service('points_upper_left', max_record_count=3)
+    plan = grale.ESRI._plan_wfs_requests(service.url, chunk_size='auto')
+    assert plan['adaptive'] and plan['chunk_size'] == 3
+    assert plan['cursor'] == (0, 4)
@@ -0,0 +1,80 @@
+"""
+Tests of ESRI.bulk_download and its chunk scheduling, run offline against
+the recorded f=json fixtures (see conftest.FakeService).
+"""
+import pytest
+
+import grale
+#------------------------------------------------------------------------------
+def _drain(scheduler):
+    order = []
+    while True:
+        chunk = scheduler.next()
+        if chunk is None:
+            return order
+        order.append(chunk[:2])
+
+def _layers(scheduler):
+    scheduler.enqueue('A', [('a1', 0), ('a2', 0), ('a3', 0)])
+    scheduler.enqueue('B', [('b1', 0)])
+    scheduler.enqueue('C', [('c1', 0), ('c2', 0)])
+    return scheduler
+#------------------------------------------------------------------------------
+def test_fair_scheduling_round_robin():
+    scheduler = _layers(grale._chunkScheduler('fair'))
+    assert _drain(scheduler) == [('A', 'a1'), ('B', 'b1'), ('C', 'c1'),
+                                 ('A', 'a2'), ('C', 'c2'), ('A', 'a3')]
+
+def test_smallest_scheduling():
+    scheduler = _layers(grale._chunkScheduler('smallest'))
+    assert _drain(scheduler) == [('B', 'b1'), ('C', 'c1'), ('C', 'c2'),
+                                 ('A', 'a1'), ('A', 'a2'), ('A', 'a3')]
+
+def test_requeued_chunks_rejoin_the_rotation():
+    scheduler = grale._chunkScheduler('fair')
+    scheduler.enqueue('A', [('a1', 0)])
+    scheduler.enqueue('B', [('b1', 0), ('b2', 0)])
+    assert scheduler.next() == ('A', 'a1', 0)
+    # the chunk of A errored and is requested again
+    scheduler.enqueue('A', [('a1', 1)])
+    scheduler.enqueue('C', [])
+    assert _drain(scheduler) == [('B', 'b1'), ('A', 'a1'), ('B', 'b2')]
+#------------------------------------------------------------------------------
+@pytest.fixture
+def layers(fake_service, monkeypatch):
+    """
+    FakeService layers 'A' (4 features) and 'B' (1 feature), 'Group' 
+    raises like a group layer without a maxRecordCount.
+    """
+    service = fake_service('points_upper_left', max_record_count=2)
+    sizes = {'A': 4, 'B': 1}
+    def _metadata(url, **kwargs):
+        layer = url.rstrip('/').split('/')[-1]
+        md = {k: v for k, v in service.metadata.items() 
+              if layer != 'Group' or k not in ('maxRecordCount', 
+                                               'supportedQueryFormats')}
+        md['name'] = layer
+        return md
+    monkeypatch.setattr(grale.ESRI, 'get_service_metadata', _metadata)
+    monkeypatch.setattr(grale.ESRI, 'get_wfs_record_count', 
+                        lambda url, **kwargs: sizes.get(url.split('/')[-2], 4))
+    base = service.url.rsplit('/', 1)[0]
+    return service, {n: f'{base}/{n}' for n in ('A', 'B', 'Group')}
+
+def test_bulk_download(layers, tmp_path):
+    service, urls = layers
+    files = grale.ESRI.bulk_download([urls['A'], urls['B']], str(tmp_path),
+                                     max_workers=2)
+    assert len(files[urls['A']]) == 2
+    assert len(files[urls['B']]) == 1
+
+def test_bulk_download_skips_layers_which_fail_to_plan(layers, tmp_path, capsys):
+    service, urls = layers
+    files = grale.ESRI.bulk_download(list(urls.values()), str(tmp_path),
+                                     max_workers=2)
+    assert files[urls['Group']] == []
+    assert len(files[urls['A']]) == 2
+    assert len(files[urls['B']]) == 1
+    out = capsys.readouterr().out
+    assert "Error: unable to plan the requests (KeyError(" in out
+    assert f"{urls['Group']}\n\t-Error: no requests planned" in out
@@ -0,0 +1,117 @@
+"""
+Checkpoint/resume tests of get_wfs_download, run offline against the
+recorded f=json fixtures (see conftest.FakeService).
+"""
+import json
+
+import grale
+#------------------------------------------------------------------------------
+def _query_offsets(service):
+    return [int(r['resultOffset']) for r in service.requests
+            if 'resultRecordCount' in r]
+
+def _fail_offset(offset):
+    return lambda params: (500, b'{}') \
+        if params.get('resultOffset') == str(offset) else None
+#------------------------------------------------------------------------------
+def test_checkpoint_key_ranges():
+    headers = {'where': '1=1', 'f': 'JSON', 'resultOffset': 2,
+               'resultRecordCount': 2}
+    key, c_range = grale._checkpoint_key(headers)
+    assert c_range == [2, 3]
+    # keys are stable across dictionary ordering
+    assert grale._checkpoint_key(dict(reversed(list(headers.items()))))[0] == key
+    assert grale._checkpoint_key({**headers, 'resultOffset': 4})[0] != key
+
+    where = '(1=1) AND OBJECTID >= 1 AND OBJECTID <= 2'
+    assert grale._checkpoint_key({'where': where})[1] == where
+
+def test_checkpoint_path_tracks_the_request(tmp_path):
+    args = (str(tmp_path), {'name': 'Parks', 'id': 0}, 'https://h/0/query')
+    path = grale._checkpoint_path(*args, {'where': '1=1'}, 100, 'offset')
+    assert path.endswith('.checkpoint.jsonl')
+    assert grale._checkpoint_path(*args, {'where': '1=1'}, 100, 'offset') == path
+    assert grale._checkpoint_path(*args, {'where': 'A=1'}, 100, 'offset') != path
+    assert grale._checkpoint_path(*args, {'where': '1=1'}, 50, 'offset') != path
+    assert grale._checkpoint_path(*args, {'where': '1=1'}, 100, 'objectid') != path
+
+def test_read_checkpoint_keeps_latest_record(tmp_path):
+    ckpt_path = tmp_path / 'layer.checkpoint.jsonl'
+    ckpt_path.write_text(
+        json.dumps({'key': 'a', 'status': 'error'}) + '\n' +
+        json.dumps({'key': 'b', 'status': 'complete'}) + '\n' +
+        json.dumps({'key': 'a', 'status': 'complete'}) + '\n' +
+        # truncated by an interrupted run
+        '{"key": "c", "sta')
+    done = grale._read_checkpoint(str(ckpt_path))
+    assert sorted(done) == ['a', 'b']
+    assert done['a']['status'] == 'complete'
+    assert grale._read_checkpoint(str(tmp_path / 'missing.jsonl')) == {}
+#------------------------------------------------------------------------------
+def test_resume_requests_only_failed_chunks(fake_service, tmp_path, monkeypatch):
+    monkeypatch.setattr(grale.ESRI, 'max_refetch', 0)
+    service = fake_service('points_upper_left')
+    service.fail = _fail_offset(2)
+    first = grale.ESRI.get_wfs_download(service.url, str(tmp_path), max_workers=2)
+    assert len(first) == 2
+    ckpt_path, = tmp_path.glob('*.checkpoint.jsonl')
+    status = {tuple(r['range']): r['status'] for r in
+              grale._read_checkpoint(str(ckpt_path)).values()}
+    assert status == {(0, 1): 'complete', (2, 3): 'error'}
+
+    service.fail = None
+    service.requests.clear()
+    files = grale.ESRI.get_wfs_download(service.url, str(tmp_path),
+                                        max_workers=2, resume=True)
+    # the completed chunk is skipped, the errored chunk is re-issued
+    assert _query_offsets(service) == [2]
+    assert len(files) == 2
+    n_features = 0
+    for f_path in files:
+        with open(f_path) as f:
+            n_features += len(json.load(f)['features'])
+    assert n_features == len(service.features)
+    # the checkpoint is removed once every chunk is complete
+    assert not ckpt_path.exists()
+
+def test_complete_download_leaves_no_checkpoint(fake_service, tmp_path):
+    service = fake_service('points_upper_left')
+    files = grale.ESRI.get_wfs_download(service.url, str(tmp_path), max_workers=2)
+    assert len(files) == 2
+    assert not list(tmp_path.glob('*.checkpoint.jsonl'))
+
+def test_checkpoint_is_keyed_on_chunk_size(fake_service, tmp_path, monkeypatch):
+    monkeypatch.setattr(grale.ESRI, 'max_refetch', 0)
+    service = fake_service('points_upper_left', max_record_count=4)
+    service.fail = _fail_offset(2)
+    grale.ESRI.get_wfs_download(service.url, str(tmp_path), chunk_size=2,
+                                max_workers=2)
+    ckpt_path, = tmp_path.glob('*.checkpoint.jsonl')
+    service.fail = None
+    service.requests.clear()
+    grale.ESRI.get_wfs_download(service.url, str(tmp_path), chunk_size=4,
+                                max_workers=2, resume=True)
+    # a different chunk size does not resume from the other checkpoint
+    assert _query_offsets(service) == [0]
+    assert list(tmp_path.glob('*.checkpoint.jsonl')) == [ckpt_path]
+
+def test_without_resume_all_chunks_are_requested(fake_service, tmp_path,
+                                                 monkeypatch):
+    monkeypatch.setattr(grale.ESRI, 'max_refetch', 0)
+    service = fake_service('points_upper_left')
+    service.fail = _fail_offset(2)
+    grale.ESRI.get_wfs_download(service.url, str(tmp_path), max_workers=2)
+    service.fail = None
+    service.requests.clear()
+    grale.ESRI.get_wfs_download(service.url, str(tmp_path), max_workers=2)
+    assert sorted(_query_offsets(service)) == [0, 2]
+#------------------------------------------------------------------------------
+def test_download_rejects_unknown_format_and_resume(fake_service, tmp_path):
+    service = fake_service('points_upper_left')
+    assert grale.ESRI.get_wfs_download(service.url, str(tmp_path),
+                                       out_format='parquett') == \
+           {'Error: Unsupported out_format'}
+    assert grale.ESRI.get_wfs_download(service.url, str(tmp_path),
+                                       out_format='geojsonseq', resume=True) == \
+           {'Error: resume is only supported for geojson'}
+    assert service.requests == []
@@ -0,0 +1,76 @@
+"""
+Tests of the per-host AIMD concurrency limit (_hostConcurrency) used by 
+sessionWrapper.adaptive_concurrency, on a manual clock.
+"""
+import threading
+
+import grale
+#------------------------------------------------------------------------------
+def _request(hc, clock, seconds=0.1, congested=False):
+    start = hc.acquire()
+    clock.now += seconds
+    hc.release(start, congested)
+#------------------------------------------------------------------------------
+def test_additive_increase(clock):
+    hc = grale._hostConcurrency(initial=4, maximum=32)
+    # about one slot per window of healthy responses
+    for _ in range(4):
+        _request(hc, clock)
+    assert 4.9 < hc.limit < 5
+    _request(hc, clock)
+    assert int(hc.limit) == 5
+    assert hc.in_flight == 0
+
+def test_limit_is_capped(clock):
+    hc = grale._hostConcurrency(initial=40, maximum=6)
+    assert hc.limit == 6
+    for _ in range(20):
+        _request(hc, clock)
+    assert hc.limit == 6
+
+def test_multiplicative_decrease_once_per_round_trip(clock):
+    hc = grale._hostConcurrency(initial=8)
+    starts = [hc.acquire() for _ in range(3)]
+    clock.now += 0.1
+    # responses of requests sent before the decrease are one congestion event
+    for start in starts:
+        hc.release(start, congested=True)
+    assert hc.limit == 4
+    # a request sent after the decrease halves the limit again
+    _request(hc, clock, congested=True)
+    assert hc.limit == 2
+    for _ in range(3):
+        _request(hc, clock, congested=True)
+    assert hc.limit == 1
+
+def test_slow_responses_hold_the_limit(clock):
+    hc = grale._hostConcurrency(initial=4)
+    _request(hc, clock, seconds=0.5)
+    limit = hc.limit
+    # slower than twice (and one second over) the fastest response
+    _request(hc, clock, seconds=2)
+    assert hc.limit == limit
+    _request(hc, clock, seconds=0.6)
+    assert hc.limit > limit
+
+def test_acquire_waits_for_a_free_slot():
+    hc = grale._hostConcurrency(initial=1)
+    start = hc.acquire()
+    acquired = threading.Event()
+    def _waiter():
+        hc.release(hc.acquire())
+        acquired.set()
+    waiter = threading.Thread(target=_waiter)
+    waiter.start()
+    assert not acquired.wait(0.1)
+    hc.release(start)
+    assert acquired.wait(5)
+    waiter.join()
+#------------------------------------------------------------------------------
+def test_limits_are_kept_per_host():
+    session = grale.sessionWrapper(initial_concurrency=3, max_concurrency=9)
+    a = session._host_concurrency('https://a.example.com/arcgis/rest/services')
+    assert session._host_concurrency('https://a.example.com/other') is a
+    b = session._host_concurrency('https://b.example.com/arcgis/rest/services')
+    assert b is not a
+    assert (a.limit, a.maximum) == (3, 9)
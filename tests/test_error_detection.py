@@ -0,0 +1,45 @@
+"""
+Tests of the ESRI error body detection of responses (_is_esri_error).
+"""
+import json
+
+import pytest
+
+import grale
+#------------------------------------------------------------------------------
+def _resp(body, status_code=200):
+    return grale._build_response('https://example.com/q', status_code, body)
+#------------------------------------------------------------------------------
+@pytest.mark.parametrize('body', [
+    b'{"error": {"code": 400, "message": "Invalid query parameters"}}',
+    b'  \n{"error":{"code":498,"message":"Invalid token."}}',
+    b'{"status": "error", "messages": ["Unable to complete operation"]}',
+    b'<html><head><title>Error</title></head></html>',
+    b'Proxy error: upstream connect error',
+])
+def test_error_bodies(body):
+    assert grale._is_esri_error(_resp(body))
+
+@pytest.mark.parametrize('body', [
+    b'{"features": [{"attributes": {"NOTE": "error in survey"}}]}',
+    b'{"fields": [{"name": "ERROR_CODE"}], "features": []}',
+    b'[{"error": "a list is not an error body"}]',
+    b'{"count": 10}',
+    b'<html><body>Parks</body></html>',
+])
+def test_bodies_which_are_not_errors(body):
+    assert not grale._is_esri_error(_resp(body))
+
+def test_error_after_the_prefix_of_non_json_bodies_is_ignored():
+    body = b'x' * 2048 + b' error'
+    assert not grale._is_esri_error(_resp(body))
+
+def test_json_body_is_parsed_once():
+    resp = _resp(json.dumps({'features': [], 'note': 'error'}).encode())
+    assert not grale._is_esri_error(resp)
+    parsed = resp.grale_json
+    assert grale._response_json(resp) is parsed
+
+def test_truncated_json_falls_back_to_the_prefix():
+    assert grale._is_esri_error(_resp(b'{"error": {"code": 500, "mess'))
+    assert not grale._is_esri_error(_resp(b'{"features": [{"attr'))
@@ -0,0 +1,29 @@
+"""
+Tests of the ESRI JSON to GeoJSON conversion (esri_to_geojson).
+"""
+import copy
+import json
+import os
+
+import grale
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 
+                           'fixtures', 'pbf')
+#------------------------------------------------------------------------------
+def test_input_is_not_modified():
+    with open(os.path.join(FIXTURE_DIR, 'polygons_lower_left.json'), 'rb') as f:
+        esri_json = json.loads(f.read())
+    # an unclosed ring is closed on a copy
+    esri_json['features'].append({'attributes': {'OBJECTID': 99},
+                                  'geometry': {'rings': [[[0, 0], [0, 1], 
+                                                          [1, 1], [1, 0]]]}})
+    original = copy.deepcopy(esri_json)
+    first = grale.esri_to_geojson(esri_json)
+    assert esri_json == original
+    assert grale.esri_to_geojson(esri_json) == first
+    assert first['features'][-1]['geometry']['coordinates'][0][0] == \
+           first['features'][-1]['geometry']['coordinates'][0][-1]
+
+    # properties are copies of the attributes
+    first['features'][0]['properties']['grale_utc'] = 't'
+    assert 'grale_utc' not in esri_json['features'][0]['attributes']
@@ -0,0 +1,109 @@
+"""
+Tests of the persistent metadata cache (metadataCache), TTL expiry and 
+conditional revalidation, run offline with patched session responses.
+"""
+import pytest
+
+import grale
+#------------------------------------------------------------------------------
+class _Server(object):
+    """
+    Records the requests sent through GRALE_SESSION.get and answers them
+    with the next queued (status_code, body, headers) response.
+    """
+    def __init__(self):
+        self.requests = []
+        self.responses = []
+    def get(self, url, headers=None, **kwargs):
+        self.requests.append((url, headers))
+        status_code, body, resp_headers = self.responses.pop(0)
+        return grale._build_response(url, status_code, body, resp_headers)
+
+@pytest.fixture
+def server(monkeypatch):
+    server = _Server()
+    monkeypatch.setattr(grale.GRALE_SESSION, 'get', server.get)
+    return server
+
+@pytest.fixture
+def now(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(grale.time, 'time', lambda: now[0])
+    return now
+
+URL = 'https://Example.com/arcgis/rest/services/Parks/MapServer/0?f=json&a=1'
+#------------------------------------------------------------------------------
+def test_fresh_entries_are_answered_without_a_request(server, now, tmp_path):
+    cache = grale.metadataCache(str(tmp_path / 'md.sqlite'), ttl=60)
+    server.responses.append((200, b'{"name": "Parks"}', {}))
+    assert cache.get(URL).content == b'{"name": "Parks"}'
+    now[0] += 59
+    # parameter order and host case do not change the key
+    resp = cache.get('https://example.com/arcgis/rest/services/Parks/'
+                     'MapServer/0?a=1&f=json')
+    assert resp.grale_cache == 'hit'
+    assert resp.content == b'{"name": "Parks"}'
+    assert len(server.requests) == 1
+
+def test_entries_persist_across_cache_objects(server, now, tmp_path):
+    server.responses.append((200, b'{"name": "Parks"}', {}))
+    grale.metadataCache(str(tmp_path / 'md.sqlite')).get(URL)
+    resp = grale.metadataCache(str(tmp_path / 'md.sqlite')).get(URL)
+    assert resp.grale_cache == 'hit'
+    assert len(server.requests) == 1
+
+def test_expired_entries_are_revalidated(server, now, tmp_path):
+    cache = grale.metadataCache(str(tmp_path / 'md.sqlite'), ttl=60)
+    server.responses.append((200, b'{"name": "Parks"}', 
+                             {'ETag': '"v1"', 
+                              'Last-Modified': 'Wed, 01 Oct 2025 00:00:00 GMT'}))
+    cache.get(URL)
+    now[0] += 61
+    server.responses.append((304, b'', {}))
+    resp = cache.get(URL)
+    assert server.requests[1][1] == {
+        'If-None-Match': '"v1"',
+        'If-Modified-Since': 'Wed, 01 Oct 2025 00:00:00 GMT'}
+    assert resp.grale_cache == 'revalidated'
+    assert resp.content == b'{"name": "Parks"}'
+    # the 304 renews the entry
+    now[0] += 59
+    assert cache.get(URL).grale_cache == 'hit'
+    assert len(server.requests) == 2
+
+def test_changed_entries_are_replaced(server, now, tmp_path):
+    cache = grale.metadataCache(str(tmp_path / 'md.sqlite'), ttl=0)
+    server.responses.append((200, b'{"v": 1}', {'ETag': '"v1"'}))
+    cache.get(URL)
+    server.responses.append((200, b'{"v": 2}', {'ETag': '"v2"'}))
+    assert cache.get(URL).content == b'{"v": 2}'
+    server.responses.append((304, b'', {}))
+    assert cache.get(URL).content == b'{"v": 2}'
+    assert server.requests[2][1] == {'If-None-Match': '"v2"'}
+
+def test_entries_without_validators_are_requested_again(server, now, tmp_path):
+    cache = grale.metadataCache(str(tmp_path / 'md.sqlite'), ttl=60)
+    server.responses.append((200, b'{"count": 1}', {}))
+    cache.get(URL)
+    now[0] += 61
+    server.responses.append((200, b'{"count": 2}', {}))
+    resp = cache.get(URL)
+    assert server.requests[1][1] is None
+    assert resp.content == b'{"count": 2}'
+    assert not hasattr(resp, 'grale_cache')
+
+def test_errors_are_not_stored(server, now, tmp_path):
+    cache = grale.metadataCache(str(tmp_path / 'md.sqlite'))
+    server.responses.extend([(200, b'{"error": {"code": 498}}', {}),
+                             (500, b'', {}),
+                             (200, b'{"status": "error", "messages": []}', {}),
+                             (200, b'{"id": 0, "error": {"code": 400}}', {}),
+                             (200, b'{"name": "Parks"}', {})])
+    for _ in range(5):
+        cache.get(URL)
+    assert cache.get(URL).grale_cache == 'hit'
+    assert len(server.requests) == 5
+    cache.clear()
+    server.responses.append((200, b'{"name": "Parks"}', {}))
+    cache.get(URL)
+    assert len(server.requests) == 6
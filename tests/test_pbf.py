@@ -0,0 +1,112 @@
+"""
+Recorded f=pbf / f=json query response pairs, see 
+fixtures/make_pbf_fixtures.py.  The decoded protocol buffer response 
+must equal the ESRI JSON response within the quantization tolerance 
+of the response transform.
+"""
+import json
+import os
+
+import pytest
+
+import grale
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 
+                           'fixtures', 'pbf')
+FEATURE_FIXTURES = ['points_upper_left', 'polylines_z_multipart', 
+                    'polygons_lower_left', 'multipoints_m']
+# largest quantization step (transform scale) of the fixtures
+TOLERANCE = 1e-4
+#------------------------------------------------------------------------------
+def _load(name):
+    with open(os.path.join(FIXTURE_DIR, f'{name}.pbf'), 'rb') as f:
+        pbf = f.read()
+    with open(os.path.join(FIXTURE_DIR, f'{name}.json'), 'rb') as f:
+        esri_json = json.loads(f.read())
+    return grale.esri_pbf_to_json(pbf), esri_json
+#------------------------------------------------------------------------------
+def _assert_close(decoded, expected, path='', tol=TOLERANCE):
+    """
+    Recursively compare decoded and expected values, floats within tol.
+    """
+    if isinstance(expected, dict):
+        assert isinstance(decoded, dict), path
+        assert decoded.keys() == expected.keys(), path
+        for k in expected:
+            _assert_close(decoded[k], expected[k], f'{path}/{k}', tol)
+    elif isinstance(expected, list):
+        assert isinstance(decoded, list), path
+        assert len(decoded) == len(expected), path
+        for i, (d, e) in enumerate(zip(decoded, expected)):
+            _assert_close(d, e, f'{path}/{i}', tol)
+    elif isinstance(expected, float):
+        assert decoded == pytest.approx(expected, abs=tol), path
+    else:
+        assert decoded == expected, path
+        assert type(decoded) is type(expected), path
+#------------------------------------------------------------------------------
+@pytest.mark.parametrize('name', FEATURE_FIXTURES)
+def test_feature_set_metadata(name):
+    decoded, esri_json = _load(name)
+    for key in ('objectIdFieldName', 'geometryType', 'spatialReference', 
+                'hasZ', 'hasM', 'exceededTransferLimit'):
+        assert decoded.get(key) == esri_json.get(key), key
+    assert [(f['name'], f['type'], f['alias']) for f in decoded['fields']] == \
+           [(f['name'], f['type'], f['alias']) for f in esri_json['fields']]
+
+@pytest.mark.parametrize('name', FEATURE_FIXTURES)
+def test_feature_attributes(name):
+    decoded, esri_json = _load(name)
+    assert len(decoded['features']) == len(esri_json['features'])
+    for d, e in zip(decoded['features'], esri_json['features']):
+        _assert_close(d['attributes'], e['attributes'], tol=0)
+
+@pytest.mark.parametrize('name', FEATURE_FIXTURES)
+def test_feature_geometries(name):
+    decoded, esri_json = _load(name)
+    for d, e in zip(decoded['features'], esri_json['features']):
+        _assert_close(d.get('geometry'), e.get('geometry'))
+
+@pytest.mark.parametrize('name', FEATURE_FIXTURES)
+def test_geojson_conversion(name):
+    decoded, esri_json = _load(name)
+    _assert_close(grale.esri_to_geojson(decoded), 
+                  grale.esri_to_geojson(esri_json))
+#------------------------------------------------------------------------------
+def test_upper_left_origin_flips_y():
+    decoded, esri_json = _load('points_upper_left')
+    # y is quantized downward from translate y (30241100) in the pbf response
+    assert decoded['features'][0]['geometry']['y'] == \
+           pytest.approx(4707174.0316, abs=TOLERANCE)
+    assert decoded['features'][1]['geometry']['y'] < 0
+
+def test_delta_coordinates_span_parts():
+    decoded, _ = _load('polylines_z_multipart')
+    paths = decoded['features'][1]['geometry']['paths']
+    # deltas continue across parts, the second part starts at the absolute
+    # coordinate rather than relative to zero
+    assert [len(p) for p in paths] == [2, 3]
+    assert paths[1][0] == pytest.approx([-77.2, 38.7, -2.25], abs=TOLERANCE)
+
+def test_null_geometry():
+    for name, i in (('points_upper_left', 3), ('polylines_z_multipart', 2)):
+        decoded, _ = _load(name)
+        assert decoded['features'][i].get('geometry') is None
+        gj = grale.esri_to_geojson(decoded)
+        assert gj['features'][i]['geometry'] is None
+
+def test_polygon_holes_and_parts():
+    decoded, _ = _load('polygons_lower_left')
+    gj = grale.esri_to_geojson(decoded)
+    assert gj['features'][0]['geometry']['type'] == 'Polygon'
+    assert len(gj['features'][0]['geometry']['coordinates']) == 2
+    assert gj['features'][1]['geometry']['type'] == 'MultiPolygon'
+    assert len(gj['features'][1]['geometry']['coordinates']) == 2
+
+def test_count_result():
+    decoded, esri_json = _load('count')
+    assert decoded == esri_json
+
+def test_object_ids_result():
+    decoded, esri_json = _load('object_ids')
+    assert decoded == esri_json
@@ -0,0 +1,86 @@
+"""
+Tests of the per-host token bucket rate limits (_tokenBucket and 
+sessionWrapper.rate_limits), on a manual clock.
+"""
+import pytest
+
+import grale
+#------------------------------------------------------------------------------
+def test_requests_queue_behind_earlier_reservations(clock):
+    bucket = grale._tokenBucket(rate=10)
+    waits = [bucket.reserve() for _ in range(4)]
+    assert waits == pytest.approx([0, 0.1, 0.2, 0.3])
+
+def test_burst(clock):
+    bucket = grale._tokenBucket(rate=2, burst=3)
+    waits = [bucket.reserve() for _ in range(5)]
+    assert waits == pytest.approx([0, 0, 0, 0.5, 1.0])
+
+def test_tokens_refill_up_to_the_burst(clock):
+    bucket = grale._tokenBucket(rate=2, burst=2)
+    assert [bucket.reserve() for _ in range(2)] == [0, 0]
+    clock.now += 0.5
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(0.5)
+    # idle time does not accumulate more than burst tokens
+    clock.now += 60
+    assert [bucket.reserve() for _ in range(2)] == [0, 0]
+    assert bucket.reserve() == pytest.approx(0.5)
+#------------------------------------------------------------------------------
+def test_rate_wait_matches_the_host(clock):
+    session = grale.sessionWrapper(rate_limits={'a.example.com': 4})
+    url = 'https://a.example.com/arcgis/rest/services/X/FeatureServer/0/query'
+    assert session._rate_wait(url) == 0
+    assert session._rate_wait(url) == pytest.approx(0.25)
+    # other hosts are not limited
+    assert session._rate_wait('https://b.example.com/query') == 0
+    assert session._rate_wait('https://b.example.com/query') == 0
+
+def test_rate_wait_scheme_host_and_burst(clock):
+    session = grale.sessionWrapper(
+                        rate_limits={'https://a.example.com': (1, 2)})
+    url = 'https://a.example.com/query'
+    assert [session._rate_wait(url) for _ in range(3)] == \
+           pytest.approx([0, 0, 1])
+    assert session._rate_wait('http://a.example.com/query') == 0
+
+def test_rate_wait_rebuilds_the_bucket_on_change(clock):
+    session = grale.sessionWrapper(rate_limits={'a.example.com': 1})
+    url = 'https://a.example.com/query'
+    session._rate_wait(url)
+    assert session._rate_wait(url) == pytest.approx(1)
+    session.rate_limits['a.example.com'] = 100
+    assert session._rate_wait(url) == 0
+    assert session._rate_wait(url) == pytest.approx(0.01)
+#------------------------------------------------------------------------------
+def test_retries_reserve_the_rate_limit(monkeypatch):
+    import threading
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+
+    statuses = [503, 503, 200]
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(statuses.pop(0))
+            self.send_header('Content-Length', '2')
+            self.end_headers()
+            self.wfile.write(b'{}')
+        def log_message(self, *args):
+            pass
+    server = HTTPServer(('127.0.0.1', 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        host = f'127.0.0.1:{server.server_port}'
+        session = grale.sessionWrapper(rate_limits={host: 1000})
+        reservations = []
+        rate_wait = session._rate_wait
+        monkeypatch.setattr(session, '_rate_wait',
+                            lambda url: reservations.append(url) or rate_wait(url))
+        resp = session.get(f'http://{host}/query')
+        assert resp.status_code == 200
+        # the 503 responses are retried by get, not the urllib3 Retry
+        assert statuses == []
+        assert len(reservations) == 3
+    finally:
+        server.shutdown()
+        server.server_close()
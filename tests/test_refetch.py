@@ -0,0 +1,138 @@
+"""
+Tests of the re-request of errored and short chunks (ESRI.max_refetch and
+ESRI.split_refetch), run offline against the recorded f=json fixtures
+(see conftest.FakeService).
+"""
+import json
+
+import grale
+#------------------------------------------------------------------------------
+def _features(service, **kwargs):
+    return [f for gj in grale.ESRI.iter_wfs_geojsons(service.url, max_workers=2,
+                                                     **kwargs)
+            for f in json.loads(gj)['features']]
+
+def _oids(feats):
+    return sorted(f['properties']['OBJECTID'] for f in feats)
+
+def _fail_once(match, response=(500, b'{}')):
+    """
+    Returns a FakeService.fail function failing the first request with
+    query parameters matching the match function.
+    """
+    failed = []
+    def _fail(params):
+        if not failed and match(params):
+            failed.append(params)
+            return response
+    return _fail
+#------------------------------------------------------------------------------
+def test_split_offset_request():
+    iheaders = {'where': '1=1', 'resultOffset': 10, 'resultRecordCount': 5}
+    assert grale.ESRI._split_wfs_request({}, iheaders) == [
+        {'where': '1=1', 'resultOffset': 10, 'resultRecordCount': 2},
+        {'where': '1=1', 'resultOffset': 12, 'resultRecordCount': 3}]
+    assert grale.ESRI._split_wfs_request(
+        {}, {**iheaders, 'resultRecordCount': 1}) == []
+
+def test_split_objectid_request():
+    plan = {'headers': {'where': '1=1'}, 'oid_field': 'OID',
+            'oids': [1, 2, 3, 300000], 'oid_ranges': {}}
+    iheaders = grale.ESRI._oid_range_request(plan['headers'], 'OID', 1, 300000)
+    plan['oid_ranges'][iheaders['where']] = (1, 300000)
+    assert grale.ESRI._expected_features(plan, iheaders) == 4
+    low, high = grale.ESRI._split_wfs_request(plan, iheaders)
+    # split on the middle ObjectID rather than the middle of the range
+    assert plan['oid_ranges'][low['where']] == (1, 2)
+    assert plan['oid_ranges'][high['where']] == (3, 300000)
+    assert grale.ESRI._expected_features(plan, high) == 2
+
+    # statistics plans (no ObjectID list) split the range in half
+    plan['oids'] = None
+    low, high = grale.ESRI._split_wfs_request(plan, iheaders)
+    assert plan['oid_ranges'][low['where']] == (1, 150000)
+    assert plan['oid_ranges'][high['where']] == (150001, 300000)
+#------------------------------------------------------------------------------
+def test_errored_chunk_is_requested_again(fake_service):
+    service = fake_service('points_upper_left')
+    service.fail = _fail_once(lambda p: p.get('resultOffset') == '2')
+    feats = _features(service)
+    assert _oids(feats) == [1, 2, 3, 300000]
+    assert [p['resultOffset'] for p in service.requests].count('2') == 2
+
+def test_short_chunk_is_requested_again(fake_service):
+    service = fake_service('points_upper_left')
+    short = {**service.esri_json, 'features': service.features[2:3]}
+    service.fail = _fail_once(lambda p: p.get('resultOffset') == '2',
+                              (200, json.dumps(short).encode()))
+    feats = _features(service)
+    # the short response is replaced by the complete response
+    assert _oids(feats) == [1, 2, 3, 300000]
+    assert len(service.requests) == 3
+
+def test_split_refetch(fake_service, monkeypatch):
+    monkeypatch.setattr(grale.ESRI, 'split_refetch', True)
+    service = fake_service('points_upper_left')
+    service.fail = _fail_once(lambda p: p.get('resultOffset') == '2')
+    assert _oids(_features(service)) == [1, 2, 3, 300000]
+    refetched = [(p['resultOffset'], p['resultRecordCount'])
+                 for p in service.requests[2:]]
+    assert sorted(refetched) == [('2', '1'), ('3', '1')]
+
+def test_split_refetch_objectid(fake_service, monkeypatch):
+    monkeypatch.setattr(grale.ESRI, 'split_refetch', True)
+    service = fake_service('points_upper_left')
+    service.fail = _fail_once(lambda p: p['where'].endswith('<= 300000'))
+    assert _oids(_features(service, pagination='objectid')) == [1, 2, 3, 300000]
+    assert sorted(p['where'] for p in service.requests[2:]) == [
+        '(1=1) AND OBJECTID >= 3 AND OBJECTID <= 3',
+        '(1=1) AND OBJECTID >= 4 AND OBJECTID <= 300000']
+
+def test_refetch_gives_up_after_max_refetch(fake_service, monkeypatch):
+    monkeypatch.setattr(grale.ESRI, 'max_refetch', 2)
+    service = fake_service('points_upper_left')
+    service.fail = lambda p: (500, b'{}') if p.get('resultOffset') == '2' else None
+    # the last attempt is returned as is (empty)
+    assert _oids(_features(service)) == [1, 2]
+    assert [p['resultOffset'] for p in service.requests].count('2') == 3
+
+def test_refetch_disabled(fake_service, monkeypatch):
+    monkeypatch.setattr(grale.ESRI, 'max_refetch', 0)
+    service = fake_service('points_upper_left')
+    service.fail = _fail_once(lambda p: p.get('resultOffset') == '2')
+    assert _oids(_features(service)) == [1, 2]
+    assert len(service.requests) == 2
+
+def test_low_memory_refetch_leaves_no_temp_files(fake_service, tmp_path,
+                                                 monkeypatch):
+    monkeypatch.setattr(grale, '_make_temp_dir', lambda: str(tmp_path))
+    service = fake_service('points_upper_left')
+    service.fail = _fail_once(lambda p: p.get('resultOffset') == '2')
+    paths = list(grale.ESRI.iter_wfs_geojsons(service.url, max_workers=2,
+                                              low_memory=True))
+    # the discarded attempt is not written to a temp file
+    assert sorted(str(p) for p in tmp_path.iterdir()) == sorted(paths)
+    assert len(paths) == 2
+
+def test_refetch_stays_within_the_window(fake_service, monkeypatch):
+    import threading
+    import time
+    monkeypatch.setattr(grale.ESRI, 'split_refetch', True)
+    service = fake_service('points_upper_left', max_record_count=1)
+    service.fail = lambda p: (500, b'{}') if len(service.requests) <= 4 else None
+    get, lock = service.get, threading.Lock()
+    active, peak = [0], [0]
+    def _get(url, **kwargs):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.01)
+        try:
+            return get(url, **kwargs)
+        finally:
+            with lock:
+                active[0] -= 1
+    monkeypatch.setattr(grale.GRALE_SESSION, 'get', _get)
+    feats = _features(service, window=1)
+    assert _oids(feats) == [1, 2, 3, 300000]
+    assert peak[0] == 1
@@ -0,0 +1,138 @@
+"""
+Tests of the content addressed response cache (responseCache), least 
+recently used eviction and replay only mode, run offline.
+"""
+import threading
+
+import pytest
+import requests
+
+import grale
+#------------------------------------------------------------------------------
+@pytest.fixture
+def now(monkeypatch):
+    now = [1000.0]
+    def _time():
+        now[0] += 1
+        return now[0]
+    monkeypatch.setattr(grale.time, 'time', _time)
+    return now
+
+def _resp(body, status_code=200):
+    return grale._build_response('https://example.com/q', status_code, body,
+                                 {'Content-Type': 'application/json'})
+
+def _blobs(cache_dir):
+    return sorted(p.name for p in (cache_dir / 'objects').rglob('*.gz'))
+#------------------------------------------------------------------------------
+def test_round_trip_and_content_addressing(tmp_path):
+    cache = grale.responseCache(str(tmp_path))
+    assert cache.get('https://example.com/q?a=1') is None
+    cache.put('https://example.com/q?a=1', _resp(b'{"a": 1}'))
+    cache.put('https://example.com/q?b=1', _resp(b'{"a": 1}'))
+    resp = cache.get('https://example.com/q?a=1')
+    assert resp.content == b'{"a": 1}'
+    assert resp.headers['Content-Type'] == 'application/json'
+    assert resp.grale_cache == 'replay'
+    # one body for both urls
+    assert len(_blobs(tmp_path)) == 1
+    assert cache._bytes == cache._stored_bytes()
+    # a new cache object reads the index and the running size
+    assert grale.responseCache(str(tmp_path))._bytes == cache._bytes
+
+def test_errors_are_not_stored(tmp_path):
+    cache = grale.responseCache(str(tmp_path))
+    cache.put('https://example.com/q?a=1', _resp(b'{"error": {"code": 400}}'))
+    cache.put('https://example.com/q?a=2', _resp(b'{}', status_code=500))
+    cache.put('https://example.com/q?a=3', 
+              _resp(b'{"status": "error", "messages": ["Invalid query"]}'))
+    for a in (1, 2, 3):
+        assert cache.get(f'https://example.com/q?a={a}') is None
+    assert cache._bytes == 0
+
+def test_replaced_bodies_are_removed(tmp_path):
+    cache = grale.responseCache(str(tmp_path))
+    cache.put('https://example.com/q?a=1', _resp(b'{"v": 1}'))
+    cache.put('https://example.com/q?a=1', _resp(b'{"v": 2}'))
+    assert cache.get('https://example.com/q?a=1').content == b'{"v": 2}'
+    assert len(_blobs(tmp_path)) == 1
+    assert cache._bytes == cache._stored_bytes()
+
+def test_least_recently_used_are_evicted(tmp_path, now):
+    cache = grale.responseCache(str(tmp_path))
+    bodies = {n: (n * 200).encode() for n in 'abc'}
+    for n, body in bodies.items():
+        cache.put(f'https://example.com/q?{n}=1', _resp(body))
+    size = cache._bytes // 3
+    # a is used again, b is now the least recently used
+    cache.get('https://example.com/q?a=1')
+    cache.max_bytes = size * 2
+    cache.put('https://example.com/q?d=1', _resp(b'd' * 200))
+    assert cache.get('https://example.com/q?b=1') is None
+    assert cache.get('https://example.com/q?c=1') is None
+    assert cache.get('https://example.com/q?a=1').content == bodies['a']
+    assert cache.get('https://example.com/q?d=1') is not None
+    assert len(_blobs(tmp_path)) == 2
+    assert cache._bytes == cache._stored_bytes() <= cache.max_bytes
+
+def test_shared_bodies_are_kept_until_unreferenced(tmp_path, now):
+    cache = grale.responseCache(str(tmp_path))
+    cache.put('https://example.com/q?a=1', _resp(b'x' * 200))
+    cache.put('https://example.com/q?b=1', _resp(b'x' * 200))
+    cache.put('https://example.com/q?c=1', _resp(b'y' * 200))
+    cache.max_bytes = cache._bytes - 1
+    cache._evict()
+    # both urls of the shared body are evicted before its body is removed
+    assert cache.get('https://example.com/q?a=1') is None
+    assert cache.get('https://example.com/q?b=1') is None
+    assert cache.get('https://example.com/q?c=1') is not None
+    assert len(_blobs(tmp_path)) == 1
+
+def test_missing_body_is_a_miss(tmp_path):
+    cache = grale.responseCache(str(tmp_path))
+    cache.put('https://example.com/q?a=1', _resp(b'{"a": 1}'))
+    for blob in (tmp_path / 'objects').rglob('*.gz'):
+        blob.unlink()
+    assert cache.get('https://example.com/q?a=1') is None
+    # the next put stores the body again
+    cache.put('https://example.com/q?a=1', _resp(b'{"a": 1}'))
+    assert cache.get('https://example.com/q?a=1').content == b'{"a": 1}'
+
+def test_concurrent_put_and_eviction(tmp_path):
+    cache = grale.responseCache(str(tmp_path), max_bytes=2000)
+    errors = []
+    def _worker(n):
+        try:
+            for i in range(50):
+                # shared bodies are stored and evicted concurrently
+                cache.put(f'https://example.com/q?w={n}&i={i}', 
+                          _resp(str(i % 7).encode() * 500))
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=_worker, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert cache._bytes == cache._stored_bytes() <= cache.max_bytes
+    digests = {r[0] for r in cache.conn.execute('SELECT digest FROM responses')}
+    assert {f'{d}.gz' for d in digests} == set(_blobs(tmp_path))
+#------------------------------------------------------------------------------
+def test_session_replay(tmp_path, monkeypatch):
+    sent = []
+    def _get(session, url, **kwargs):
+        sent.append(url)
+        return _resp(b'{"a": 1}')
+    monkeypatch.setattr(requests.Session, 'get', _get)
+    session = grale.sessionWrapper(response_cache=grale.responseCache(str(tmp_path)))
+    url = 'https://example.com/q?a=1'
+    assert session.get(url).content == b'{"a": 1}'
+    resp = session.get(url)
+    assert resp.grale_cache == 'replay'
+    assert sent == [url]
+
+    session.response_cache.replay_only = True
+    with pytest.raises(requests.exceptions.ConnectionError):
+        session.get('https://example.com/q?a=2')
+    assert sent == [url]
@@ -0,0 +1,25 @@
+"""
+Tests of ESRI.get_rest_data_source_defs, run offline with patched session
+responses.
+"""
+import json
+
+import grale
+#------------------------------------------------------------------------------
+def test_invalid_json_definition_is_reported_per_source(monkeypatch):
+    base = 'https://example.com/arcgis/rest/services/Parks/MapServer'
+    bodies = {f'{base}/0': json.dumps({'id': 0, 'name': 'Parks'}).encode(),
+              f'{base}/1': b'<html><body>Bad Gateway</body></html>'}
+    def _get(url, **kwargs):
+        return grale._build_response(url, 200, bodies[url.split('?')[0]])
+    monkeypatch.setattr(grale.GRALE_SESSION, 'get', _get)
+    monkeypatch.setattr(grale.GRALE_SESSION, 'response_cache', None)
+    monkeypatch.setattr(grale.ESRI, 'metadata_cache', None)
+    sources = {url: {'name': url[-1]} for url in bodies}
+    defs = grale.ESRI.get_rest_data_source_defs(sources, max_workers=2)
+    # the order and the other definitions are kept
+    assert list(defs) == list(sources)
+    assert defs[f'{base}/0']['source_definition'] == {'id': 0, 'name': 'Parks'}
+    error = defs[f'{base}/1']['source_definition']['Error']
+    assert error['message'].startswith('Invalid JSON response')
+    assert defs[f'{base}/1']['name'] == '1'
@@ -0,0 +1,193 @@
+"""
+Round trip tests of the single file get_wfs_download output formats,
+written from the recorded f=json fixtures (see conftest.FakeService) and
+read back with the standard readers of each format.
+"""
+import json
+import sqlite3
+import struct
+
+import pytest
+
+import grale
+#------------------------------------------------------------------------------
+def _download(service, tmp_path, out_format, **kwargs):
+    return grale.ESRI.get_wfs_download(service.url, str(tmp_path),
+                                       out_format=out_format, max_workers=2,
+                                       **kwargs)
+#------------------------------------------------------------------------------
+def test_geojsonseq_round_trip(fake_service, tmp_path):
+    service = fake_service('points_upper_left')
+    f_path, md_path = _download(service, tmp_path, 'geojsonseq')
+    with open(f_path, 'rb') as f:
+        data = f.read()
+    # RFC 8142 framing, record separator ... line feed
+    records = data.split(b'\x1e')
+    assert records[0] == b''
+    assert all(r.endswith(b'\n') for r in records[1:])
+    feats = [json.loads(r) for r in records[1:]]
+    assert len(feats) == len(service.features)
+    assert all(f['type'] == 'Feature' for f in feats)
+    assert sorted(f['properties']['OBJECTID'] for f in feats) == \
+           [f['attributes']['OBJECTID'] for f in service.features]
+    with open(md_path) as f:
+        md = json.load(f)
+    assert md['request_metadata'][0]['name'] == 'points_upper_left'
+    assert len(md['request_logging']) == 2
+
+def test_geojsonseq_gzip(fake_service, tmp_path):
+    import gzip
+    service = fake_service('points_upper_left')
+    f_path = _download(service, tmp_path, 'geojsonseq', compression='gzip')[0]
+    assert f_path.endswith('.geojsons.gz')
+    with gzip.open(f_path, 'rb') as f:
+        assert f.read().count(b'\x1e') == len(service.features)
+#------------------------------------------------------------------------------
+def test_parquet_round_trip(fake_service, tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    service = fake_service('points_upper_left')
+    f_path = _download(service, tmp_path, 'parquet')[0]
+    pf = pq.ParquetFile(f_path)
+    # one row group per chunk
+    assert pf.metadata.num_row_groups == 2
+    table = pf.read()
+    assert table.num_rows == len(service.features)
+    schema = table.schema
+    assert str(schema.field('POP').type) == 'int32'
+    assert str(schema.field('RANK').type) == 'int16'
+    assert str(schema.field('FOUNDED').type) == 'timestamp[ms, tz=UTC]'
+
+    geo = json.loads(pf.metadata.metadata[b'geo'])
+    col = geo['columns']['geometry']
+    assert geo['primary_column'] == 'geometry'
+    assert col['encoding'] == 'WKB'
+    assert col['geometry_types'] == ['Point']
+    assert col['covering'] == {'bbox': {k: ['bbox', k] for k in
+                                        ('xmin', 'ymin', 'xmax', 'ymax')}}
+    # the file bbox covers every row bbox
+    boxes = [b for b in table.column('bbox').to_pylist() if b]
+    assert col['bbox'] == [min(b['xmin'] for b in boxes),
+                           min(b['ymin'] for b in boxes),
+                           max(b['xmax'] for b in boxes),
+                           max(b['ymax'] for b in boxes)]
+    grale_md = json.loads(pf.metadata.metadata[b'grale'])
+    assert len(grale_md['request_logging']) == 2
+
+def test_parquet_z_geometry_types(fake_service, tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    service = fake_service('polylines_z_multipart')
+    f_path = _download(service, tmp_path, 'parquet')[0]
+    geo = json.loads(pq.ParquetFile(f_path).metadata.metadata[b'geo'])
+    assert geo['columns']['geometry']['geometry_types'] == \
+           ['LineString Z', 'MultiLineString Z']
+#------------------------------------------------------------------------------
+def test_gpkg_round_trip(fake_service, tmp_path):
+    service = fake_service('points_upper_left')
+    f_path = _download(service, tmp_path, 'gpkg')[0]
+    conn = sqlite3.connect(f_path)
+    try:
+        assert conn.execute('PRAGMA application_id').fetchone()[0] == 1196444487
+        table, data_type, srs_id = conn.execute(
+            'SELECT table_name, data_type, srs_id FROM gpkg_contents').fetchone()
+        assert (table, data_type, srs_id) == ('points_upper_left', 'features', 4326)
+        assert conn.execute('SELECT column_name, geometry_type_name, srs_id '
+                            'FROM gpkg_geometry_columns').fetchone() == \
+               ('geom', 'POINT', 4326)
+        rows = conn.execute(f'SELECT fid, geom, OBJECTID FROM "{table}" '
+                            'ORDER BY OBJECTID').fetchall()
+        assert len(rows) == len(service.features)
+        for fid, geom, oid in rows:
+            if geom is None:
+                continue
+            magic, version, flags, blob_srs = struct.unpack('<2sBBi', geom[:8])
+            assert (magic, version, blob_srs) == (b'GP', 0, 4326)
+            # little endian with an xy envelope
+            assert flags == 0b00000011
+            minx, maxx, miny, maxy = struct.unpack('<4d', geom[8:40])
+            x, y = struct.unpack('<2d', geom[45:61])
+            assert (minx, miny) == (maxx, maxy) == (x, y)
+        # the rtree indexes every non-null geometry
+        n_geoms = sum(geom is not None for _, geom, _ in rows)
+        assert conn.execute(f'SELECT count(*) FROM "rtree_{table}_geom"'
+                            ).fetchone()[0] == n_geoms
+    finally:
+        conn.close()
+
+def test_parquet_mismatched_values(fake_service, tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    service = fake_service('points_upper_left')
+    service.features[0]['attributes']['POP'] = 'n/a'
+    service.features[1]['attributes']['POP'] = '42'
+    service.features[2]['attributes']['NAME'] = 7
+    f_path = _download(service, tmp_path, 'parquet')[0]
+    table = pq.read_table(f_path).sort_by('OBJECTID')
+    assert table.column('POP').to_pylist()[:2] == [None, 42]
+    assert table.column('NAME').to_pylist()[2] == '7'
+
+def test_parquet_failed_write_removes_file(fake_service, tmp_path, monkeypatch):
+    pq = pytest.importorskip('pyarrow.parquet')
+    service = fake_service('points_upper_left')
+    write_table = pq.ParquetWriter.write_table
+    calls = []
+    def _write_table(self, *args, **kwargs):
+        calls.append(1)
+        if len(calls) == 2:
+            raise OSError('disk full')
+        return write_table(self, *args, **kwargs)
+    monkeypatch.setattr(pq.ParquetWriter, 'write_table', _write_table)
+    with pytest.raises(OSError):
+        _download(service, tmp_path, 'parquet')
+    assert not list(tmp_path.glob('*.parquet'))
+
+def test_geojsonseq_failed_write_removes_file(fake_service, tmp_path,
+                                              monkeypatch):
+    service = fake_service('points_upper_left')
+    open_output_stream = grale._open_output_stream
+    def _open(*args, **kwargs):
+        f_path, out = open_output_stream(*args, **kwargs)
+        write, calls = out.write, []
+        def _write(data):
+            calls.append(1)
+            if len(calls) == 2:
+                raise OSError('disk full')
+            return write(data)
+        out.write = _write
+        return f_path, out
+    monkeypatch.setattr(grale, '_open_output_stream', _open)
+    with pytest.raises(OSError):
+        _download(service, tmp_path, 'geojsonseq')
+    assert not list(tmp_path.glob('*.geojsons*'))
+
+def test_gpkg_failed_write_removes_file(fake_service, tmp_path, monkeypatch):
+    service = fake_service('points_upper_left')
+    write = grale._geoPackageWriter.write
+    calls = []
+    def _write(self, *args):
+        calls.append(1)
+        if len(calls) == 2:
+            raise sqlite3.OperationalError('disk I/O error')
+        return write(self, *args)
+    monkeypatch.setattr(grale._geoPackageWriter, 'write', _write)
+    assert _download(service, tmp_path, 'gpkg') == []
+    assert not list(tmp_path.glob('*.gpkg'))
+
+def test_gpkg_fid_object_id_field(fake_service, tmp_path):
+    service = fake_service('points_upper_left')
+    # shapefile backed services name the ObjectID field FID
+    for f in service.features:
+        f['attributes']['FID'] = f['attributes'].pop('OBJECTID')
+    for fld in service.esri_json['fields']:
+        if fld['name'] == 'OBJECTID':
+            fld['name'] = 'FID'
+    service.oid_field = service.metadata['objectIdField'] = 'FID'
+    f_path = _download(service, tmp_path, 'gpkg')[0]
+    conn = sqlite3.connect(f_path)
+    try:
+        table = conn.execute('SELECT table_name FROM gpkg_contents '
+                             "WHERE data_type = 'features'").fetchone()[0]
+        rows = conn.execute(f'SELECT fid, FID_1 FROM "{table}" '
+                            'ORDER BY FID_1').fetchall()
+    finally:
+        conn.close()
+    assert [oid for _, oid in rows] == \
+           [f['attributes']['FID'] for f in service.features]